@@ -1,9 +1,14 @@
-from .bfs import solve_bfs
-from .dfs import solve_dfs
+from typing import Optional
+from ..models import SearchOptions
+from .bfs import solve_bfs, solve_bfs_headless
+from .dfs import solve_dfs, solve_dfs_headless
 
-from .bidirectional import solve_bidirectional_bfs
-from .greedy import solve_greedy
-from .astar import solve_astar
+from .bidirectional import solve_bidirectional_bfs, solve_bidirectional_bfs_headless
+from .greedy import solve_greedy, solve_greedy_headless
+from .astar import solve_astar, solve_astar_headless
+from .jps import solve_jps, solve_jps_headless
+from .dead_end import solve_dead_end_filling, solve_dead_end_filling_headless
+from .hpa import solve_hpa, solve_hpa_headless
 
 ALGORITHMS = {
     "BFS": solve_bfs,
@@ -11,5 +16,33 @@ ALGORITHMS = {
 
     "Bidirectional BFS": solve_bidirectional_bfs,
     "Greedy Best-First Search": solve_greedy,
-    "A*": solve_astar
+    "A*": solve_astar,
+    "Jump Point Search": solve_jps,
+    "Dead-End Filling": solve_dead_end_filling,
+    "HPA*": solve_hpa
 }
+
+# Stats-only variants: same search, one SolveSummary instead of a StepUpdate trace
+HEADLESS_ALGORITHMS = {
+    "BFS": solve_bfs_headless,
+    "DFS": solve_dfs_headless,
+
+    "Bidirectional BFS": solve_bidirectional_bfs_headless,
+    "Greedy Best-First Search": solve_greedy_headless,
+    "A*": solve_astar_headless,
+    "Jump Point Search": solve_jps_headless,
+    "Dead-End Filling": solve_dead_end_filling_headless,
+    "HPA*": solve_hpa_headless
+}
+
+# SearchOptions fields each algorithm takes as keyword arguments
+ALGORITHM_OPTIONS = {
+    "Greedy Best-First Search": ("heuristic",),
+    "A*": ("heuristic", "weight"),
+}
+
+def solver_options(algorithm: str, options: Optional[SearchOptions]) -> dict:
+    # The options that apply to algorithm, as solver keyword arguments
+    if options is None:
+        return {}
+    return {name: getattr(options, name) for name in ALGORITHM_OPTIONS.get(algorithm, ())}
@@ -0,0 +1,129 @@
+import heapq
+from ..models import MazeState, StepUpdate, SolveSummary
+from .utils import reconstruct_path, get_neighbor_index, to_cells
+from .heuristics import HEURISTICS
+
+# Best-first search engine shared by A* and Greedy Best-First Search.
+#
+# Nodes are ordered by f = g_weight * g + h_weight * h(node):
+# - A*: g_weight 1, h_weight 1 (optimal), above 1 for weighted A*
+#   (at most h_weight times the shortest path, usually far fewer expansions)
+# - Greedy: g_weight 0, h_weight 1
+# h comes from HEURISTICS (app/algorithms/heuristics.py).
+#
+# Heap entries are (f, h, node): among equal f the node closest to the goal
+# goes first, which on grids (huge plateaus of equal f) walks straight along
+# one shortest path instead of widening the whole plateau. A node improved
+# while queued is pushed again; its older entries are skipped when popped
+# (lazy deletion), and closed nodes are never expanded twice.
+
+def best_first_search(state: MazeState, g_weight: float, h_weight: float, heuristic: str = "manhattan"):
+    index = get_neighbor_index(state)
+    width, masks, moves = index.width, index.masks, index.moves
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+    h = HEURISTICS[heuristic](state)
+
+    pq = [(h_weight * h(start), h(start), start)] # (f_score, h_score, node)
+    unreached = index.size # No path is this long, so it works as infinity
+    g_score = [unreached] * index.size
+    g_score[start] = 0
+    parent = [-1] * index.size
+    parent[start] = start
+    closed = bytearray(index.size)
+
+    nodes_expanded = 0
+    steps = 0
+    frontier = max_frontier_size = 1 # Open nodes, not counting stale heap entries
+
+    yield StepUpdate(grid_updates=[(*state.start_pos, 3)], current_cell=state.start_pos, max_frontier_size=max_frontier_size)
+
+    while pq:
+        current = heapq.heappop(pq)[2]
+        if closed[current]:
+            continue # Stale entry
+        closed[current] = 1
+        frontier -= 1
+        nodes_expanded += 1
+
+        if current == end:
+            path = reconstruct_path(parent, end)
+            yield StepUpdate(
+                grid_updates=to_cells(path, width, 5),
+                finished=True, success=True, path_length=len(path), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size
+            )
+            return
+
+        cr, cc = divmod(current, width)
+        updates = [(cr, cc, 4)]
+
+        tentative_g = g_score[current] + 1
+        for d in moves[masks[current]]:
+            neighbor = current + d
+            if tentative_g < g_score[neighbor] and not closed[neighbor]:
+                first = g_score[neighbor] == unreached
+                g_score[neighbor] = tentative_g
+                parent[neighbor] = current
+                if first:
+                    frontier += 1
+                if first or g_weight: # Greedy's priority ignores g, so its entry stays valid
+                    hn = h(neighbor)
+                    heapq.heappush(pq, (g_weight * tentative_g + h_weight * hn, hn, neighbor))
+                updates.append((*divmod(neighbor, width), 3))
+
+        steps += 1
+        max_frontier_size = max(max_frontier_size, frontier)
+        yield StepUpdate(grid_updates=updates, current_cell=(cr, cc), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+    yield StepUpdate(finished=True, success=False, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+def best_first_search_headless(state: MazeState, g_weight: float, h_weight: float, heuristic: str = "manhattan") -> SolveSummary:
+    # Same search as best_first_search, but only the final counters are kept
+    index = get_neighbor_index(state)
+    masks, moves = index.masks, index.moves
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+    h = HEURISTICS[heuristic](state)
+
+    pq = [(h_weight * h(start), h(start), start)]
+    unreached = index.size
+    g_score = [unreached] * index.size
+    g_score[start] = 0
+    parent = [-1] * index.size
+    parent[start] = start
+    closed = bytearray(index.size)
+
+    nodes_expanded = 0
+    steps = 0
+    frontier = max_frontier_size = 1
+
+    while pq:
+        current = heapq.heappop(pq)[2]
+        if closed[current]:
+            continue
+        closed[current] = 1
+        frontier -= 1
+        nodes_expanded += 1
+
+        if current == end:
+            path = reconstruct_path(parent, end)
+            return SolveSummary(success=True, path_length=len(path), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+        tentative_g = g_score[current] + 1
+        for d in moves[masks[current]]:
+            neighbor = current + d
+            if tentative_g < g_score[neighbor] and not closed[neighbor]:
+                first = g_score[neighbor] == unreached
+                g_score[neighbor] = tentative_g
+                parent[neighbor] = current
+                if first:
+                    frontier += 1
+                if first or g_weight: # Greedy's priority ignores g, so its entry stays valid
+                    hn = h(neighbor)
+                    heapq.heappush(pq, (g_weight * tentative_g + h_weight * hn, hn, neighbor))
+
+        steps += 1
+        if frontier > max_frontier_size:
+            max_frontier_size = frontier
+
+    return SolveSummary(success=False, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
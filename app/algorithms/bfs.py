@@ -1,42 +1,45 @@
 from collections import deque
-from ..models import MazeState, StepUpdate
-from .utils import reconstruct_path, get_neighbors
+from typing import List, Tuple
+from ..models import MazeState, StepUpdate, SolveSummary
+from .utils import NeighborIndex, reconstruct_path, get_neighbor_index, to_cells
 
 def solve_bfs(state: MazeState):
-    start = state.start_pos
-    end = state.end_pos
-    
+    index = get_neighbor_index(state)
+    width, masks, moves = index.width, index.masks, index.moves
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+
     queue = deque([start])
-    visited = {start}
-    parent = {start: None}
-    
+    parent = [-1] * index.size # -1 = unvisited
+    parent[start] = start
+
     nodes_expanded = 0
     steps = 0
-    
+
     max_frontier_size = 1 # Initial queue
-    
+
     # Initial Step
     yield StepUpdate(
-        grid_updates=[(start[0], start[1], 3)], 
-        current_cell=start, 
+        grid_updates=[(*state.start_pos, 3)],
+        current_cell=state.start_pos,
         nodes_expanded=0,
         steps_taken=0,
         max_frontier_size=max_frontier_size
     )
-    
+
     while queue:
         current = queue.popleft()
         nodes_expanded += 1
         steps += 1
-        
-        updates = [(current[0], current[1], 4)]
-        
+
+        cr, cc = divmod(current, width)
+        updates = [(cr, cc, 4)]
+
         if current == end:
             # Found!
             path = reconstruct_path(parent, end)
-            path_updates = [(r, c, 5) for r, c in path]
             yield StepUpdate(
-                grid_updates=path_updates,
+                grid_updates=to_cells(path, width, 5),
                 finished=True,
                 success=True,
                 path_length=len(path),
@@ -46,19 +49,18 @@ def solve_bfs(state: MazeState):
             )
             return
 
-        neighbors = get_neighbors(state, current)
-        for next_node in neighbors:
-            if next_node not in visited:
-                visited.add(next_node)
+        for d in moves[masks[current]]:
+            next_node = current + d
+            if parent[next_node] == -1:
                 parent[next_node] = current
                 queue.append(next_node)
-                updates.append((next_node[0], next_node[1], 3)) # Add to frontier
-        
+                updates.append((*divmod(next_node, width), 3)) # Add to frontier
+
         max_frontier_size = max(max_frontier_size, len(queue))
-        
+
         yield StepUpdate(
             grid_updates=updates,
-            current_cell=current,
+            current_cell=(cr, cc),
             nodes_expanded=nodes_expanded,
             steps_taken=steps,
             max_frontier_size=max_frontier_size
@@ -66,3 +68,59 @@ def solve_bfs(state: MazeState):
 
     # Not found
     yield StepUpdate(finished=True, success=False, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+def solve_bfs_headless(state: MazeState) -> SolveSummary:
+    # Same search as solve_bfs, but only the final counters are kept
+    index = get_neighbor_index(state)
+    masks, moves = index.masks, index.moves
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+
+    queue = deque([start])
+    parent = [-1] * index.size # Doubles as the visited set
+    parent[start] = start
+
+    nodes_expanded = 0
+    max_frontier_size = 1
+
+    while queue:
+        current = queue.popleft()
+        nodes_expanded += 1
+
+        if current == end:
+            path = reconstruct_path(parent, end)
+            return SolveSummary(success=True, path_length=len(path), nodes_expanded=nodes_expanded, steps_taken=nodes_expanded, max_frontier_size=max_frontier_size)
+
+        for d in moves[masks[current]]:
+            next_node = current + d
+            if parent[next_node] == -1:
+                parent[next_node] = current
+                queue.append(next_node)
+
+        if len(queue) > max_frontier_size:
+            max_frontier_size = len(queue)
+
+    return SolveSummary(success=False, nodes_expanded=nodes_expanded, steps_taken=nodes_expanded, max_frontier_size=max_frontier_size)
+
+def bfs_tree(index: NeighborIndex, source: int) -> Tuple[List[int], List[int]]:
+    # The whole BFS tree from source, by the same search as solve_bfs: moves
+    # from source to every cell (-1 where unreachable) and the cell each was
+    # reached from (source is its own parent, -1 where unreachable)
+    masks, moves = index.masks, index.moves
+    dist = [-1] * index.size
+    parent = [-1] * index.size
+    dist[source] = 0
+    parent[source] = source
+    queue = deque([source])
+
+    while queue:
+        current = queue.popleft()
+        next_dist = dist[current] + 1
+        for d in moves[masks[current]]:
+            next_node = current + d
+            if parent[next_node] == -1:
+                parent[next_node] = current
+                dist[next_node] = next_dist
+                queue.append(next_node)
+
+    return dist, parent
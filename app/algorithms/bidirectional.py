@@ -1,86 +1,127 @@
 from collections import deque
-from ..models import MazeState, StepUpdate
-from .utils import reconstruct_path, get_neighbors
+from ..models import MazeState, StepUpdate, SolveSummary
+from .utils import reconstruct_path, get_neighbor_index, to_cells
+
+# Both searches advance a whole BFS layer at a time, always on the side with
+# the smaller frontier, and stop as soon as one side discovers a node the other
+# has already seen. Until then no node is seen by both sides, so when the side
+# at depth a discovers a node of the other side's frontier (depth b), that
+# a + 1 + b path is a shortest one.
+
+def _meeting_path(parent_start, parent_end, meet):
+    path_s = reconstruct_path(parent_start, meet)
+    path_e = reconstruct_path(parent_end, meet)
+    return path_s + path_e[::-1][1:] # join paths
 
 def solve_bidirectional_bfs(state: MazeState):
-    start = state.start_pos
-    end = state.end_pos
-    
+    index = get_neighbor_index(state)
+    width, masks, moves = index.width, index.masks, index.moves
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+
     q_start = deque([start])
     q_end = deque([end])
-    
-    visited_start = {start}
-    visited_end = {end}
-    
-    parent_start = {start: None}
-    parent_end = {end: None}
-    
+
+    # Parent lists double as the visited sets (-1 = unvisited)
+    parent_start = [-1] * index.size
+    parent_end = [-1] * index.size
+    parent_start[start] = start
+    parent_end[end] = end
+
     nodes_expanded = 0
     steps = 0
     max_frontier_size = 2
-    
-    yield StepUpdate(grid_updates=[(start[0], start[1], 3), (end[0], end[1], 3)], current_cell=start, nodes_expanded=0, steps_taken=0, max_frontier_size=max_frontier_size)
-    
-    while q_start and q_end:
-        max_frontier_size = max(max_frontier_size, len(q_start) + len(q_end))
-        # Expand from start
-        if q_start:
-            curr_s = q_start.popleft()
-            nodes_expanded += 1
-            steps += 1
-            
-            # Check intersection
-            if curr_s in visited_end:
-                # Meeting point found!
-                path_s = reconstruct_path(parent_start, curr_s)
-                path_e = reconstruct_path(parent_end, curr_s)
-                path = path_s + path_e[::-1][1:] # join paths
-                
-                yield StepUpdate(
-                    grid_updates=[(r,c,5) for r,c in path],
-                    finished=True, success=True, path_length=len(path), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size
-                )
-                return
-
-            updates = [(curr_s[0], curr_s[1], 4)]
-            
-            for neighbor in get_neighbors(state, curr_s):
-                if neighbor not in visited_start:
-                    visited_start.add(neighbor)
-                    parent_start[neighbor] = curr_s
-                    q_start.append(neighbor)
-                    updates.append((neighbor[0], neighbor[1], 3))
-            
-            yield StepUpdate(grid_updates=updates, current_cell=curr_s, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
-
-        # Expand from end
-        if q_end:
-            curr_e = q_end.popleft()
+
+    yield StepUpdate(grid_updates=[(*state.start_pos, 3), (*state.end_pos, 3)], current_cell=state.start_pos, nodes_expanded=0, steps_taken=0, max_frontier_size=max_frontier_size)
+
+    meet = start if start == end else -1
+    while meet == -1 and q_start and q_end:
+        # Expand the smaller frontier by one full layer
+        if len(q_start) <= len(q_end):
+            queue, parent, other = q_start, parent_start, parent_end
+        else:
+            queue, parent, other = q_end, parent_end, parent_start
+
+        for _ in range(len(queue)):
+            current = queue.popleft()
             nodes_expanded += 1
             steps += 1
-            
-            # Check intersection
-            if curr_e in visited_start:
-                # Meeting point found
-                path_s = reconstruct_path(parent_start, curr_e)
-                path_e = reconstruct_path(parent_end, curr_e)
-                path = path_s + path_e[::-1][1:]
-                
-                yield StepUpdate(
-                    grid_updates=[(r,c,5) for r,c in path],
-                    finished=True, success=True, path_length=len(path), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size
-                )
-                return
-
-            updates = [(curr_e[0], curr_e[1], 4)]
-            
-            for neighbor in get_neighbors(state, curr_e):
-                if neighbor not in visited_end:
-                    visited_end.add(neighbor)
-                    parent_end[neighbor] = curr_e
-                    q_end.append(neighbor)
-                    updates.append((neighbor[0], neighbor[1], 3))
-            
-            yield StepUpdate(grid_updates=updates, current_cell=curr_e, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+            cr, cc = divmod(current, width)
+            updates = [(cr, cc, 4)]
+
+            for d in moves[masks[current]]:
+                neighbor = current + d
+                if parent[neighbor] == -1:
+                    parent[neighbor] = current
+                    if other[neighbor] != -1:
+                        meet = neighbor # Meeting point found!
+                        break
+                    queue.append(neighbor)
+                    updates.append((*divmod(neighbor, width), 3))
+
+            if meet != -1:
+                break
+            max_frontier_size = max(max_frontier_size, len(q_start) + len(q_end))
+            yield StepUpdate(grid_updates=updates, current_cell=(cr, cc), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+    if meet != -1:
+        path = _meeting_path(parent_start, parent_end, meet)
+        yield StepUpdate(
+            grid_updates=to_cells(path, width, 5),
+            finished=True, success=True, path_length=len(path), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size
+        )
+        return
 
     yield StepUpdate(finished=True, success=False, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+def solve_bidirectional_bfs_headless(state: MazeState) -> SolveSummary:
+    # Same search as solve_bidirectional_bfs, but only the final counters are kept
+    index = get_neighbor_index(state)
+    masks, moves = index.masks, index.moves
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+
+    q_start = deque([start])
+    q_end = deque([end])
+
+    # Parent lists double as the visited sets
+    parent_start = [-1] * index.size
+    parent_end = [-1] * index.size
+    parent_start[start] = start
+    parent_end[end] = end
+
+    nodes_expanded = 0
+    max_frontier_size = 2
+
+    meet = start if start == end else -1
+    while meet == -1 and q_start and q_end:
+        if len(q_start) <= len(q_end):
+            queue, parent, other = q_start, parent_start, parent_end
+        else:
+            queue, parent, other = q_end, parent_end, parent_start
+
+        for _ in range(len(queue)):
+            current = queue.popleft()
+            nodes_expanded += 1
+
+            for d in moves[masks[current]]:
+                neighbor = current + d
+                if parent[neighbor] == -1:
+                    parent[neighbor] = current
+                    if other[neighbor] != -1:
+                        meet = neighbor
+                        break
+                    queue.append(neighbor)
+
+            if meet != -1:
+                break
+            frontier = len(q_start) + len(q_end)
+            if frontier > max_frontier_size:
+                max_frontier_size = frontier
+
+    if meet != -1:
+        path_length = len(_meeting_path(parent_start, parent_end, meet))
+        return SolveSummary(success=True, path_length=path_length, nodes_expanded=nodes_expanded, steps_taken=nodes_expanded, max_frontier_size=max_frontier_size)
+
+    return SolveSummary(success=False, nodes_expanded=nodes_expanded, steps_taken=nodes_expanded, max_frontier_size=max_frontier_size)
@@ -0,0 +1,211 @@
+import heapq
+import numpy as np
+from ..models import MazeState, StepUpdate, SolveSummary
+from ..grid import grid_array
+from .utils import reconstruct_path, get_neighbor_index, to_cells
+
+# Dead-end filling plus corridor collapsing, for mazes with long dead ends.
+#
+# 1. Fill: every open cell with at most one open neighbor (other than the
+#    start and the goal) is a dead end. Filling it may turn its neighbor into
+#    one, so dead ends are peeled from a queue until none are left. A perfect
+#    maze is left with just the solution path; cells on cycles stay.
+# 2. Search: what is left is junctions (start, goal, and cells with other than
+#    two open neighbors) joined by corridors of two-neighbor cells. A* runs
+#    over the junctions only; an edge is a corridor, walked when its junction
+#    is expanded, and costs its length. Manhattan distance stays admissible
+#    since a corridor is never shorter than the straight line.
+
+# Open neighbors per 4-bit neighbor mask
+_DEGREE = np.array([bin(m).count("1") for m in range(16)], dtype=np.int8)
+
+def _fill_dead_ends(state, index, start, end):
+    # (filled cells in fill order, remaining degree per cell, removed flags
+    # with walls and filled cells set, largest dead-end queue)
+    walls = grid_array(state).ravel() == 1
+    mask = np.frombuffer(index.masks, dtype=np.uint8)
+    degree_arr = _DEGREE[mask]
+    removed = bytearray(walls.tobytes())
+    degree = degree_arr.tolist()
+    masks, moves = index.masks, index.moves
+
+    queue = [u for u in np.flatnonzero(~walls & (degree_arr <= 1)).tolist() if u != start and u != end]
+    max_queue = len(queue)
+    order = []
+    while queue:
+        u = queue.pop()
+        removed[u] = 1
+        order.append(u)
+        for d in moves[masks[u]]:
+            v = u + d
+            if not removed[v]:
+                degree[v] -= 1
+                if degree[v] == 1 and v != start and v != end:
+                    queue.append(v)
+        if len(queue) > max_queue:
+            max_queue = len(queue)
+    return order, degree, removed, max_queue
+
+def _walk(index, degree, removed, start, end, u, first):
+    # Cells of the corridor leaving junction u through its neighbor first, up
+    # to and including the next junction
+    masks, moves = index.masks, index.moves
+    cells = [first]
+    prev, cur = u, first
+    while degree[cur] == 2 and cur != start and cur != end:
+        for d in moves[masks[cur]]:
+            nxt = cur + d
+            if nxt != prev and not removed[nxt]:
+                break
+        prev, cur = cur, nxt
+        cells.append(cur)
+    return cells
+
+def _full_path(index, degree, removed, start, end, parent, via):
+    # Junctions from start to end -> every cell, re-walking each corridor
+    junctions = reconstruct_path(parent, end)
+    path = junctions[:1]
+    for v in junctions[1:]:
+        path.extend(_walk(index, degree, removed, start, end, parent[v], via[v]))
+    return path
+
+def solve_dead_end_filling(state: MazeState):
+    index = get_neighbor_index(state)
+    width, masks, moves = index.width, index.masks, index.moves
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+    er, ec = state.end_pos
+
+    order, degree, removed, max_frontier_size = _fill_dead_ends(state, index, start, end)
+
+    nodes_expanded = 0
+    steps = 0
+
+    yield StepUpdate(grid_updates=[(*state.start_pos, 3)], current_cell=state.start_pos, max_frontier_size=max_frontier_size)
+
+    # Phase 1: one step per filled dead-end cell
+    for u in order:
+        nodes_expanded += 1
+        steps += 1
+        cell = divmod(u, width)
+        yield StepUpdate(grid_updates=[(*cell, 4)], current_cell=cell, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+    # Phase 2: A* over the junctions
+    def heuristic(node):
+        r, c = divmod(node, width)
+        return abs(r - er) + abs(c - ec)
+
+    h0 = heuristic(start)
+    pq = [(h0, h0, start)] # (f_score, h_score, node)
+    unreached = index.size # No path is this long, so it works as infinity
+    g_score = [unreached] * index.size
+    g_score[start] = 0
+    parent = [-1] * index.size
+    parent[start] = start
+    via = [-1] * index.size # First corridor cell from parent[v] towards v
+    closed = bytearray(index.size)
+    frontier = 1
+
+    while pq:
+        current = heapq.heappop(pq)[2]
+        if closed[current]:
+            continue # Stale entry
+        closed[current] = 1
+        frontier -= 1
+        nodes_expanded += 1
+
+        if current == end:
+            path = _full_path(index, degree, removed, start, end, parent, via)
+            yield StepUpdate(
+                grid_updates=to_cells(path, width, 5),
+                finished=True, success=True, path_length=len(path), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size
+            )
+            return
+
+        cr, cc = divmod(current, width)
+        updates = [(cr, cc, 4)]
+
+        for d in moves[masks[current]]:
+            first = current + d
+            if removed[first]:
+                continue
+            corridor = _walk(index, degree, removed, start, end, current, first)
+            v = corridor[-1]
+            if v == current or closed[v]:
+                continue
+            tentative_g = g_score[current] + len(corridor)
+            if tentative_g < g_score[v]:
+                if g_score[v] == unreached:
+                    frontier += 1
+                g_score[v] = tentative_g
+                parent[v] = current
+                via[v] = first
+                hv = heuristic(v)
+                heapq.heappush(pq, (tentative_g + hv, hv, v))
+                updates.extend(to_cells(corridor, width, 3))
+
+        steps += 1
+        max_frontier_size = max(max_frontier_size, frontier)
+        yield StepUpdate(grid_updates=updates, current_cell=(cr, cc), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+    yield StepUpdate(finished=True, success=False, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+def solve_dead_end_filling_headless(state: MazeState) -> SolveSummary:
+    # Same search as solve_dead_end_filling, but only the final counters are kept
+    index = get_neighbor_index(state)
+    width, masks, moves = index.width, index.masks, index.moves
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+    er, ec = state.end_pos
+
+    order, degree, removed, max_frontier_size = _fill_dead_ends(state, index, start, end)
+    nodes_expanded = steps = len(order)
+
+    sr, sc = state.start_pos
+    h0 = abs(sr - er) + abs(sc - ec)
+    pq = [(h0, h0, start)]
+    unreached = index.size
+    g_score = [unreached] * index.size
+    g_score[start] = 0
+    parent = [-1] * index.size
+    parent[start] = start
+    via = [-1] * index.size
+    closed = bytearray(index.size)
+    frontier = 1
+
+    while pq:
+        current = heapq.heappop(pq)[2]
+        if closed[current]:
+            continue
+        closed[current] = 1
+        frontier -= 1
+        nodes_expanded += 1
+
+        if current == end:
+            path_length = len(_full_path(index, degree, removed, start, end, parent, via))
+            return SolveSummary(success=True, path_length=path_length, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+        for d in moves[masks[current]]:
+            first = current + d
+            if removed[first]:
+                continue
+            corridor = _walk(index, degree, removed, start, end, current, first)
+            v = corridor[-1]
+            if v == current or closed[v]:
+                continue
+            tentative_g = g_score[current] + len(corridor)
+            if tentative_g < g_score[v]:
+                if g_score[v] == unreached:
+                    frontier += 1
+                g_score[v] = tentative_g
+                parent[v] = current
+                via[v] = first
+                vr, vc = divmod(v, width)
+                hv = abs(vr - er) + abs(vc - ec)
+                heapq.heappush(pq, (tentative_g + hv, hv, v))
+
+        steps += 1
+        if frontier > max_frontier_size:
+            max_frontier_size = frontier
+
+    return SolveSummary(success=False, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
@@ -1,33 +1,35 @@
-from ..models import MazeState, StepUpdate
-from .utils import reconstruct_path, get_neighbors
+from ..models import MazeState, StepUpdate, SolveSummary
+from .utils import reconstruct_path, get_neighbor_index, to_cells
 
 def solve_dfs(state: MazeState):
-    start = state.start_pos
-    end = state.end_pos
-    
+    index = get_neighbor_index(state)
+    width, masks, moves = index.width, index.masks, index.moves
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+
     stack = [start]
-    visited = {start} # Visited implies "Processed or in Stack"
-    parent = {start: None}
-    
+    parent = [-1] * index.size # Visited implies "Processed or in Stack"
+    parent[start] = start
+
     nodes_expanded = 0
     steps = 0
     max_frontier_size = 1
-    
-    yield StepUpdate(grid_updates=[(start[0], start[1], 3)], current_cell=start, max_frontier_size=max_frontier_size)
+
+    yield StepUpdate(grid_updates=[(*state.start_pos, 3)], current_cell=state.start_pos, max_frontier_size=max_frontier_size)
 
     while stack:
         current = stack.pop()
         nodes_expanded += 1
         steps += 1
-        
+
         # Mark as visited (Dead/Closed) locally, but in DFS "Active" is the tip of stack.
-        updates = [(current[0], current[1], 4)]
+        cr, cc = divmod(current, width)
+        updates = [(cr, cc, 4)]
 
         if current == end:
             path = reconstruct_path(parent, end)
-            path_updates = [(r, c, 5) for r, c in path]
             yield StepUpdate(
-                grid_updates=path_updates,
+                grid_updates=to_cells(path, width, 5),
                 finished=True,
                 success=True,
                 path_length=len(path),
@@ -37,25 +39,54 @@ def solve_dfs(state: MazeState):
             )
             return
 
-        neighbors = get_neighbors(state, current)
-        
-        added_children = False
-        for next_node in neighbors:
-            if next_node not in visited:
-                visited.add(next_node)
+        for d in moves[masks[current]]:
+            next_node = current + d
+            if parent[next_node] == -1:
                 parent[next_node] = current
                 stack.append(next_node)
-                updates.append((next_node[0], next_node[1], 3))
-                added_children = True
-        
+                updates.append((*divmod(next_node, width), 3))
+
         max_frontier_size = max(max_frontier_size, len(stack))
-        
+
         yield StepUpdate(
             grid_updates=updates,
-            current_cell=current,
+            current_cell=(cr, cc),
             nodes_expanded=nodes_expanded,
             steps_taken=steps,
             max_frontier_size=max_frontier_size
         )
 
     yield StepUpdate(finished=True, success=False, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+def solve_dfs_headless(state: MazeState) -> SolveSummary:
+    # Same search as solve_dfs, but only the final counters are kept
+    index = get_neighbor_index(state)
+    masks, moves = index.masks, index.moves
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+
+    stack = [start]
+    parent = [-1] * index.size # Doubles as the visited set
+    parent[start] = start
+
+    nodes_expanded = 0
+    max_frontier_size = 1
+
+    while stack:
+        current = stack.pop()
+        nodes_expanded += 1
+
+        if current == end:
+            path = reconstruct_path(parent, end)
+            return SolveSummary(success=True, path_length=len(path), nodes_expanded=nodes_expanded, steps_taken=nodes_expanded, max_frontier_size=max_frontier_size)
+
+        for d in moves[masks[current]]:
+            next_node = current + d
+            if parent[next_node] == -1:
+                parent[next_node] = current
+                stack.append(next_node)
+
+        if len(stack) > max_frontier_size:
+            max_frontier_size = len(stack)
+
+    return SolveSummary(success=False, nodes_expanded=nodes_expanded, steps_taken=nodes_expanded, max_frontier_size=max_frontier_size)
@@ -1,50 +1,11 @@
-import heapq
-from ..models import MazeState, StepUpdate
-from .utils import reconstruct_path, get_neighbors
+from ..models import MazeState, SolveSummary
+from .best_first import best_first_search, best_first_search_headless
 
-def solve_greedy(state: MazeState):
-    start = state.start_pos
-    end = state.end_pos
-    
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-    
-    # Priority Queue: (h_score, node) - Only heuristic matters
-    pq = [(heuristic(start, end), start)]
-    visited = {start}
-    parent = {start: None}
-    
-    nodes_expanded = 0
-    steps = 0
-    max_frontier_size = 1
-    yield StepUpdate(grid_updates=[(start[0], start[1], 3)], current_cell=start, max_frontier_size=max_frontier_size)
-    
-    while pq:
-        _, current = heapq.heappop(pq)
-        nodes_expanded += 1
-        
-        if current == end:
-            path = reconstruct_path(parent, end)
-            yield StepUpdate(
-                grid_updates=[(r,c,5) for r,c in path],
-                finished=True, success=True, path_length=len(path), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size
-            )
-            return
-        
-        updates = [(current[0], current[1], 4)]
-        
-        neighbors = get_neighbors(state, current)
-        
-        for neighbor in neighbors:
-            if neighbor not in visited:
-                visited.add(neighbor)
-                parent[neighbor] = current
-                h = heuristic(neighbor, end)
-                heapq.heappush(pq, (h, neighbor))
-                updates.append((neighbor[0], neighbor[1], 3))
-                
-        steps += 1
-        max_frontier_size = max(max_frontier_size, len(pq))
-        yield StepUpdate(grid_updates=updates, current_cell=current, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+# A* without the path cost: always expands the open node that looks closest
+# to the goal. Fast, but the path found is not necessarily the shortest.
 
-    yield StepUpdate(finished=True, success=False, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+def solve_greedy(state: MazeState, heuristic: str = "manhattan"):
+    return best_first_search(state, 0, 1, heuristic)
+
+def solve_greedy_headless(state: MazeState, heuristic: str = "manhattan") -> SolveSummary:
+    return best_first_search_headless(state, 0, 1, heuristic)
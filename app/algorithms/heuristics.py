@@ -0,0 +1,74 @@
+from collections import deque
+from typing import Callable
+import numpy as np
+from ..models import MazeState
+from .utils import NeighborIndex, get_neighbor_index
+
+# Heuristics of the best-first searches: HEURISTICS[name](state) returns
+# h(u), an estimate of the moves from cell u to the goal that never
+# overestimates them (so A* with weight 1 stays optimal).
+#
+# - "manhattan": |dr| + |dc|.
+# - "alt": landmark distances (A*, Landmarks, Triangle inequality). Exact
+#   BFS distances from a few landmark cells are precomputed once per maze;
+#   then |d(L, goal) - d(L, u)| <= d(u, goal) for every landmark L. Tighter
+#   than Manhattan around walls, at the cost of one BFS per landmark.
+
+# Landmarks per maze for "alt"
+ALT_LANDMARKS = 4
+
+def bfs_distances(index: NeighborIndex, source: int) -> np.ndarray:
+    # Moves from source to every cell, -1 where unreachable
+    masks, moves = index.masks, index.moves
+    dist = [-1] * index.size
+    dist[source] = 0
+    queue = deque([source])
+    while queue:
+        u = queue.popleft()
+        du = dist[u] + 1
+        for d in moves[masks[u]]:
+            v = u + d
+            if dist[v] == -1:
+                dist[v] = du
+                queue.append(v)
+    return np.array(dist, dtype=np.int32)
+
+def get_landmarks(state: MazeState) -> np.ndarray:
+    # (ALT_LANDMARKS, cells) distance table, cached on the maze like its
+    # neighbor index. Landmarks are picked farthest-first within the start's
+    # region: each one is the cell farthest from all landmarks so far.
+    table = state.__dict__.get("landmarks")
+    if table is None:
+        index = get_neighbor_index(state)
+        reach = bfs_distances(index, index.node(state.start_pos))
+        nearest = np.where(reach >= 0, np.iinfo(np.int32).max, -1)
+        rows = []
+        for _ in range(ALT_LANDMARKS):
+            dist = bfs_distances(index, int(np.argmax(nearest)))
+            rows.append(dist)
+            nearest = np.where(reach >= 0, np.minimum(nearest, dist), -1)
+        table = state.__dict__["landmarks"] = np.stack(rows)
+    return table
+
+def manhattan(state: MazeState) -> Callable[[int], int]:
+    # Computed per node, as searches usually touch a small part of the grid
+    width = state.width
+    er, ec = state.end_pos
+
+    def h(u):
+        r, c = divmod(u, width)
+        return abs(r - er) + abs(c - ec)
+    return h
+
+def alt(state: MazeState) -> Callable[[int], int]:
+    # Bounds for every cell at once with numpy, then plain list lookups
+    table = get_landmarks(state)
+    to_goal = table[:, state.end_pos[0] * state.width + state.end_pos[1], None]
+    # Only landmarks that reach both cells bound their distance
+    bounds = np.where((table >= 0) & (to_goal >= 0), np.abs(to_goal - table), 0)
+    return bounds.max(axis=0).tolist().__getitem__
+
+HEURISTICS = {
+    "manhattan": manhattan,
+    "alt": alt,
+}
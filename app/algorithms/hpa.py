@@ -0,0 +1,413 @@
+import heapq
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from ..models import MazeState, StepUpdate, SolveSummary
+from ..grid import grid_array
+from .utils import to_cells
+from .wavefront import distance_stack
+
+# Hierarchical pathfinding (HPA*) for big grids.
+#
+# The grid is cut into square clusters. Where two neighboring clusters share
+# a run of open cell pairs across their border, the run is an entrance: one
+# transition (a pair of cells, one per side) in its middle, or one at each end
+# for long runs. Transition cells are the nodes of an abstract graph, with
+# - an edge of cost 1 across the border for each transition
+# - an edge between every two nodes of a cluster that connect inside it, at
+#   their distance inside the cluster
+# Both are built once per maze. A query links the start and the end to the
+# nodes of their own clusters (a BFS inside each of the two clusters), runs
+# A* on the abstract graph and refines only the edges on the path found, each
+# with a BFS inside its cluster.
+#
+# Paths stay inside clusters between transitions, so they are close to the
+# shortest but not always the shortest (usually within a few percent).
+#
+# Every part of the abstraction belongs to one cluster or one border, so after
+# edits only the clusters and borders holding edited cells are rebuilt
+# (Abstraction.edit). HPA* sessions (/api/sessions) use this through
+# HPASearch.
+
+# Cluster side, in cells
+HPA_CLUSTER = int(os.environ.get("MAZE_HPA_CLUSTER", 16))
+# Entrance runs this long or longer get a transition at each end
+LONG_ENTRANCE = 6
+# Cells per stack of cluster BFSes run at once while building
+STACK_CELLS = 1 << 21
+
+START, GOAL = -1, -2 # abstract nodes of a query's start and end cells
+
+class Abstraction:
+    def __init__(self, open_cells: np.ndarray, size: int = HPA_CLUSTER):
+        # open_cells: (height, width) bool array, True where not a wall
+        self.height, self.width = open_cells.shape
+        self.size = size
+        self.rows, self.cols = -(-self.height // size), -(-self.width // size)
+        self.cells = bytearray(open_cells.astype(np.uint8).tobytes()) # own copy, 1 = open
+        self.open = np.frombuffer(self.cells, dtype=np.uint8).reshape(open_cells.shape) # view of cells
+
+        clusters = self.rows * self.cols
+        self.borders: Dict[Tuple[int, int], List[Tuple[int, int]]] = {} # (cluster a, cluster b > a) -> transitions (cell in a, cell in b)
+        self.nodes: List[List[int]] = [[] for _ in range(clusters)] # transition cells of each cluster
+        self.dists: List[List[List[int]]] = [[] for _ in range(clusters)] # node-to-node distances inside each cluster, -1 if not connected
+        self.local: Dict[int, int] = {} # transition cell -> its position in its cluster's nodes
+        self.links: Dict[int, List[int]] = {} # transition cell -> cells it crosses to
+
+        for k in range(clusters):
+            if k % self.cols + 1 < self.cols:
+                self._scan_border(k, k + 1)
+            if k + self.cols < clusters:
+                self._scan_border(k, k + self.cols)
+        self._build(range(clusters))
+
+    def cluster(self, u: int) -> int:
+        r, c = divmod(u, self.width)
+        return r // self.size * self.cols + c // self.size
+
+    def bounds(self, k: int) -> Tuple[int, int, int, int]:
+        # (first row, end row, first col, end col) of cluster k
+        r0, c0 = k // self.cols * self.size, k % self.cols * self.size
+        return r0, min(r0 + self.size, self.height), c0, min(c0 + self.size, self.width)
+
+    def _scan_border(self, a: int, b: int):
+        # Transitions between cluster a and its right or lower neighbor b,
+        # from the runs of open pairs along their border
+        r0, r1, c0, c1 = self.bounds(a)
+        width = self.width
+        if a // self.cols == b // self.cols:
+            side_a = np.arange(r0, r1) * width + c1 - 1
+            step = 1
+        else:
+            side_a = (r1 - 1) * width + np.arange(c0, c1)
+            step = width
+        cells = self.open.ravel()
+        pairs = (cells[side_a] & cells[side_a + step]).astype(np.int8)
+        edges = np.diff(np.concatenate(([0], pairs, [0])))
+        firsts, lasts = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+        long_run = lasts - firsts + 1 >= LONG_ENTRANCE
+        picks = np.sort(np.concatenate((np.where(long_run, firsts, (firsts + lasts) // 2), lasts[long_run])))
+        self.borders[(a, b)] = [(u, u + step) for u in side_a[picks].tolist()]
+
+    def _build(self, clusters: Iterable[int]):
+        # (Re)build the nodes, links and inside distances of the given clusters
+        # from the current borders
+        clusters = list(clusters)
+        for k in clusters:
+            for u in self.nodes[k]:
+                del self.local[u]
+                del self.links[u]
+            links: Dict[int, List[int]] = {}
+            for b in self._neighbors(k):
+                for x, y in self.borders[(min(k, b), max(k, b))]:
+                    if k > b:
+                        x, y = y, x
+                    links.setdefault(x, []).append(y)
+            self.nodes[k] = sorted(links)
+            for i, u in enumerate(self.nodes[k]):
+                self.local[u] = i
+            self.links.update(links)
+
+        # Inside distances, many clusters per distance_stack call
+        batch: List[int] = []
+        sources = 0
+        for n, k in enumerate(clusters):
+            if self.nodes[k]:
+                batch.append(k)
+                sources += len(self.nodes[k])
+            else:
+                self.dists[k] = []
+            if batch and (sources * self.size * self.size >= STACK_CELLS or n == len(clusters) - 1):
+                self._distances(batch)
+                batch, sources = [], 0
+
+    def _distances(self, clusters: List[int]):
+        # A BFS from every node of the given clusters, confined to its cluster
+        size, width = self.size, self.width
+        stack, starts = [], []
+        for k in clusters:
+            r0, r1, c0, c1 = self.bounds(k)
+            grid = np.zeros((size, size), dtype=bool) # walled off past the grid's edge
+            grid[:r1 - r0, :c1 - c0] = self.open[r0:r1, c0:c1]
+            rc = [(u // width - r0, u % width - c0) for u in self.nodes[k]]
+            stack.extend([grid] * len(rc))
+            starts.extend(rc)
+        starts = np.array(starts, dtype=np.int64)
+        dist = distance_stack(np.stack(stack), starts)
+        first = 0
+        for k in clusters:
+            count = len(self.nodes[k])
+            rc = starts[first:first + count]
+            self.dists[k] = dist[first:first + count, rc[:, 0], rc[:, 1]].tolist()
+            first += count
+
+    def _neighbors(self, k: int) -> List[int]:
+        # Clusters sharing a border with cluster k
+        row, col = divmod(k, self.cols)
+        neighbors = []
+        if row > 0:
+            neighbors.append(k - self.cols)
+        if col > 0:
+            neighbors.append(k - 1)
+        if col + 1 < self.cols:
+            neighbors.append(k + 1)
+        if row + 1 < self.rows:
+            neighbors.append(k + self.cols)
+        return neighbors
+
+    def edit(self, changes: Iterable[Tuple[int, bool]]) -> List[int]:
+        # Apply (cell, is_wall) changes and repair: entrances are rescanned on
+        # the borders edited cells lie on, and nodes and distances rebuilt for
+        # the clusters holding edited cells or on a rescanned border. Returns
+        # the rebuilt clusters.
+        size, width, height = self.size, self.width, self.height
+        borders, touched = set(), set()
+        for u, wall in changes:
+            self.cells[u] = 0 if wall else 1
+            r, c = divmod(u, width)
+            k = self.cluster(u)
+            touched.add(k)
+            if c % size == 0 and c > 0:
+                borders.add((k - 1, k))
+            if c % size == size - 1 and c + 1 < width:
+                borders.add((k, k + 1))
+            if r % size == 0 and r > 0:
+                borders.add((k - self.cols, k))
+            if r % size == size - 1 and r + 1 < height:
+                borders.add((k, k + self.cols))
+        for a, b in borders:
+            self._scan_border(a, b)
+            touched.update((a, b))
+        touched = sorted(touched)
+        self._build(touched)
+        return touched
+
+    def search_cluster(self, source: int, target: int = -1) -> Tuple[Dict[int, int], Dict[int, int]]:
+        # BFS from source inside its cluster, stopping at target if given:
+        # (distance, parent) of each cell reached; source is its own parent
+        r0, r1, c0, c1 = self.bounds(self.cluster(source))
+        width, cells = self.width, self.cells
+        dist = {source: 0}
+        parent = {source: source}
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            if u == target:
+                break
+            r, c = divmod(u, width)
+            du = dist[u] + 1
+            for v, inside in ((u - width, r > r0), (u + width, r + 1 < r1), (u - 1, c > c0), (u + 1, c + 1 < c1)):
+                if inside and cells[v] and v not in parent:
+                    parent[v] = u
+                    dist[v] = du
+                    queue.append(v)
+        return dist, parent
+
+def get_abstraction(state: MazeState) -> Abstraction:
+    # Built once per maze and cached on it like its neighbor index
+    abstraction = state.__dict__.get("hpa")
+    if abstraction is None:
+        abstraction = state.__dict__["hpa"] = Abstraction(grid_array(state) != 1) # 1 is Wall
+    return abstraction
+
+def _walk(parent: Dict[int, int], u: int) -> List[int]:
+    # u back to the root of a search_cluster tree
+    path = [u]
+    while parent[u] != u:
+        u = parent[u]
+        path.append(u)
+    return path
+
+class _Query:
+    # A start/end pair linked into the abstract graph
+    def __init__(self, abstraction: Abstraction, start: int, end: int):
+        self.abstraction = abstraction
+        self.start, self.end = start, end
+        self.end_row, self.end_col = divmod(end, abstraction.width)
+        self.end_cluster = abstraction.cluster(end)
+        self.start_dist, self.start_parent = abstraction.search_cluster(start)
+        self.end_dist, self.end_parent = abstraction.search_cluster(end)
+        self.searched = len(self.start_dist) + len(self.end_dist) # cells expanded outside the abstract search
+
+    def cell(self, u: int) -> int:
+        return self.start if u == START else self.end if u == GOAL else u
+
+    def h(self, u: int) -> int:
+        r, c = divmod(self.cell(u), self.abstraction.width)
+        return abs(r - self.end_row) + abs(c - self.end_col)
+
+    def edges(self, u: int) -> List[Tuple[int, int]]:
+        # (node, cost) out of abstract node u
+        abstraction = self.abstraction
+        if u == START:
+            k = abstraction.cluster(self.start)
+            edges = [(v, self.start_dist[v]) for v in abstraction.nodes[k] if v in self.start_dist]
+            if self.end in self.start_dist:
+                edges.append((GOAL, self.start_dist[self.end]))
+            return edges
+        k = abstraction.cluster(u)
+        nodes = abstraction.nodes[k]
+        edges = [(nodes[j], d) for j, d in enumerate(abstraction.dists[k][abstraction.local[u]]) if d > 0]
+        edges += [(v, 1) for v in abstraction.links[u]]
+        if k == self.end_cluster and u in self.end_dist:
+            edges.append((GOAL, self.end_dist[u]))
+        return edges
+
+    def refine(self, nodes: List[int]) -> List[int]:
+        # Abstract path START..GOAL -> every cell along it
+        if len(nodes) == 2:
+            return _walk(self.start_parent, self.end)[::-1]
+        path = _walk(self.start_parent, nodes[1])[::-1]
+        for a, b in zip(nodes[1:-2], nodes[2:-1]):
+            if self.abstraction.cluster(a) != self.abstraction.cluster(b): # across a border
+                path.append(b)
+                continue
+            dist, parent = self.abstraction.search_cluster(a, b)
+            self.searched += len(dist)
+            path.extend(_walk(parent, b)[-2::-1])
+        path.extend(_walk(self.end_parent, nodes[-2])[1:])
+        return path
+
+def _reconstruct(parent: Dict[int, int]) -> List[int]:
+    path = [GOAL]
+    while path[-1] != START:
+        path.append(parent[path[-1]])
+    return path[::-1]
+
+def solve_hpa(state: MazeState):
+    abstraction = get_abstraction(state)
+    width = state.width
+    query = _Query(abstraction, state.start_pos[0] * width + state.start_pos[1], state.end_pos[0] * width + state.end_pos[1])
+
+    h0 = query.h(START)
+    pq = [(h0, h0, START)] # (f_score, h_score, node)
+    g_score = {START: 0}
+    parent = {START: START}
+    closed = set()
+
+    nodes_expanded = 0
+    steps = 0
+    frontier = max_frontier_size = 1
+
+    yield StepUpdate(grid_updates=[(*state.start_pos, 3)], current_cell=state.start_pos, max_frontier_size=max_frontier_size)
+
+    while pq:
+        current = heapq.heappop(pq)[2]
+        if current in closed:
+            continue # Stale entry
+        closed.add(current)
+        frontier -= 1
+        nodes_expanded += 1
+
+        if current == GOAL:
+            path = query.refine(_reconstruct(parent))
+            yield StepUpdate(
+                grid_updates=to_cells(path, width, 5),
+                finished=True, success=True, path_length=len(path), nodes_expanded=nodes_expanded + query.searched,
+                steps_taken=steps, max_frontier_size=max_frontier_size
+            )
+            return
+
+        cr, cc = divmod(query.cell(current), width)
+        updates = [(cr, cc, 4)]
+
+        for v, cost in query.edges(current):
+            if v in closed:
+                continue
+            tentative_g = g_score[current] + cost
+            if tentative_g < g_score.get(v, tentative_g + 1):
+                if v not in g_score:
+                    frontier += 1
+                g_score[v] = tentative_g
+                parent[v] = current
+                hv = query.h(v)
+                heapq.heappush(pq, (tentative_g + hv, hv, v))
+                updates.append((*divmod(query.cell(v), width), 3))
+
+        steps += 1
+        max_frontier_size = max(max_frontier_size, frontier)
+        yield StepUpdate(grid_updates=updates, current_cell=(cr, cc), nodes_expanded=nodes_expanded + query.searched, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+    yield StepUpdate(finished=True, success=False, nodes_expanded=nodes_expanded + query.searched, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+def hpa_search(abstraction: Abstraction, start: int, end: int) -> Tuple[List[int], SolveSummary]:
+    # Same search as solve_hpa on any abstraction (a maze's or a session's),
+    # without the trace: (path, start to end; [] if none, counters)
+    query = _Query(abstraction, start, end)
+
+    h0 = query.h(START)
+    pq = [(h0, h0, START)]
+    g_score = {START: 0}
+    parent = {START: START}
+    closed = set()
+
+    nodes_expanded = 0
+    steps = 0
+    frontier = max_frontier_size = 1
+
+    while pq:
+        current = heapq.heappop(pq)[2]
+        if current in closed:
+            continue
+        closed.add(current)
+        frontier -= 1
+        nodes_expanded += 1
+
+        if current == GOAL:
+            path = query.refine(_reconstruct(parent))
+            return path, SolveSummary(success=True, path_length=len(path), nodes_expanded=nodes_expanded + query.searched, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+        for v, cost in query.edges(current):
+            if v in closed:
+                continue
+            tentative_g = g_score[current] + cost
+            if tentative_g < g_score.get(v, tentative_g + 1):
+                if v not in g_score:
+                    frontier += 1
+                g_score[v] = tentative_g
+                parent[v] = current
+                hv = query.h(v)
+                heapq.heappush(pq, (tentative_g + hv, hv, v))
+
+        steps += 1
+        if frontier > max_frontier_size:
+            max_frontier_size = frontier
+
+    return [], SolveSummary(success=False, nodes_expanded=nodes_expanded + query.searched, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+def solve_hpa_headless(state: MazeState) -> SolveSummary:
+    # Same search as solve_hpa, but only the final counters are kept
+    width = state.width
+    return hpa_search(get_abstraction(state), state.start_pos[0] * width + state.start_pos[1], state.end_pos[0] * width + state.end_pos[1])[1]
+
+class HPASearch:
+    # Search state of an HPA* session (app/sessions.py), with LPAStar's
+    # interface. Edits repair the abstraction cluster by cluster
+    # (Abstraction.edit); each solve is a new query on it.
+    def __init__(self, state: MazeState):
+        self.width = state.width
+        self.cells = bytearray(state.cells) # own copy, 1 = wall; edits never touch state
+        self.start = state.start_pos[0] * self.width + state.start_pos[1]
+        self.end = state.end_pos[0] * self.width + state.end_pos[1]
+        self.abstraction = Abstraction(np.frombuffer(self.cells, dtype=np.uint8).reshape(state.height, state.width) != 1)
+        self._path: List[int] = []
+
+    def edit(self, changes: Iterable[Tuple[int, bool]]) -> List[int]:
+        # (cell, is_wall) pairs -> the cells that actually changed
+        changed = []
+        for u, wall in changes:
+            if (self.cells[u] == 1) == wall:
+                continue
+            self.cells[u] = 1 if wall else 2
+            changed.append((u, wall))
+        self.abstraction.edit(changed)
+        return [u for u, _ in changed]
+
+    def compute(self) -> int:
+        # Solves on the current abstraction; returns the nodes expanded
+        self._path, summary = hpa_search(self.abstraction, self.start, self.end)
+        return summary.nodes_expanded
+
+    def path(self) -> List[int]:
+        return self._path
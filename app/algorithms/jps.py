@@ -0,0 +1,252 @@
+import heapq
+from array import array
+import numpy as np
+from ..models import MazeState, StepUpdate, SolveSummary
+from ..grid import grid_array
+from .utils import reconstruct_path, get_neighbor_index, to_cells, UP, DOWN, LEFT, RIGHT
+
+# Jump Point Search for 4-connected uniform-cost grids.
+#
+# A* over "jump points" only: from an expanded cell the search runs straight
+# in each allowed direction and stops at the first cell where the path might
+# have to turn. Cells in between are never pushed to the heap.
+# - Moving along a row, that is a cell with an opening above or below that the
+#   previous cell didn't have (a forced neighbor), or the goal.
+# - Moving along a column, the same with left/right openings, or a cell from
+#   which a horizontal scan finds a jump point.
+# After arriving along a row, a jump point goes on straight and turns up or
+# down (left or right after a column). The start tries all four directions.
+# Jumps are straight, so the path is rebuilt by filling in the segments.
+
+VERTICAL = UP | DOWN
+HORIZONTAL = LEFT | RIGHT
+
+# Scanning cell by cell would make every column jump rescan whole rows, so the
+# goal-independent part of each scan is precomputed once per maze (as in
+# JPS+): for every cell and direction, the cell where the scan stops, stored as
+# the jump point's id or, when the scan runs into a wall first, ~(last cell).
+# A jump is then a lookup plus a check whether the goal lies before the stop.
+# Walls are never entered, so the goal's row segment (the open run around it)
+# is the only place a row scan can reach it.
+
+def _scan(mask: np.ndarray, ids: np.ndarray, ahead: int, side: int, turns=None) -> np.ndarray:
+    # Rightward scans along the rows of a (flipped/transposed) view of the
+    # grid: mask holds the neighbor bits, ids the flat cell ids, ahead the bit
+    # to keep going and side the openings that make a cell forced
+    prev = np.zeros_like(mask)
+    prev[:, 1:] = mask[:, :-1]
+    forced = (mask & ~prev & side) != 0
+    if turns is not None:
+        forced |= turns
+    stop = forced | ((mask & ahead) == 0)
+    cols = np.where(stop, np.arange(mask.shape[1], dtype=np.int32), np.int32(mask.shape[1] - 1))
+    nxt = np.minimum.accumulate(cols[:, ::-1], axis=1)[:, ::-1] # first stop at or after each cell
+    cells = np.take_along_axis(ids, nxt, axis=1)
+    return np.where(np.take_along_axis(forced, nxt, axis=1), cells, ~cells)
+
+def get_jump_tables(state: MazeState):
+    # (right, left, down, up) scan tables, cached on the maze like its
+    # neighbor index. Compact arrays rather than lists: built with a copy
+    # instead of one int object per cell.
+    tables = state.__dict__.get("jump_tables")
+    if tables is None:
+        index = get_neighbor_index(state)
+        mask = np.frombuffer(index.masks, dtype=np.uint8).reshape(index.height, index.width)
+        ids = np.arange(index.size, dtype=np.int32).reshape(mask.shape)
+
+        # Every scan runs rightward over a flipped/transposed view of the grid;
+        # [::-1] and .T flip the result back to the grid's own layout
+        right = _scan(mask, ids, RIGHT, VERTICAL)
+        left = _scan(mask[:, ::-1], ids[:, ::-1], LEFT, VERTICAL)[:, ::-1]
+
+        # Column scans also stop where a row scan to either side finds a jump point
+        turns = np.zeros(mask.shape, dtype=bool)
+        turns[:, :-1] |= ((mask[:, :-1] & RIGHT) != 0) & (right[:, 1:] >= 0)
+        turns[:, 1:] |= ((mask[:, 1:] & LEFT) != 0) & (left[:, :-1] >= 0)
+
+        down = _scan(mask.T, ids.T, DOWN, HORIZONTAL, turns.T).T
+        up = _scan(mask.T[:, ::-1], ids.T[:, ::-1], UP, HORIZONTAL, turns.T[:, ::-1])[:, ::-1].T
+
+        tables = state.__dict__["jump_tables"] = tuple(array("i", np.ascontiguousarray(t, dtype=np.int32).tobytes()) for t in (right, left, down, up))
+    return tables
+
+def _jumps(state, end):
+    width = state.width
+    right, left, down, up = get_jump_tables(state)
+    end_row, end_col = divmod(end, width)
+    # Columns of the goal's row from which a row scan reaches the goal
+    cells = grid_array(state)[end_row]
+    lo = hi = end_col
+    while lo > 0 and cells[lo - 1] != 1:
+        lo -= 1
+    while hi < width - 1 and cells[hi + 1] != 1:
+        hi += 1
+    reach_lo, reach_hi = end_row * width + lo, end_row * width + hi
+
+    def jump_h(u, d):
+        # First jump point scanning the row from cell u (just entered with
+        # step d = +-1), -1 if a wall comes first
+        stop = (right if d > 0 else left)[u]
+        if reach_lo <= u <= reach_hi:
+            last = stop if stop >= 0 else ~stop
+            if (end - u) * d >= 0 and (last - end) * d >= 0:
+                return end
+        return stop if stop >= 0 else -1
+
+    def jump_v(u, d):
+        # Same down a column (d = +-width); the cell where it crosses the goal's
+        # row is a jump point too if a row scan from it reaches the goal
+        stop = (down if d > 0 else up)[u]
+        last = stop if stop >= 0 else ~stop
+        x = end_row * width + u % width
+        if reach_lo <= x <= reach_hi and (x - u) * d >= 0 and (last - x) * d >= 0:
+            return x
+        return stop if stop >= 0 else -1
+
+    return jump_h, jump_v
+
+def _directions(width, parent, u):
+    # (step, bit, is_row) to scan from u, pruned by the direction it was reached from
+    p = parent[u]
+    if p == u:
+        return ((-width, UP, False), (width, DOWN, False), (-1, LEFT, True), (1, RIGHT, True))
+    if p // width == u // width:
+        d = 1 if u > p else -1
+        return ((d, RIGHT if d > 0 else LEFT, True), (-width, UP, False), (width, DOWN, False))
+    d = width if u > p else -width
+    return ((d, DOWN if d > 0 else UP, False), (-1, LEFT, True), (1, RIGHT, True))
+
+def _fill_path(jump_points, width):
+    # Jump points -> every cell along the straight segments between them
+    path = jump_points[:1]
+    for a, b in zip(jump_points, jump_points[1:]):
+        step = (1 if b > a else -1) if a // width == b // width else (width if b > a else -width)
+        path.extend(range(a + step, b + step, step))
+    return path
+
+def solve_jps(state: MazeState):
+    index = get_neighbor_index(state)
+    width, masks = index.width, index.masks
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+    er, ec = state.end_pos
+    jump_h, jump_v = _jumps(state, end)
+
+    def heuristic(node):
+        r, c = divmod(node, width)
+        return abs(r - er) + abs(c - ec)
+
+    h0 = heuristic(start)
+    pq = [(h0, h0, start)] # (f_score, h_score, node)
+    unreached = index.size # No path is this long, so it works as infinity
+    g_score = [unreached] * index.size
+    g_score[start] = 0
+    parent = [-1] * index.size
+    parent[start] = start
+    closed = bytearray(index.size)
+
+    nodes_expanded = 0
+    steps = 0
+    frontier = max_frontier_size = 1
+
+    yield StepUpdate(grid_updates=[(*state.start_pos, 3)], current_cell=state.start_pos, max_frontier_size=max_frontier_size)
+
+    while pq:
+        current = heapq.heappop(pq)[2]
+        if closed[current]:
+            continue # Stale entry
+        closed[current] = 1
+        frontier -= 1
+        nodes_expanded += 1
+
+        if current == end:
+            path = _fill_path(reconstruct_path(parent, end), width)
+            yield StepUpdate(
+                grid_updates=to_cells(path, width, 5),
+                finished=True, success=True, path_length=len(path), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size
+            )
+            return
+
+        cr, cc = divmod(current, width)
+        updates = [(cr, cc, 4)]
+
+        m = masks[current]
+        for d, bit, is_row in _directions(width, parent, current):
+            if not m & bit:
+                continue
+            jp = (jump_h if is_row else jump_v)(current + d, d)
+            if jp == -1 or closed[jp]:
+                continue
+            tentative_g = g_score[current] + abs(jp - current) // abs(d)
+            if tentative_g < g_score[jp]:
+                if g_score[jp] == unreached:
+                    frontier += 1
+                g_score[jp] = tentative_g
+                parent[jp] = current
+                hj = heuristic(jp)
+                heapq.heappush(pq, (tentative_g + hj, hj, jp))
+                updates.append((*divmod(jp, width), 3))
+
+        steps += 1
+        max_frontier_size = max(max_frontier_size, frontier)
+        yield StepUpdate(grid_updates=updates, current_cell=(cr, cc), nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+    yield StepUpdate(finished=True, success=False, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+def solve_jps_headless(state: MazeState) -> SolveSummary:
+    # Same search as solve_jps, but only the final counters are kept
+    index = get_neighbor_index(state)
+    width, masks = index.width, index.masks
+    start = index.node(state.start_pos)
+    end = index.node(state.end_pos)
+    er, ec = state.end_pos
+    jump_h, jump_v = _jumps(state, end)
+
+    sr, sc = state.start_pos
+    h0 = abs(sr - er) + abs(sc - ec)
+    pq = [(h0, h0, start)]
+    unreached = index.size
+    g_score = [unreached] * index.size
+    g_score[start] = 0
+    parent = [-1] * index.size
+    parent[start] = start
+    closed = bytearray(index.size)
+
+    nodes_expanded = 0
+    steps = 0
+    frontier = max_frontier_size = 1
+
+    while pq:
+        current = heapq.heappop(pq)[2]
+        if closed[current]:
+            continue
+        closed[current] = 1
+        frontier -= 1
+        nodes_expanded += 1
+
+        if current == end:
+            path_length = len(_fill_path(reconstruct_path(parent, end), width))
+            return SolveSummary(success=True, path_length=path_length, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
+
+        m = masks[current]
+        for d, bit, is_row in _directions(width, parent, current):
+            if not m & bit:
+                continue
+            jp = (jump_h if is_row else jump_v)(current + d, d)
+            if jp == -1 or closed[jp]:
+                continue
+            tentative_g = g_score[current] + abs(jp - current) // abs(d)
+            if tentative_g < g_score[jp]:
+                if g_score[jp] == unreached:
+                    frontier += 1
+                g_score[jp] = tentative_g
+                parent[jp] = current
+                jr, jc = divmod(jp, width)
+                hj = abs(jr - er) + abs(jc - ec)
+                heapq.heappush(pq, (tentative_g + hj, hj, jp))
+
+        steps += 1
+        if frontier > max_frontier_size:
+            max_frontier_size = frontier
+
+    return SolveSummary(success=False, nodes_expanded=nodes_expanded, steps_taken=steps, max_frontier_size=max_frontier_size)
@@ -0,0 +1,118 @@
+import heapq
+from typing import Iterable, List, Tuple
+import numpy as np
+from ..models import MazeState
+from .utils import NeighborIndex
+from .heuristics import manhattan
+
+# Lifelong Planning A* (LPA*): A* that keeps its search state between
+# solves, so after a few cells change only the part of the search they
+# affect is redone.
+#
+# g[u] is the distance last settled for u, rhs[u] the one-step lookahead
+# min(g[v] + 1) over u's open neighbors. u is consistent when the two agree;
+# the queue holds the inconsistent cells ordered like A*'s heap, by
+# (min(g, rhs) + h, h), so the first solve expands what A* would. An edit only
+# changes rhs of the edited cells and their neighbors, and repairing
+# re-expands the cells whose distance changed on the way to the goal: work
+# in proportion to the edit, not the grid.
+#
+# Walls are cells of infinite cost, so edits never change the graph's shape,
+# only which of its cells are open.
+
+class LPAStar:
+    def __init__(self, state: MazeState):
+        self.width = state.width
+        self.cells = bytearray(state.cells) # own copy, 1 = wall; edits never touch state
+        self.start = state.start_pos[0] * self.width + state.start_pos[1]
+        self.end = state.end_pos[0] * self.width + state.end_pos[1]
+        self.h = manhattan(state)
+
+        # Neighbors by position only; walls are checked when used
+        index = NeighborIndex(np.ones((state.height, state.width), dtype=bool))
+        self.masks, self.moves = index.masks, index.moves
+
+        self.unreached = index.size # No path is this long, so it works as infinity
+        self.g = [self.unreached] * index.size
+        self.rhs = [self.unreached] * index.size
+        self.rhs[self.start] = 0
+        self.queued = [None] * index.size # key of u's live queue entry, None if not queued
+        self.queue = [] # (f, h, node); entries whose key is no longer queued[node] are stale
+        self._enqueue(self.start)
+
+    def _enqueue(self, u: int):
+        g, rhs = self.g[u], self.rhs[u]
+        if g == rhs:
+            self.queued[u] = None
+            return
+        h = self.h(u)
+        # Cells whose distance went up come first among equal f: one left
+        # queued could be on the path read back from g
+        key = (rhs + h, h) if rhs < g else (g + h, -1)
+        if self.queued[u] != key:
+            self.queued[u] = key
+            heapq.heappush(self.queue, (*key, u))
+
+    def _update(self, u: int):
+        # Recompute rhs[u] from its neighbors and requeue u if inconsistent
+        if u != self.start:
+            best = self.unreached
+            if self.cells[u] != 1:
+                g, cells = self.g, self.cells
+                for d in self.moves[self.masks[u]]:
+                    v = u + d
+                    if cells[v] != 1 and g[v] < best:
+                        best = g[v]
+                best = min(best + 1, self.unreached)
+            self.rhs[u] = best
+        self._enqueue(u)
+
+    def edit(self, changes: Iterable[Tuple[int, bool]]) -> List[int]:
+        # (cell, is_wall) pairs -> the cells that actually changed
+        changed = []
+        for u, wall in changes:
+            if (self.cells[u] == 1) == wall:
+                continue
+            self.cells[u] = 1 if wall else 2
+            changed.append(u)
+            self._update(u)
+            for d in self.moves[self.masks[u]]:
+                self._update(u + d)
+        return changed
+
+    def compute(self) -> int:
+        # Expands inconsistent cells until the goal's distance is settled;
+        # returns the number of expansions
+        g, rhs, queued, queue = self.g, self.rhs, self.queued, self.queue
+        end, masks, moves = self.end, self.masks, self.moves
+        expanded = 0
+        while queue:
+            f, h, u = queue[0]
+            if queued[u] != (f, h):
+                heapq.heappop(queue) # Stale entry
+                continue
+            if g[end] == rhs[end] and (f, h) >= (g[end], 0):
+                break # nothing left in the queue can shorten the goal's path
+            heapq.heappop(queue)
+            queued[u] = None
+            expanded += 1
+            if g[u] > rhs[u]:
+                g[u] = rhs[u]
+            else:
+                g[u] = self.unreached
+                self._update(u)
+            for d in moves[masks[u]]:
+                self._update(u + d)
+        return expanded
+
+    def path(self) -> List[int]:
+        # Start to goal, following settled distances back from the goal; [] if unreachable
+        g, cells, masks, moves = self.g, self.cells, self.masks, self.moves
+        u = self.end
+        if g[u] >= self.unreached:
+            return []
+        path = [u]
+        while u != self.start:
+            u = min((u + d for d in moves[masks[u]] if cells[u + d] != 1), key=g.__getitem__)
+            path.append(u)
+        return path[::-1]
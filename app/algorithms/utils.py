@@ -1,21 +1,55 @@
+import numpy as np
 from ..models import MazeState
+from ..grid import grid_array
+
+# Neighbor bits, in the order solvers visit them: Up, Down, Left, Right
+UP, DOWN, LEFT, RIGHT = 1, 2, 4, 8
+
+class NeighborIndex:
+    # One-time per-maze preprocessing shared by every solver.
+    # Cells are flat ids (r * width + c); masks[id] is a 4-bit set of open
+    # neighbors and moves[mask] the matching id offsets, so expanding a node
+    # is `for d in moves[masks[u]]: v = u + d` with no bounds checks.
+    __slots__ = ("width", "height", "size", "masks", "moves")
+
+    def __init__(self, open_cells: np.ndarray):
+        # open_cells: (height, width) bool array, True where not a wall
+        self.height, self.width = open_cells.shape
+        self.size = self.width * self.height
+
+        mask = np.zeros(open_cells.shape, dtype=np.uint8)
+        mask[1:, :] |= open_cells[:-1, :] * np.uint8(UP)
+        mask[:-1, :] |= open_cells[1:, :] * np.uint8(DOWN)
+        mask[:, 1:] |= open_cells[:, :-1] * np.uint8(LEFT)
+        mask[:, :-1] |= open_cells[:, 1:] * np.uint8(RIGHT)
+        self.masks = mask.tobytes()
+
+        offsets = ((UP, -self.width), (DOWN, self.width), (LEFT, -1), (RIGHT, 1))
+        self.moves = tuple(tuple(d for bit, d in offsets if m & bit) for m in range(16))
+
+    def node(self, pos) -> int:
+        return pos[0] * self.width + pos[1]
+
+    def neighbors(self, u: int):
+        return [u + d for d in self.moves[self.masks[u]]]
+
+def get_neighbor_index(state: MazeState) -> NeighborIndex:
+    # Built once per maze and cached next to MazeState.cells, so every
+    # algorithm run on the same maze (e.g. in /api/batch) reuses it
+    index = state.__dict__.get("neighbor_index")
+    if index is None:
+        index = state.__dict__["neighbor_index"] = NeighborIndex(grid_array(state) != 1) # 1 is Wall
+    return index
 
 # Helper to reconstruct path
+# parent[u] is u's predecessor id, -1 if unseen; the root is its own parent
 def reconstruct_path(parent, current):
-    path = []
-    while current:
+    path = [current]
+    while parent[current] != current:
+        current = parent[current]
         path.append(current)
-        current = parent.get(current)
     return path[::-1]
 
-def get_neighbors(state: MazeState, node):
-    r, c = node
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    result = []
-    for dr, dc in directions:
-        nr, nc = r + dr, c + dc
-        if 0 <= nr < state.height and 0 <= nc < state.width:
-            # 1 is Wall
-            if state.grid[nr][nc] != 1:
-                result.append((nr, nc))
-    return result
+def to_cells(path, width, val):
+    # Flat ids -> (row, col, val) grid updates
+    return [(u // width, u % width, val) for u in path]
@@ -0,0 +1,131 @@
+from typing import List, Sequence
+import numpy as np
+from ..models import MazeState, SolveSummary
+from ..grid import grid_array
+
+# BFS over a stack of same-size mazes at once, one NumPy pass per BFS layer
+# for the whole stack instead of one Python step per node.
+#
+# The mazes are padded with a wall border and laid end to end, so a cell of
+# any maze is one flat id and its neighbors are fixed offsets (the border
+# keeps them inside the maze). The frontier of every maze is kept in the
+# exact order solve_bfs's queue holds it: the next layer is each frontier
+# cell's unseen neighbors in solve_bfs's move order (Up, Down, Left, Right),
+# first discovery wins. That order gives the exact counters too, not just the
+# path length:
+# - nodes_expanded: the layers before the goal's, plus the goal's position
+#   in its layer
+# - max_frontier_size: after popping the i-th cell of a layer of L, the queue
+#   holds L - i cells of that layer plus what the first i cells discovered
+# so bfs_stack's summaries equal solve_bfs_headless's for every maze.
+
+# Neighbor offsets in solve_bfs's order, as multiples of (padded width, 1)
+_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+def bfs_stack(open_cells: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> List[SolveSummary]:
+    # open_cells: (mazes, height, width) bool, True where not a wall;
+    # starts, ends: (mazes, 2) row/col arrays
+    n, h, w = open_cells.shape
+    pw = w + 2
+    size = (h + 2) * pw
+    padded = np.zeros((n, h + 2, pw), dtype=bool)
+    padded[:, 1:-1, 1:-1] = open_cells
+    seen = ~padded.ravel() # walls count as seen
+    claim = np.full(seen.size, np.iinfo(np.int64).max)
+
+    base = np.arange(n, dtype=np.int64) * size
+    start = base + (starts[:, 0] + 1) * pw + starts[:, 1] + 1
+    end = base + (ends[:, 0] + 1) * pw + ends[:, 1] + 1
+    offsets = np.array([dr * pw + dc for dr, dc in _OFFSETS], dtype=np.int64)
+
+    expanded = np.zeros(n, dtype=np.int64)
+    max_frontier = np.ones(n, dtype=np.int64)
+    path_length = np.zeros(n, dtype=np.int64)
+    success = np.zeros(n, dtype=bool)
+    no_goal = np.iinfo(np.int64).max
+
+    frontier = start # grouped by maze, in queue order within each
+    owner = np.arange(n) # maze of each frontier cell
+    seen[start] = True
+    depth = 0
+    while frontier.size:
+        layer = np.bincount(owner, minlength=n)
+        first = np.cumsum(layer) - layer # where each maze's cells begin in frontier
+        pos = np.arange(frontier.size) - first[owner] # 0-based position in its maze's layer
+
+        goal_pos = np.full(n, no_goal)
+        at_goal = frontier == end[owner]
+        goal_pos[owner[at_goal]] = pos[at_goal]
+        found = goal_pos != no_goal
+
+        # Next layer: unseen neighbors, first discovery kept, in queue order.
+        # A cell's claim is the lowest candidate slot naming it; every claimed
+        # cell is seen from here on, so claims are never reset.
+        candidates = (frontier[:, None] + offsets).ravel()
+        unseen = np.flatnonzero(~seen[candidates])
+        cells = candidates[unseen]
+        np.minimum.at(claim, cells, unseen)
+        kept = unseen[claim[cells] == unseen]
+        discoverer = kept // len(offsets)
+
+        # Queue size after each pop; pops from the goal on never happen
+        discovered = np.cumsum(np.bincount(discoverer, minlength=frontier.size))
+        discovered -= np.concatenate(([0], discovered))[first[owner]]
+        queue = layer[owner] - (pos + 1) + discovered
+        queue[pos >= goal_pos[owner]] = 0
+        active = layer > 0
+        max_frontier[active] = np.maximum(max_frontier[active], np.maximum.reduceat(queue, first[active]))
+
+        expanded += np.where(found, goal_pos + 1, layer)
+        success |= found
+        path_length[found] = depth + 1
+
+        # Mazes whose goal was reached are done
+        next_owner = owner[discoverer]
+        keep = ~found[next_owner]
+        frontier, owner = candidates[kept][keep], next_owner[keep]
+        seen[frontier] = True
+        depth += 1
+
+    return [
+        SolveSummary(success=bool(s), path_length=int(p), nodes_expanded=int(e), steps_taken=int(e), max_frontier_size=int(f))
+        for s, p, e, f in zip(success, path_length, expanded, max_frontier)
+    ]
+
+def bfs_many(mazes: Sequence[MazeState]) -> List[SolveSummary]:
+    # solve_bfs_headless for each of several same-size mazes, in one stack
+    open_cells = np.stack([grid_array(maze) != 1 for maze in mazes]) # 1 is Wall
+    starts = np.array([maze.start_pos for maze in mazes], dtype=np.int64)
+    ends = np.array([maze.end_pos for maze in mazes], dtype=np.int64)
+    return bfs_stack(open_cells, starts, ends)
+
+def distance_stack(open_cells: np.ndarray, sources: np.ndarray) -> np.ndarray:
+    # BFS distances from one open source cell per maze of a stack, same
+    # layout as bfs_stack: (mazes, height, width) int32 moves from the maze's
+    # source, -1 where unreachable. Only distances, so no queue order to keep.
+    n, h, w = open_cells.shape
+    pw = w + 2
+    size = (h + 2) * pw
+    padded = np.zeros((n, h + 2, pw), dtype=bool)
+    padded[:, 1:-1, 1:-1] = open_cells
+    seen = ~padded.ravel()
+    dist = np.full(seen.size, -1, dtype=np.int32)
+    claim = np.empty(seen.size, dtype=np.int64)
+    offsets = np.array([dr * pw + dc for dr, dc in _OFFSETS], dtype=np.int64)
+
+    frontier = np.arange(n, dtype=np.int64) * size + (sources[:, 0] + 1) * pw + sources[:, 1] + 1
+    seen[frontier] = True
+    depth = 0
+    while frontier.size:
+        dist[frontier] = depth
+        candidates = (frontier[:, None] + offsets).ravel()
+        candidates = candidates[~seen[candidates]]
+        # One copy of each newly reached cell: of the slots naming it, the
+        # one written last is the one whose claim matches
+        slots = np.arange(candidates.size)
+        claim[candidates] = slots
+        frontier = candidates[claim[candidates] == slots]
+        seen[frontier] = True
+        depth += 1
+
+    return dist.reshape(n, h + 2, pw)[:, 1:-1, 1:-1]
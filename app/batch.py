@@ -0,0 +1,238 @@
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .models import MazeConfig, MazeState, BatchConfig, BatchResult, BatchRow
+from .maze_generator import generate_maze, seeded, derive_seed, maze_id_for
+from .corpus import Corpus, open_corpus, corpus_path
+from .algorithms import ALGORITHMS, HEADLESS_ALGORITHMS
+from .algorithms.wavefront import bfs_many
+from .grid import is_large
+from .large_maze import scratch_large_maze
+from .metrics import add_phase, solves_total, nodes_expanded_total
+from .execution import CPU_SHARE
+
+# Size of the shared batch process pool (defaults to one worker per core,
+# split between the server processes)
+BATCH_WORKERS = int(os.environ.get("MAZE_BATCH_WORKERS", CPU_SHARE))
+# Shards per worker; more, smaller shards balance uneven maze costs
+SHARDS_PER_WORKER = 4
+# Cells per stack of mazes solved together by the vectorized BFS
+WAVEFRONT_CELLS = 1 << 21
+# Result name of vectorized BFS: its times are a share of a stack's time,
+# not comparable with the per-maze times of the other algorithms
+VECTORIZED_BFS = "BFS (vectorized, amortized)"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def get_process_pool() -> ProcessPoolExecutor:
+    # Created on first use and reused across requests. "spawn" avoids forking
+    # the server's threads (the threadpool running sync endpoints).
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def new_totals(algorithms: List[str]) -> Dict[str, dict]:
+    return {algo: {"success": 0, "time": 0.0, "nodes": 0, "path_len": 0, "steps": 0, "frontier": 0, "count": 0} for algo in algorithms}
+
+def merge_totals(into: Dict[str, dict], other: Dict[str, dict]):
+    for algo, data in other.items():
+        res = into.setdefault(algo, dict.fromkeys(data, 0)) # VECTORIZED_BFS is not in the request's list
+        for key, value in data.items():
+            res[key] += value
+
+def record_totals(totals: Dict[str, dict]):
+    # Solver metrics for a shard; workers are separate processes, so the
+    # server counts their solves from the returned totals
+    for algo, data in totals.items():
+        solves_total.inc(data["count"], algo, "batch")
+        nodes_expanded_total.inc(data["nodes"], algo)
+
+def resolve_corpus(config: BatchConfig) -> BatchConfig:
+    # A corpus run is the seeded run that generated the corpus, reading its
+    # mazes instead: take the corpus's config, seed and size. Raises like
+    # open_corpus.
+    if config.corpus is None:
+        return config
+    corpus = open_corpus(config.corpus)
+    num_mazes = len(corpus) if config.num_mazes is None else min(config.num_mazes, len(corpus))
+    return config.model_copy(update={"maze_config": corpus.config, "num_mazes": num_mazes, "seed": corpus.seed})
+
+def shard_mazes(maze_config: MazeConfig, base_seed: int, start: int, stop: int, corpus: Optional[str]) -> Iterator[MazeState]:
+    # Mazes [start, stop) of a run: read from the corpus file at path
+    # `corpus`, or generated
+    if corpus is not None:
+        yield from Corpus(corpus).mazes(start, stop)
+        return
+    for i in range(start, stop):
+        config = seeded(maze_config, derive_seed(base_seed, i))
+        # Not through the maze caches or the shared maze files, which a run
+        # would fill with mazes nobody solves again, pushing out the ones
+        # users are solving by id
+        if is_large(config.width, config.height):
+            with scratch_large_maze(config, maze_id_for(config)) as maze:
+                yield maze
+        else:
+            maze = generate_maze(config)
+            maze.maze_id = maze_id_for(config)
+            yield maze
+
+def run_shard(maze_config: MazeConfig, algorithms: List[str], trace: bool, base_seed: int, start: int, stop: int,
+              corpus: Optional[str] = None, rows: bool = False, vectorized: bool = False) -> Tuple[Dict[str, dict], Optional[List[BatchRow]]]:
+    # Generate (or read) and solve mazes [start, stop) of a run; safe to call
+    # in a worker process. Returns totals, and a row per solve if `rows`.
+    # vectorized: solve BFS for a stack of mazes at once (bfs_many); each
+    # maze is charged the stack's time divided evenly, reported as
+    # VECTORIZED_BFS instead of BFS.
+    vectorized = vectorized and not trace and "BFS" in algorithms and not is_large(maze_config.width, maze_config.height)
+    results = new_totals([VECTORIZED_BFS if vectorized and algo == "BFS" else algo for algo in algorithms])
+    shard_rows = [] if rows else None
+    stack_size = max(WAVEFRONT_CELLS // (maze_config.width * maze_config.height), 1) if vectorized else 1
+
+    mazes = enumerate(shard_mazes(maze_config, base_seed, start, stop, corpus), start)
+    while True:
+        stack = list(islice(mazes, stack_size))
+        if not stack:
+            break
+        bfs = None
+        if vectorized:
+            start_time = time.perf_counter()
+            bfs = bfs_many([maze for _, maze in stack])
+            end_time = time.perf_counter()
+            bfs_ms = (end_time - start_time) * 1000 / len(stack)
+            add_phase("solve", end_time - start_time) # no-op in worker processes
+
+        # Generate one maze for all algos to ensure fair comparison
+        for k, (i, maze) in enumerate(stack):
+            for algo_name in algorithms:
+                if algo_name not in ALGORITHMS: continue
+
+                name = algo_name
+                if bfs is not None and algo_name == "BFS":
+                    name = VECTORIZED_BFS
+                    summary, duration_ms = bfs[k], bfs_ms
+                else:
+                    start_time = time.perf_counter()
+
+                    if trace:
+                        steps_list = list(ALGORITHMS[algo_name](maze))
+                        summary = steps_list[-1] if steps_list else None
+                    else:
+                        summary = HEADLESS_ALGORITHMS[algo_name](maze)
+
+                    end_time = time.perf_counter()
+                    duration_ms = (end_time - start_time) * 1000
+                    add_phase("solve", end_time - start_time) # no-op in worker processes
+
+                if summary is None: continue
+
+                res = results[name]
+                res["count"] += 1
+                res["time"] += duration_ms
+                res["nodes"] += summary.nodes_expanded
+                res["steps"] += summary.steps_taken
+                res["frontier"] += summary.max_frontier_size
+
+                if summary.success:
+                    res["success"] += 1
+                    res["path_len"] += summary.path_length
+
+                if rows:
+                    shard_rows.append(BatchRow(
+                        maze=i, maze_id=maze.maze_id, algorithm=name, time_ms=duration_ms,
+                        success=summary.success, path_length=summary.path_length, nodes_expanded=summary.nodes_expanded,
+                        steps_taken=summary.steps_taken, max_frontier_size=summary.max_frontier_size
+                    ))
+
+    return results, shard_rows
+
+def summarize(totals: Dict[str, dict]) -> List[BatchResult]:
+    # Aggregation
+    final_output = []
+    for algo, data in totals.items():
+        count = data["count"]
+        if count == 0: continue
+
+        final_output.append(BatchResult(
+            algorithm=algo,
+            success_rate=data["success"] / count,
+            avg_time_ms=data["time"] / count,
+            avg_nodes=data["nodes"] / count,
+            avg_path_length=data["path_len"] / data["success"] if data["success"] > 0 else 0,
+            avg_steps=data["steps"] / count,
+            avg_frontier=data["frontier"] / count
+        ))
+
+    return final_output
+
+def plan_shards(config: BatchConfig, max_shard_size: Optional[int] = None) -> Tuple[int, int, List[Tuple[int, int]]]:
+    # Returns (base seed, parallel workers, contiguous [start, stop) maze ranges).
+    # Maze seeds depend only on (base seed, maze index), never on the split.
+    base_seed = config.seed if config.seed is not None else random.getrandbits(63)
+    workers = min(config.workers or BATCH_WORKERS, BATCH_WORKERS)
+    num_shards = 1 if workers <= 1 else workers * SHARDS_PER_WORKER
+    if max_shard_size:
+        num_shards = max(num_shards, -(-config.num_mazes // max_shard_size))
+    num_shards = max(min(num_shards, config.num_mazes), 1)
+
+    bounds = [config.num_mazes * k // num_shards for k in range(num_shards + 1)]
+    return base_seed, workers, [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+def run_shards(config: BatchConfig, rows: bool, max_shard_size: Optional[int] = None) -> Iterator[Tuple[Dict[str, dict], Optional[List[BatchRow]], int]]:
+    # Yields (shard totals, shard rows, mazes in shard) as shards finish, in
+    # completion order. config must be resolved (resolve_corpus).
+    # Closing the generator early cancels shards that have not started yet.
+    base_seed, workers, shards = plan_shards(config, max_shard_size)
+    corpus = os.path.abspath(corpus_path(config.corpus)) if config.corpus is not None else None
+    args = (config.maze_config, config.algorithms, config.trace, base_seed)
+
+    if workers <= 1 or len(shards) <= 1:
+        # Not worth a round trip through the pool
+        for start, stop in shards:
+            totals, shard_rows = run_shard(*args, start, stop, corpus, rows, config.vectorized)
+            record_totals(totals)
+            yield totals, shard_rows, stop - start
+        return
+
+    pool = get_process_pool()
+    futures = {pool.submit(run_shard, *args, start, stop, corpus, rows, config.vectorized): stop - start for start, stop in shards}
+    try:
+        for future in as_completed(futures):
+            totals, shard_rows = future.result()
+            record_totals(totals)
+            yield totals, shard_rows, futures[future]
+    finally:
+        for future in futures:
+            future.cancel()
+
+def iter_batch(config: BatchConfig, max_shard_size: Optional[int] = None) -> Iterator[Tuple[Dict[str, dict], int]]:
+    # Yields (shard totals, mazes in shard) as shards finish
+    shards = run_shards(config, False, max_shard_size)
+    try:
+        for totals, _, done in shards:
+            yield totals, done
+    finally:
+        shards.close()
+
+def iter_batch_rows(config: BatchConfig, max_shard_size: Optional[int] = None) -> Iterator[Tuple[Dict[str, dict], List[BatchRow]]]:
+    # Yields (shard totals, a row per solve in the shard) as shards finish
+    shards = run_shards(config, True, max_shard_size)
+    try:
+        for totals, shard_rows, _ in shards:
+            yield totals, shard_rows
+    finally:
+        shards.close()
+
+def run_batch(config: BatchConfig) -> List[BatchResult]:
+    totals = new_totals(config.algorithms)
+    for shard_totals, _ in iter_batch(config):
+        merge_totals(totals, shard_totals)
+    return summarize(totals)
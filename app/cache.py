@@ -0,0 +1,218 @@
+import os
+import pickle
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from .models import MazeConfig, MazeState, CachedSolve
+from .grid import encode_maze, decode_maze
+from .storage import STATE_BACKEND, Database, get_database
+
+class Cache(ABC):
+    # Interface of the cache backends: a bounded key -> value mapping where a
+    # miss only costs recomputing the value. Keys are strings.
+    hits = 0
+    misses = 0
+
+    @abstractmethod
+    def get(self, key: str, default=None):
+        ...
+
+    @abstractmethod
+    def put(self, key: str, value):
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        # size, hits and misses, plus weight if the cache is weighed
+        ...
+
+class LRUCache(Cache):
+    # Thread-safe bounded mapping with least-recently-used eviction.
+    # Optionally also bounded by total weight (e.g. bytes), via weigh(value).
+    def __init__(self, maxsize: int, max_weight: Optional[int] = None, weigh: Optional[Callable] = None):
+        self.maxsize = maxsize
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self._evict(key)
+            self._data[key] = value
+            if self.weigh:
+                self.weight += self.weigh(value)
+            while len(self._data) > self.maxsize or (self.max_weight is not None and self.weight > self.max_weight and len(self._data) > 1):
+                self._evict(next(iter(self._data)))
+
+    def _evict(self, key):
+        value = self._data.pop(key)
+        if self.weigh:
+            self.weight -= self.weigh(value)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        stats = {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+        if self.weigh:
+            stats.update(weight=self.weight, max_weight=self.max_weight)
+        return stats
+
+# (dumps, loads) between a cached value and the bytes stored for it
+Codec = Tuple[Callable[[object], bytes], Callable[[bytes], object]]
+
+class SqliteCache(Cache):
+    # One table of a shared SQLite database, so every worker process (and the
+    # next server run) sees the same entries. Values are stored encoded by
+    # codec; entries are bounded by count and by total encoded bytes, the
+    # least recently used going first.
+    def __init__(self, db: Database, table: str, codec: Codec, maxsize: int, max_weight: Optional[int] = None):
+        self.db = db
+        self.table = table
+        self.dumps, self.loads = codec
+        self.maxsize = maxsize
+        self.max_weight = max_weight
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        db.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value BLOB NOT NULL, weight INTEGER NOT NULL, used REAL NOT NULL)")
+        db.execute(f"CREATE INDEX IF NOT EXISTS {table}_used ON {table} (used)")
+
+    def get(self, key, default=None):
+        row = self.db.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return default
+        self.db.execute(f"UPDATE {self.table} SET used = ? WHERE key = ?", (time.time(), key))
+        return self.loads(row[0])
+
+    def put(self, key, value):
+        blob = self.dumps(value)
+        self.db.execute(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)", (key, blob, len(blob), time.time()))
+        self._evict()
+
+    def _evict(self):
+        # Approximate under concurrent writers, which is all a cache needs
+        size, weight = self._totals()
+        over = lambda: self.max_weight is not None and weight > self.max_weight
+        if size <= self.maxsize and not over():
+            return
+        victims = []
+        for key, w in self.db.execute(f"SELECT key, weight FROM {self.table} ORDER BY used"):
+            if len(victims) >= size - 1 or (size - len(victims) <= self.maxsize and not over()):
+                break
+            victims.append((key,))
+            weight -= w
+        self.db.connect().executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
+
+    def _totals(self) -> Tuple[int, int]:
+        return self.db.execute(f"SELECT COUNT(*), COALESCE(SUM(weight), 0) FROM {self.table}").fetchone()
+
+    def __len__(self):
+        return self._totals()[0]
+
+    def stats(self) -> dict:
+        size, weight = self._totals()
+        return {"size": size, "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "weight": weight, "max_weight": self.max_weight}
+
+class TieredCache(Cache):
+    # A small per-process LRU in front of a shared cache: repeated hits skip
+    # the database and decoding. Cached values are immutable (keys are content
+    # hashes or seeded config ids), so the local copies never go stale.
+    def __init__(self, local: LRUCache, shared: Cache):
+        self.local = local
+        self.shared = shared
+
+    @property
+    def hits(self):
+        return self.local.hits + self.shared.hits
+
+    @property
+    def misses(self):
+        return self.shared.misses
+
+    def get(self, key, default=None):
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is None:
+                return default
+            self.local.put(key, value)
+        return value
+
+    def put(self, key, value):
+        self.local.put(key, value)
+        self.shared.put(key, value)
+
+    def __len__(self):
+        return len(self.shared)
+
+    def stats(self) -> dict:
+        return {**self.shared.stats(), "hits": self.hits, "misses": self.misses, "local": self.local.stats()}
+
+# Codecs of the shared backend: mazes in the binary wire format behind their
+# id, configs as JSON, solve results pickled
+def _dump_maze(maze: MazeState) -> bytes:
+    return (maze.maze_id or "").encode() + b"\n" + encode_maze(maze)
+
+def _load_maze(data: bytes) -> MazeState:
+    maze_id, _, data = data.partition(b"\n")
+    maze = decode_maze(data)
+    maze.maze_id = maze_id.decode() or None
+    return maze
+
+MAZE_CODEC: Codec = (_dump_maze, _load_maze)
+CONFIG_CODEC: Codec = (lambda config: config.model_dump_json().encode(), MazeConfig.model_validate_json)
+SOLVE_CODEC: Codec = (lambda entry: pickle.dumps(entry.model_dump()), lambda data: CachedSolve.model_validate(pickle.loads(data)))
+
+def make_cache(table: str, codec: Codec, maxsize: int, max_weight: Optional[int] = None,
+               weigh: Optional[Callable] = None, local_size: Optional[int] = None) -> Cache:
+    # An LRUCache, or with the sqlite backend a shared SqliteCache fronted by
+    # a local LRUCache of local_size entries (maxsize if None)
+    if STATE_BACKEND == "memory":
+        return LRUCache(maxsize, max_weight, weigh)
+    local_size = maxsize if local_size is None else local_size
+    local_weight = None if max_weight is None else max_weight * local_size // maxsize
+    return TieredCache(LRUCache(local_size, local_weight, weigh), SqliteCache(get_database(), table, codec, maxsize, max_weight))
+
+MAZE_CACHE_SIZE = int(os.environ.get("MAZE_CACHE_SIZE", 256))
+SOLVE_CACHE_SIZE = int(os.environ.get("SOLVE_CACHE_SIZE", 1024))
+
+# Generated MazeStates by maze id
+maze_cache = make_cache("mazes", MAZE_CODEC, MAZE_CACHE_SIZE, local_size=min(MAZE_CACHE_SIZE, 64))
+# Seeded MazeConfig by maze id; tiny, so it outlives maze_cache entries and
+# lets an evicted maze be regenerated from its id
+maze_config_cache = make_cache("maze_configs", CONFIG_CODEC, 10_000, local_size=1000)
+# Solve results by solve key (maze hash, algorithm); bounded by compressed trace bytes
+solve_cache = make_cache(
+    "solves", SOLVE_CODEC, SOLVE_CACHE_SIZE,
+    max_weight=int(os.environ.get("SOLVE_CACHE_BYTES", 64 * 1024 * 1024)),
+    weigh=lambda entry: 256 + len(entry.trace or b""),
+    local_size=min(SOLVE_CACHE_SIZE, 128)
+)
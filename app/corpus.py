@@ -0,0 +1,145 @@
+import os
+import random
+import re
+import struct
+from concurrent.futures import Executor, as_completed
+from typing import Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .models import MazeConfig, MazeState, MAX_INLINE_SIDE
+from .grid import grid_array, is_large, maze_from_array
+from .maze_generator import generate_maze, seeded, derive_seed, maze_id_for, GENERATOR_VERSION, MASK64
+
+# Maze corpora: a fixed set of mazes generated once into one file, so batch
+# runs (/api/batch with "corpus", or app/corpus_cli.py) compare the same mazes
+# every time and never pay for generation.
+#
+# A corpus is the maze set of a seeded batch run, stored: maze i is
+# generate_maze(config seeded with derive_seed(seed, i)), so it keeps the
+# maze_id it would have had if generated (unless GENERATOR_VERSION changed
+# since; then its mazes have no id). File layout (little-endian):
+#   magic "MZC1" | width, height (uint16) | count | GENERATOR_VERSION (uint32)
+#   | base seed (uint64) | config JSON length (uint32)
+#   config JSON (the unseeded MazeConfig)
+#   count index records: seed (uint64), start, end (2 x uint16 each)
+#   count wall bitmaps of width*height bits (np.packbits, row-major)
+# The index and bitmaps are memory-mapped, and a maze is unpacked only when
+# read (~1 bit per cell on disk).
+# Corpora are named files in CORPUS_DIR.
+
+CORPUS_DIR = os.environ.get("MAZE_CORPUS_DIR", "corpora")
+CORPUS_NAME = re.compile(r"\w[\w.-]*") # a file name in CORPUS_DIR, no paths
+CORPUS_MAGIC = b"MZC1"
+CORPUS_HEADER = struct.Struct("<4s2H2IQI")
+INDEX_DTYPE = np.dtype([("seed", "<u8"), ("start", "<u2", (2,)), ("end", "<u2", (2,))])
+# Mazes per generation task
+CORPUS_CHUNK = 256
+
+def corpus_path(name: str) -> str:
+    if not CORPUS_NAME.fullmatch(name):
+        raise ValueError(f"Invalid corpus name: {name}")
+    return os.path.join(CORPUS_DIR, name)
+
+class Corpus:
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            magic, width, height, count, version, seed, config_len = CORPUS_HEADER.unpack(f.read(CORPUS_HEADER.size))
+            if magic != CORPUS_MAGIC:
+                raise ValueError(f"{path} is not a maze corpus")
+            self.config = MazeConfig.model_validate_json(f.read(config_len))
+        self.path = path
+        self.width, self.height, self.count = width, height, count
+        self.generator_version, self.seed = version, seed
+
+        offset = CORPUS_HEADER.size + config_len
+        self.index = np.memmap(path, dtype=INDEX_DTYPE, mode="r", offset=offset, shape=(count,))
+        self.record_size = (width * height + 7) // 8
+        self.walls = np.memmap(path, dtype=np.uint8, mode="r", offset=offset + INDEX_DTYPE.itemsize * count,
+                               shape=(count, self.record_size))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def maze_id(self, i: int) -> Optional[str]:
+        # None if another generator version wrote the corpus: its mazes are
+        # still the stored ones, but the id would regenerate a different maze
+        if self.generator_version != GENERATOR_VERSION:
+            return None
+        return maze_id_for(seeded(self.config, int(self.index[i]["seed"])))
+
+    def maze(self, i: int) -> MazeState:
+        cells = 2 - np.unpackbits(self.walls[i], count=self.width * self.height) # 1 = Wall, 2 = Empty
+        arr = cells.reshape(self.height, self.width)
+        start, end = tuple(self.index[i]["start"].tolist()), tuple(self.index[i]["end"].tolist())
+        arr[start] = 10
+        arr[end] = 11
+        maze = maze_from_array(arr, start, end)
+        maze.maze_id = self.maze_id(i)
+        return maze
+
+    def mazes(self, start: int = 0, stop: Optional[int] = None) -> Iterator[MazeState]:
+        # Mazes [start, stop), unpacked one at a time as they are read
+        for i in range(start, self.count if stop is None else min(stop, self.count)):
+            yield self.maze(i)
+
+def open_corpus(name: str) -> Corpus:
+    # Raises FileNotFoundError for unknown corpora, ValueError for bad names or files
+    return Corpus(corpus_path(name))
+
+def generate_records(config: MazeConfig, base_seed: int, start: int, stop: int) -> Tuple[int, np.ndarray, np.ndarray]:
+    # Index records and wall bitmaps of mazes [start, stop); safe to run in a worker process
+    index = np.zeros(stop - start, dtype=INDEX_DTYPE)
+    walls = np.empty((stop - start, (config.width * config.height + 7) // 8), dtype=np.uint8)
+    for k, i in enumerate(range(start, stop)):
+        seed = derive_seed(base_seed, i)
+        maze = generate_maze(seeded(config, seed))
+        index[k] = (seed, maze.start_pos, maze.end_pos)
+        walls[k] = np.packbits(grid_array(maze).ravel() == 1)
+    return start, index, walls
+
+def write_corpus(name: str, config: MazeConfig, count: int, seed: Optional[int] = None, pool: Optional[Executor] = None,
+                 progress: Optional[Callable[[int, int], None]] = None) -> Corpus:
+    # Generates `count` mazes into corpus `name` (replacing it), in `pool`
+    # if given; progress(done, count) is called as chunks finish
+    if is_large(config.width, config.height):
+        raise ValueError(f"Corpus mazes are at most {MAX_INLINE_SIDE} a side")
+    if count < 1:
+        raise ValueError("A corpus needs at least one maze")
+    config = config.model_copy(update={"seed": None})
+    base_seed = (seed if seed is not None else random.getrandbits(63)) & MASK64
+    config_json = config.model_dump_json().encode()
+
+    path = corpus_path(name)
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    record_size = (config.width * config.height + 7) // 8
+    offset = CORPUS_HEADER.size + len(config_json)
+    try:
+        with open(tmp, "wb") as f:
+            f.write(CORPUS_HEADER.pack(CORPUS_MAGIC, config.width, config.height, count, GENERATOR_VERSION, base_seed, len(config_json)))
+            f.write(config_json)
+            f.truncate(offset + (INDEX_DTYPE.itemsize + record_size) * count)
+        index = np.memmap(tmp, dtype=INDEX_DTYPE, mode="r+", offset=offset, shape=(count,))
+        walls = np.memmap(tmp, dtype=np.uint8, mode="r+", offset=offset + INDEX_DTYPE.itemsize * count, shape=(count, record_size))
+
+        chunks = [(start, min(start + CORPUS_CHUNK, count)) for start in range(0, count, CORPUS_CHUNK)]
+        if pool is None:
+            results = (generate_records(config, base_seed, start, stop) for start, stop in chunks)
+        else:
+            results = (future.result() for future in as_completed([pool.submit(generate_records, config, base_seed, start, stop) for start, stop in chunks]))
+        done = 0
+        for start, chunk_index, chunk_walls in results:
+            index[start:start + len(chunk_index)] = chunk_index
+            walls[start:start + len(chunk_walls)] = chunk_walls
+            done += len(chunk_index)
+            if progress:
+                progress(done, count)
+        index.flush()
+        walls.flush()
+        del index, walls
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return Corpus(path)
@@ -0,0 +1,103 @@
+import argparse
+import csv
+import json
+import sys
+import time
+
+from .models import MazeConfig, BatchConfig, BatchRow
+from .corpus import open_corpus, write_corpus, CORPUS_DIR
+from .batch import resolve_corpus, iter_batch_rows, get_process_pool, new_totals, merge_totals, summarize, BATCH_WORKERS
+
+# Build and run maze corpora (see app/corpus.py). Corpora are files in
+# MAZE_CORPUS_DIR (default ./corpora), the same ones /api/batch reads.
+#
+#   python -m app.corpus_cli generate small50 --width 50 --height 50 --count 10000 --seed 1
+#   python -m app.corpus_cli generate perfect --width 99 --height 99 --count 500 --config '{"generator": "wilson"}'
+#   python -m app.corpus_cli info small50
+#   python -m app.corpus_cli run small50 --algorithms BFS "A*" --rows results.csv
+
+def generate(args) -> int:
+    config = MazeConfig(**{"width": args.width, "height": args.height, **json.loads(args.config)})
+    pool = get_process_pool() if args.workers > 1 else None
+    start = time.perf_counter()
+    progress = lambda done, count: print(f"\r{done}/{count} mazes", end="", file=sys.stderr, flush=True)
+    corpus = write_corpus(args.name, config, args.count, args.seed, pool, progress)
+    print(file=sys.stderr)
+    print(f"Wrote {len(corpus)} mazes to {corpus.path} in {time.perf_counter() - start:.1f}s (seed {corpus.seed})")
+    return 0
+
+def info(args) -> int:
+    corpus = open_corpus(args.name)
+    print(f"{corpus.path}: {len(corpus)} mazes, seed {corpus.seed}, generator version {corpus.generator_version}")
+    print(corpus.config.model_dump_json(exclude={"seed"}))
+    return 0
+
+def run(args) -> int:
+    config = resolve_corpus(BatchConfig(corpus=args.name, num_mazes=args.mazes, algorithms=args.algorithms,
+                                        trace=args.trace, workers=args.workers))
+    out = open(args.rows, "w", newline="") if args.rows else None
+    writer = None
+    if out is not None and args.rows.endswith(".csv"):
+        writer = csv.DictWriter(out, fieldnames=list(BatchRow.model_fields))
+        writer.writeheader()
+
+    totals = new_totals(config.algorithms)
+    done = 0
+    try:
+        for shard_totals, rows in iter_batch_rows(config):
+            merge_totals(totals, shard_totals)
+            for row in rows:
+                if writer is not None:
+                    writer.writerow(row.model_dump())
+                elif out is not None:
+                    out.write(row.model_dump_json() + "\n")
+            if out is not None:
+                out.flush() # rows are on disk as each shard finishes
+            done += len({row.maze for row in rows})
+            print(f"\r{done}/{config.num_mazes} mazes", end="", file=sys.stderr, flush=True)
+    finally:
+        if out is not None:
+            out.close()
+    print(file=sys.stderr)
+
+    print(f"{'algorithm':<20} {'success':>8} {'avg ms':>9} {'avg nodes':>10} {'avg path':>9}")
+    for result in summarize(totals):
+        print(f"{result.algorithm:<20} {result.success_rate:>8.1%} {result.avg_time_ms:>9.3f} {result.avg_nodes:>10.1f} {result.avg_path_length:>9.1f}")
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.corpus_cli", description=f"Build and run maze corpora (in {CORPUS_DIR}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("generate", help="generate a corpus from a maze config")
+    p.add_argument("name", help="corpus file name")
+    p.add_argument("--width", type=int, default=50)
+    p.add_argument("--height", type=int, default=50)
+    p.add_argument("--config", default="{}", help="other MazeConfig fields as JSON")
+    p.add_argument("--count", type=int, required=True, help="number of mazes")
+    p.add_argument("--seed", type=int, help="base seed; same seed, same mazes (default: random)")
+    p.add_argument("--workers", type=int, default=BATCH_WORKERS, help="generation processes")
+    p.set_defaults(handler=generate)
+
+    p = commands.add_parser("info", help="describe a corpus")
+    p.add_argument("name")
+    p.set_defaults(handler=info)
+
+    p = commands.add_parser("run", help="run algorithms over a corpus")
+    p.add_argument("name")
+    p.add_argument("--algorithms", nargs="+", required=True)
+    p.add_argument("--mazes", type=int, help="only the first N mazes")
+    p.add_argument("--trace", action="store_true", help="run the tracing solvers instead of the headless ones")
+    p.add_argument("--workers", type=int, help="parallel shards (default: all batch workers)")
+    p.add_argument("--rows", metavar="PATH", help="write a row per solve, as CSV if PATH ends in .csv, else NDJSON")
+    p.set_defaults(handler=run)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
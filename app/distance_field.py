@@ -0,0 +1,83 @@
+import os
+import pickle
+from array import array
+from typing import List, Optional, Tuple
+
+from .models import MazeState, DistanceAnswer
+from .grid import maze_hash
+from .algorithms.bfs import bfs_tree
+from .algorithms.utils import get_neighbor_index
+from .cache import make_cache, Codec
+
+# Distance fields: one BFS from a target cell over the whole maze, kept so
+# that "how far, and which way" questions from any number of starts are
+# answered without searching again (/api/distances).
+#
+# The maze is undirected, so the BFS tree from the target holds, for every
+# cell, its distance to the target and its parent in the tree, which is the
+# next cell on a shortest path towards the target. A query walks the
+# next-hop chain: O(path) per start, or O(1) without the path.
+#
+# Fields are cached by maze hash and target, so the same maze sent inline
+# or by id, or with different display marks, shares one field.
+
+FIELD_CACHE_SIZE = int(os.environ.get("MAZE_FIELD_CACHE_SIZE", 64))
+
+class DistanceField:
+    __slots__ = ("width", "target", "dist", "next_hop")
+
+    def __init__(self, width: int, target: int, dist: array, next_hop: array):
+        self.width = width
+        self.target = target
+        self.dist = dist # moves to the target, -1 if unreachable
+        self.next_hop = next_hop # next cell towards the target (the target itself there), -1 if unreachable
+
+    def path(self, u: int) -> List[int]:
+        # u to the target along next hops; u must be reachable
+        next_hop = self.next_hop
+        path = [u]
+        while u != self.target:
+            u = next_hop[u]
+            path.append(u)
+        return path
+
+    def answer(self, start: Tuple[int, int], with_path: bool) -> DistanceAnswer:
+        u = start[0] * self.width + start[1]
+        if self.dist[u] < 0:
+            return DistanceAnswer(start=start)
+        hop = self.next_hop[u]
+        return DistanceAnswer(
+            start=start, success=True, path_length=self.dist[u] + 1,
+            next_cell=divmod(hop, self.width) if hop != u else None,
+            path=[divmod(v, self.width) for v in self.path(u)] if with_path else None
+        )
+
+def build_field(maze: MazeState, target: Tuple[int, int]) -> DistanceField:
+    index = get_neighbor_index(maze)
+    source = index.node(target)
+    dist, parent = bfs_tree(index, source)
+    return DistanceField(maze.width, source, array("i", dist), array("i", parent))
+
+FIELD_CODEC: Codec = (
+    lambda field: pickle.dumps((field.width, field.target, field.dist, field.next_hop)),
+    lambda data: DistanceField(*pickle.loads(data))
+)
+
+# Fields by "maze hash:target"; bounded by their arrays' bytes (8 per cell)
+distance_fields = make_cache(
+    "distance_fields", FIELD_CODEC, FIELD_CACHE_SIZE,
+    max_weight=int(os.environ.get("MAZE_FIELD_CACHE_BYTES", 256 * 1024 * 1024)),
+    weigh=lambda field: 8 * len(field.dist),
+    local_size=min(FIELD_CACHE_SIZE, 16)
+)
+
+def get_distance_field(maze: MazeState, target: Optional[Tuple[int, int]] = None) -> Tuple[DistanceField, bool]:
+    # (field, whether it was cached); target defaults to the maze's end
+    target = tuple(target or maze.end_pos)
+    key = f"{maze_hash(maze)}:{target[0]},{target[1]}"
+    field = distance_fields.get(key)
+    if field is not None:
+        return field, True
+    field = build_field(maze, target)
+    distance_fields.put(key, field)
+    return field, False
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from starlette.routing import compile_path
+
+from .metrics import Counter, Collected, add_phase
+
+# Where CPU-heavy work runs and how much of it is admitted at once.
+#
+# Sync endpoints run on Starlette's threadpool, so concurrent solves fight
+# over the GIL with the event loop (and with /health and static files).
+# Two things keep that bounded:
+# - AdmissionMiddleware caps in-flight requests per endpoint group and sheds
+#   the excess early: 429 when the group's queue is full, 503 when a request
+#   waited too long for a slot.
+# - Whole-trace solves of large mazes run in a process pool (see
+#   solve_cache.py; streams stay lazy in their thread), and every solve gets
+#   a CPU time budget after which it is aborted. Generating a large maze
+#   gets one too (see large_maze.py).
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+# Solver CPU seconds per request before the solve is aborted
+SOLVE_TIME_BUDGET = float(os.environ.get("MAZE_SOLVE_TIME_BUDGET", 10))
+# Seconds spent generating a large maze before generation is aborted
+GENERATE_TIME_BUDGET = float(os.environ.get("MAZE_GENERATE_TIME_BUDGET", 60))
+# Seconds a request may wait for an in-flight slot before it gets a 503
+QUEUE_TIMEOUT = float(os.environ.get("MAZE_QUEUE_TIMEOUT", 5))
+
+# Server processes on this machine (uvicorn's default for --workers). Each
+# runs its own process pools, so by default they split the cores between them.
+WEB_WORKERS = max(_env_int("WEB_CONCURRENCY", 1), 1)
+CPU_SHARE = max((os.cpu_count() or 1) // WEB_WORKERS, 1)
+
+# Worker processes for interactive solves (0 solves in the server process).
+# Separate from the batch pool, so long batch runs never delay a solve.
+SOLVE_WORKERS = _env_int("MAZE_SOLVE_WORKERS", CPU_SHARE)
+# Smaller mazes solve faster than the round trip to a worker
+POOL_MIN_CELLS = _env_int("MAZE_POOL_MIN_CELLS", 50 * 50)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def get_solve_pool() -> Optional[ProcessPoolExecutor]:
+    # Created on first use; "spawn" for the same reason as the batch pool
+    global _pool
+    if SOLVE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SOLVE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+class Overloaded(Exception):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+class Limiter:
+    # At most max_in_flight requests run at once, at most max_queue wait
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, queue_timeout: float = QUEUE_TIMEOUT):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def acquire(self):
+        # Raises Overloaded instead of queueing without bound
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            raise Overloaded(429, f"Too many {self.name} requests queued")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise Overloaded(503, f"Timed out waiting for a {self.name} slot")
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+LIMITERS = {
+    "solve": Limiter("solve", _env_int("MAZE_SOLVE_CONCURRENCY", 4), _env_int("MAZE_SOLVE_QUEUE", 32)),
+    "generate": Limiter("generate", _env_int("MAZE_GENERATE_CONCURRENCY", 4), _env_int("MAZE_GENERATE_QUEUE", 32)),
+    "batch": Limiter("batch", _env_int("MAZE_BATCH_CONCURRENCY", 1), _env_int("MAZE_BATCH_QUEUE", 4)),
+}
+
+# Route template -> limiter group, matched like the router matches routes
+# (so "/api/sessions/{session_id}/edits" covers every session). Anything
+# else (health, metrics, jobs, static files) is never held back.
+LIMITED_PATHS = {
+    "/api/solve": "solve",
+    "/api/solve/binary": "solve",
+    "/api/solve/stream": "solve",
+    "/api/solve_many": "solve",
+    "/api/sessions": "solve",
+    "/api/sessions/{session_id}/edits": "solve",
+    "/api/distances": "solve",
+    "/api/generate": "generate",
+    "/api/batch": "batch",
+    "/api/batch/rows": "batch",
+}
+
+shed_total = Counter("maze_requests_shed_total", "Requests refused by admission control.", ("group", "status"))
+Collected("maze_requests_in_flight", "Admitted requests running per group.", ("group",), lambda: {(name,): l.in_flight for name, l in LIMITERS.items()})
+Collected("maze_requests_waiting", "Requests waiting for a slot per group.", ("group",), lambda: {(name,): l.waiting for name, l in LIMITERS.items()})
+
+class AdmissionMiddleware:
+    # Plain ASGI middleware: the slot is held until the response (streamed
+    # bodies included) has been sent
+    def __init__(self, app, limiters: Dict[str, Limiter] = LIMITERS, paths: Dict[str, str] = LIMITED_PATHS):
+        self.app = app
+        self.limiters = limiters
+        # Runs before routing, so it matches the raw path against the templates itself
+        self.routes = [(compile_path(template)[0], template, group) for template, group in paths.items()]
+
+    def match(self, path: str) -> Optional[Tuple[str, str]]:
+        # (route template, limiter group) of a request path, None if unlimited
+        for pattern, template, group in self.routes:
+            if pattern.match(path):
+                return template, group
+        return None
+
+    async def __call__(self, scope, receive, send):
+        route = self.match(scope["path"]) if scope["type"] == "http" else None
+        if route is None:
+            return await self.app(scope, receive, send)
+
+        template, group = route
+        limiter = self.limiters[group]
+        start = time.perf_counter()
+        try:
+            await limiter.acquire()
+        except Overloaded as e:
+            shed_total.inc(1, group, str(e.status))
+            scope["metrics_endpoint"] = template # routing never ran (see MetricsMiddleware)
+            body = json.dumps({"detail": e.detail}).encode()
+            await send({"type": "http.response.start", "status": e.status, "headers": [
+                (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), (b"retry-after", b"1")
+            ]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        finally:
+            add_phase("queue", time.perf_counter() - start)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -0,0 +1,293 @@
+import random
+from collections import deque
+from typing import List, Optional, Tuple
+from .algorithms.utils import NeighborIndex
+
+# Perfect-maze carvers. Each returns a flat row-major bytearray of
+# rows * cols cells (1 = Wall, 2 = Empty) whose open cells form a tree
+# containing start. All run in (near) linear time and memory.
+
+WALL, EMPTY = 1, 2
+
+def carve_prim(rows: int, cols: int, start: Tuple[int, int], rng: random.Random) -> bytearray:
+    # Randomized Prim's on the dense grid: a frontier wall cell is opened iff
+    # exactly one of its 4 neighbors is open, which keeps walls one cell thin
+    # and the open cells a tree.
+    # The frontier is an unordered list with O(1) swap-remove, and each cell
+    # enters it at most once: a cell rejected once (2+ open neighbors) can
+    # never qualify again, because cells only ever get opened.
+    cells = bytearray([WALL]) * (rows * cols)
+    queued = bytearray(rows * cols)
+    frontier = []
+
+    def open_cell(u):
+        cells[u] = EMPTY
+        r, c = divmod(u, cols)
+        for v, ok in ((u - cols, r > 0), (u + cols, r < rows - 1), (u - 1, c > 0), (u + 1, c < cols - 1)):
+            if ok and not queued[v] and cells[v] == WALL:
+                queued[v] = 1
+                frontier.append(v)
+
+    s = start[0] * cols + start[1]
+    queued[s] = 1
+    open_cell(s)
+
+    while frontier:
+        # Pick random wall
+        i = rng.randrange(len(frontier))
+        u = frontier[i]
+        frontier[i] = frontier[-1]
+        frontier.pop()
+
+        r, c = divmod(u, cols)
+        cardinal_open = ((r > 0 and cells[u - cols] == EMPTY) + (r < rows - 1 and cells[u + cols] == EMPTY)
+                         + (c > 0 and cells[u - 1] == EMPTY) + (c < cols - 1 and cells[u + 1] == EMPTY))
+        if cardinal_open == 1:
+            open_cell(u)
+
+    return cells
+
+# The carvers below work on a lattice: "rooms" are the cells whose row and
+# column have the same parity as start, and two rooms are joined by opening
+# the single cell between them. Cells with neither coordinate on the lattice
+# always stay walls.
+
+def _lattice(rows, cols, start):
+    room_rows = list(range(start[0] % 2, rows, 2))
+    room_cols = list(range(start[1] % 2, cols, 2))
+    return room_rows, room_cols
+
+def _open_rooms(cells, cols, room_rows, room_cols):
+    for r in room_rows:
+        for c in room_cols:
+            cells[r * cols + c] = EMPTY
+
+def carve_kruskal(rows: int, cols: int, start: Tuple[int, int], rng: random.Random) -> bytearray:
+    # Randomized Kruskal: shuffle all room-to-room edges and open every edge
+    # that joins two different components (union-find with path halving)
+    cells = bytearray([WALL]) * (rows * cols)
+    room_rows, room_cols = _lattice(rows, cols, start)
+    _open_rooms(cells, cols, room_rows, room_cols)
+
+    edges = []
+    for r in room_rows:
+        for c in room_cols:
+            u = r * cols + c
+            if c + 2 < cols: edges.append((u, u + 2, u + 1))
+            if r + 2 < rows: edges.append((u, u + 2 * cols, u + cols))
+    rng.shuffle(edges)
+
+    parent = list(range(rows * cols))
+
+    def find(u):
+        while parent[u] != u:
+            parent[u] = parent[parent[u]]
+            u = parent[u]
+        return u
+
+    for u, v, between in edges:
+        ru, rv = find(u), find(v)
+        if ru != rv:
+            parent[ru] = rv
+            cells[between] = EMPTY
+
+    return cells
+
+def carve_wilson(rows: int, cols: int, start: Tuple[int, int], rng: random.Random) -> bytearray:
+    # Wilson's algorithm: loop-erased random walks from every room into the
+    # growing tree give a uniformly random spanning tree (no directional bias)
+    cells = bytearray([WALL]) * (rows * cols)
+    room_rows, room_cols = _lattice(rows, cols, start)
+    rooms = [r * cols + c for r in room_rows for c in room_cols]
+    rng.shuffle(rooms)
+
+    in_tree = bytearray(rows * cols)
+    s = start[0] * cols + start[1]
+    in_tree[s] = 1
+    cells[s] = EMPTY
+    exit_to = {} # last step taken out of each room; overwriting it erases loops
+
+    for room in rooms:
+        u = room
+        while not in_tree[u]:
+            r, c = divmod(u, cols)
+            steps = []
+            if r >= 2: steps.append(-2 * cols)
+            if r + 2 < rows: steps.append(2 * cols)
+            if c >= 2: steps.append(-2)
+            if c + 2 < cols: steps.append(2)
+            d = rng.choice(steps)
+            exit_to[u] = d
+            u += d
+
+        u = room
+        while not in_tree[u]:
+            d = exit_to[u]
+            in_tree[u] = 1
+            cells[u] = EMPTY
+            cells[u + d // 2] = EMPTY
+            u += d
+
+    return cells
+
+def carve_division(rows: int, cols: int, start: Tuple[int, int], rng: random.Random) -> bytearray:
+    # Recursive division: start with every room joined to its neighbors, then
+    # split chambers with a wall that has a single gap, until chambers are one
+    # room wide. Uses an explicit stack instead of recursion.
+    cells = bytearray([WALL]) * (rows * cols)
+    room_rows, room_cols = _lattice(rows, cols, start)
+    _open_rooms(cells, cols, room_rows, room_cols)
+    for i, r in enumerate(room_rows):
+        for j, c in enumerate(room_cols):
+            if i + 1 < len(room_rows): cells[(r + 1) * cols + c] = EMPTY
+            if j + 1 < len(room_cols): cells[r * cols + c + 1] = EMPTY
+
+    # Chambers as inclusive ranges of lattice indexes
+    stack = [(0, len(room_rows) - 1, 0, len(room_cols) - 1)]
+    while stack:
+        r0, r1, c0, c1 = stack.pop()
+        height, width = r1 - r0 + 1, c1 - c0 + 1
+        if height < 2 or width < 2:
+            continue
+
+        if height > width or (height == width and rng.random() < 0.5):
+            # Horizontal wall below lattice row k, gap at column g
+            k = rng.randint(r0, r1 - 1)
+            g = rng.randint(c0, c1)
+            wall_row = room_rows[k] + 1
+            for j in range(c0, c1 + 1):
+                if j != g:
+                    cells[wall_row * cols + room_cols[j]] = WALL
+            stack.append((r0, k, c0, c1))
+            stack.append((k + 1, r1, c0, c1))
+        else:
+            # Vertical wall right of lattice column k, gap at row g
+            k = rng.randint(c0, c1 - 1)
+            g = rng.randint(r0, r1)
+            wall_col = room_cols[k] + 1
+            for i in range(r0, r1 + 1):
+                if i != g:
+                    cells[room_rows[i] * cols + wall_col] = WALL
+            stack.append((r0, r1, c0, k))
+            stack.append((r0, r1, k + 1, c1))
+
+    return cells
+
+CARVERS = {
+    "prim": carve_prim,
+    "kruskal": carve_kruskal,
+    "wilson": carve_wilson,
+    "division": carve_division
+}
+
+# Carvers whose rooms sit on the start-parity lattice (see snap_to_lattice)
+LATTICE_CARVERS = {"kruskal", "wilson", "division"}
+
+def snap_to_lattice(end_pos: Tuple[int, int], start_pos: Tuple[int, int], rows: int, cols: int) -> Tuple[int, int]:
+    # Slide a boundary end cell by at most one along its edge so that it is a
+    # room, or touches exactly one room; either way opening it adds no cycle
+    r, c = end_pos
+    if r in (0, rows - 1):
+        if (c - start_pos[1]) % 2:
+            c = c + 1 if c + 1 < cols else c - 1
+    elif (r - start_pos[0]) % 2:
+        r = r + 1 if r + 1 < rows else r - 1
+    return (r, c)
+
+def carve_walk(grid, start_pos: Tuple[int, int], end_pos: Tuple[int, int], rng: random.Random):
+    # Cheat: Carve a random walk from Start to End.
+    # "Drunkard's Walk" guided towards End. grid: (rows, cols) array, edited in place
+    rows, cols = grid.shape
+    curr = start_pos
+    tr, tc = end_pos
+    while curr != end_pos:
+        grid[curr] = EMPTY
+        r, c = curr
+        
+        opts = []
+        for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
+            nr, nc = r+dr, c+dc
+            if 0 <= nr < rows and 0 <= nc < cols:
+                opts.append((nr, nc))
+        
+        # Sort opts by distance to end
+        opts.sort(key=lambda p: abs(p[0]-tr) + abs(p[1]-tc))
+        
+        # Pick best with high prob, or random
+        if rng.random() < 0.7:
+            curr = opts[0]
+        else:
+            curr = rng.choice(opts)
+
+# Connectivity constraints. Both work on a NeighborIndex of the open cells
+# and touch every cell at most a constant number of times.
+
+def is_connected(index: NeighborIndex, source: int, target: int) -> bool:
+    masks, moves = index.masks, index.moves
+    seen = bytearray(index.size)
+    seen[source] = 1
+    queue = deque([source])
+    while queue:
+        u = queue.popleft()
+        if u == target:
+            return True
+        for d in moves[masks[u]]:
+            v = u + d
+            if not seen[v]:
+                seen[v] = 1
+                queue.append(v)
+    return False
+
+def min_vertex_cut(index: NeighborIndex, source: int, target: int) -> Optional[List[int]]:
+    # Fewest open cells whose walling disconnects source from target, or None
+    # if the two are adjacent (no cut exists).
+    # Max-flow with unit vertex capacities (each cell split into in/out
+    # halves): by Menger's theorem the cut size equals the number of
+    # vertex-disjoint paths, which is at most 4 on a grid, so this is at most
+    # five BFS passes. The cut is the saturated cells on the boundary of what
+    # the last BFS could still reach.
+    masks, moves = index.masks, index.moves
+    if target - source in moves[masks[source]]:
+        return None
+
+    used = bytearray(index.size) # flow through the cell (in -> out)
+    flow = {} # (u, v) -> paths stepping from cell u into neighbor v
+    IN, OUT = 0, 1
+
+    while True:
+        prev = {(source, OUT): None}
+        queue = deque([(source, OUT)])
+        reached = False
+        while queue:
+            state = queue.popleft()
+            u, side = state
+            if side == OUT:
+                nexts = [(u + d, IN) for d in moves[masks[u]]]
+                if used[u] and u != source:
+                    nexts.append((u, IN)) # undo flow through u
+            else:
+                if u == target:
+                    reached = True
+                    break
+                nexts = [(u + d, OUT) for d in moves[masks[u]] if flow.get((u + d, u))] # undo a step into u
+                if not used[u]:
+                    nexts.append((u, OUT))
+            for nxt in nexts:
+                if nxt not in prev:
+                    prev[nxt] = state
+                    queue.append(nxt)
+
+        if not reached:
+            return [u for u, side in prev if side == IN and (u, OUT) not in prev]
+
+        # Augment along the path back to the source
+        state = (target, IN)
+        while prev[state] is not None:
+            (a, a_side), (b, _) = prev[state], state
+            if a == b:
+                used[a] = 1 if a_side == IN else 0
+            elif a_side == OUT:
+                flow[(a, b)] = flow.get((a, b), 0) + 1
+            else:
+                flow[(b, a)] -= 1
+            state = prev[state]
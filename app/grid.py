@@ -0,0 +1,62 @@
+import hashlib
+import struct
+import numpy as np
+from typing import List, Tuple
+from .models import MazeState, MAX_INLINE_SIDE
+
+# Binary maze wire format (little-endian):
+#   magic "MZ01" | width | height | start_r | start_c | end_r | end_c  (uint16 each)
+# followed by width*height uint8 cells in row-major order.
+MAZE_MAGIC = b"MZ01"
+MAZE_HEADER = struct.Struct("<4s6H")
+MAZE_MEDIA_TYPE = "application/octet-stream"
+
+def is_large(width: int, height: int) -> bool:
+    return width > MAX_INLINE_SIDE or height > MAX_INLINE_SIDE
+
+def maze_from_array(arr: np.ndarray, start_pos: Tuple[int, int], end_pos: Tuple[int, int]) -> MazeState:
+    # Trusted constructor: skips per-cell validation of the nested grid.
+    # Large mazes get no nested grid at all (they are never sent as JSON).
+    arr = np.ascontiguousarray(arr, dtype=np.uint8)
+    rows, cols = arr.shape
+    state = MazeState.model_construct(
+        width=cols, height=rows, grid=[] if is_large(cols, rows) else arr.tolist(),
+        start_pos=(int(start_pos[0]), int(start_pos[1])),
+        end_pos=(int(end_pos[0]), int(end_pos[1]))
+    )
+    state.__dict__["cells"] = arr.tobytes() # prefill MazeState.cells
+    return state
+
+def maze_from_grid(grid: List[List[int]], start_pos: Tuple[int, int], end_pos: Tuple[int, int]) -> MazeState:
+    # Trusted constructor for grids we built ourselves (e.g. the generator)
+    return MazeState.model_construct(width=len(grid[0]), height=len(grid), grid=grid, start_pos=start_pos, end_pos=end_pos)
+
+def grid_array(state: MazeState) -> np.ndarray:
+    # Read-only (height, width) uint8 view over state.cells, no copy
+    return np.frombuffer(state.cells, dtype=np.uint8).reshape(state.height, state.width)
+
+def encode_maze(state: MazeState) -> bytes:
+    header = MAZE_HEADER.pack(MAZE_MAGIC, state.width, state.height, *state.start_pos, *state.end_pos)
+    return header + state.cells
+
+def decode_maze(data: bytes) -> MazeState:
+    if len(data) < MAZE_HEADER.size:
+        raise ValueError("Maze payload too short")
+    magic, width, height, sr, sc, er, ec = MAZE_HEADER.unpack_from(data)
+    if magic != MAZE_MAGIC:
+        raise ValueError("Not a binary maze payload")
+    if width == 0 or height == 0 or len(data) != MAZE_HEADER.size + width * height:
+        raise ValueError("Maze payload size does not match its header")
+    for r, c in ((sr, sc), (er, ec)):
+        if r >= height or c >= width:
+            raise ValueError("Start/end position out of bounds")
+    
+    arr = np.frombuffer(data, dtype=np.uint8, offset=MAZE_HEADER.size).reshape(height, width)
+    return maze_from_array(arr, (sr, sc), (er, ec))
+
+def maze_hash(state: MazeState) -> str:
+    # Identity of a maze as the solvers see it: walls, start and end.
+    # Display-only cell values (exploring/dead/path marks) don't change it.
+    header = MAZE_HEADER.pack(MAZE_MAGIC, state.width, state.height, *state.start_pos, *state.end_pos)
+    walls = np.packbits(grid_array(state) == 1)
+    return hashlib.sha256(header + walls.tobytes()).hexdigest()
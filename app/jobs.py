@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from .models import BatchConfig, BatchJob
+from .batch import iter_batch, new_totals, merge_totals, summarize
+from .storage import STATE_BACKEND, Database, get_database
+
+# Batch jobs running at once; each one fans its shards out to the batch process pool
+MAX_RUNNING_JOBS = int(os.environ.get("MAZE_MAX_JOBS", 2))
+# Queued + running jobs accepted before new submissions are refused
+MAX_PENDING_JOBS = int(os.environ.get("MAZE_MAX_PENDING_JOBS", 16))
+# Finished jobs kept around for polling before the oldest are dropped
+MAX_FINISHED_JOBS = 100
+# Upper bound on mazes per shard, so partial results arrive regularly
+PROGRESS_SHARD_SIZE = 10
+
+FINISHED = ("done", "cancelled", "failed")
+
+class JobStore(ABC):
+    # Where job state lives. Subclass and pass to JobManager to persist jobs
+    # (e.g. in a database); the default keeps them in process memory.
+    @abstractmethod
+    def save(self, job: BatchJob):
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        ...
+
+    # Cancellation of a job running in another process: request_cancel marks
+    # it, and its runner polls cancel_requested. Only shared stores need these.
+    def request_cancel(self, job_id: str):
+        pass
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return False
+
+class MemoryJobStore(JobStore):
+    def __init__(self, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[str, BatchJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, job: BatchJob):
+        with self._lock:
+            self._jobs[job.id] = job.model_copy()
+            self._jobs.move_to_end(job.id)
+            finished = [j.id for j in self._jobs.values() if j.status in FINISHED]
+            for job_id in finished[:max(len(finished) - self.max_finished, 0)]:
+                del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.model_copy() if job else None
+
+class SqliteJobStore(JobStore):
+    # Jobs in the shared database, so any worker process can answer a poll or
+    # a cancel for a job another one is running
+    def __init__(self, db: Database, max_finished: int = MAX_FINISHED_JOBS):
+        self.db = db
+        self.max_finished = max_finished
+        db.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, job TEXT NOT NULL, finished INTEGER NOT NULL, "
+                   "updated REAL NOT NULL, cancel INTEGER NOT NULL DEFAULT 0)")
+
+    def save(self, job: BatchJob):
+        finished = job.status in FINISHED
+        self.db.execute("INSERT INTO jobs (id, job, finished, updated) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (id) DO UPDATE SET job = excluded.job, finished = excluded.finished, updated = excluded.updated",
+                        (job.id, job.model_dump_json(), finished, time.time()))
+        if finished:
+            self.db.execute("DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE finished ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+                            (self.max_finished,))
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        row = self.db.execute("SELECT job FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return BatchJob.model_validate_json(row[0]) if row else None
+
+    def request_cancel(self, job_id: str):
+        self.db.execute("UPDATE jobs SET cancel = 1 WHERE id = ? AND NOT finished", (job_id,))
+
+    def cancel_requested(self, job_id: str) -> bool:
+        row = self.db.execute("SELECT cancel FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+class JobQueueFull(Exception):
+    pass
+
+class JobManager:
+    def __init__(self, store: Optional[JobStore] = None, max_running: int = MAX_RUNNING_JOBS, max_pending: int = MAX_PENDING_JOBS):
+        self.store = store or MemoryJobStore()
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix="batch-job")
+        self._cancel: Dict[str, threading.Event] = {} # live (queued/running) jobs only
+        self._lock = threading.Lock()
+
+    def submit(self, config: BatchConfig) -> BatchJob:
+        with self._lock:
+            if len(self._cancel) >= self.max_pending:
+                raise JobQueueFull()
+            job = BatchJob(id=uuid.uuid4().hex, total_mazes=config.num_mazes)
+            self._cancel[job.id] = threading.Event()
+        self.store.save(job)
+        queued = job.model_copy() # the runner mutates `job` from its own thread
+        self._executor.submit(self._run, job, config)
+        return queued
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[BatchJob]:
+        with self._lock:
+            event = self._cancel.get(job_id)
+        if event is not None:
+            event.set()
+        else:
+            self.store.request_cancel(job_id) # maybe running in another process
+        return self.store.get(job_id)
+
+    def _run(self, job: BatchJob, config: BatchConfig):
+        event = self._cancel[job.id]
+        cancelled = lambda: event.is_set() or self.store.cancel_requested(job.id)
+        try:
+            if cancelled():
+                job.status = "cancelled"
+                return
+
+            job.status = "running"
+            self.store.save(job)
+
+            totals = new_totals(config.algorithms)
+            shards = iter_batch(config, max_shard_size=PROGRESS_SHARD_SIZE)
+            try:
+                for shard_totals, done in shards:
+                    merge_totals(totals, shard_totals)
+                    job.completed_mazes += done
+                    job.results = summarize(totals)
+                    if cancelled() and job.completed_mazes < job.total_mazes:
+                        job.status = "cancelled"
+                        return
+                    self.store.save(job)
+            finally:
+                shards.close() # drops shards that have not started
+
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            self.store.save(job)
+            with self._lock:
+                self._cancel.pop(job.id, None)
+
+job_manager = JobManager(SqliteJobStore(get_database()) if STATE_BACKEND == "sqlite" else None)
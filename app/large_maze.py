@@ -0,0 +1,287 @@
+import glob
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError: # Windows, where open files can't be removed anyway
+    fcntl = None
+
+import numpy as np
+
+from .models import MazeConfig, MazeState
+from .grid import MAZE_HEADER, MAZE_MAGIC, encode_maze, decode_maze
+from .generation import CARVERS, LATTICE_CARVERS, WALL, EMPTY, snap_to_lattice, is_connected, carve_walk
+from .algorithms.utils import NeighborIndex
+from .cache import LRUCache
+from .execution import GENERATE_TIME_BUDGET
+
+# Large-maze mode: mazes over MAX_INLINE_SIDE a side (see models.py) never
+# exist as nested lists or JSON. Each one is a file in the binary wire format
+# (app/grid.py) under LARGE_MAZE_DIR, named by maze id, and is used
+# memory-mapped: MazeState.cells is a read-only view of the file, so a maze
+# costs one byte per cell of page cache, shared by every process that opens
+# it. Worker processes get its path instead of its cells.
+#
+# Generation writes the file a tile at a time and holds one tile in memory:
+# - perfect mazes: every LARGE_TILE x LARGE_TILE tile is carved on its own
+#   (rooms on even coordinates, a wall line along the tile's far edges), then
+#   a random spanning tree over the tiles opens one separator cell between
+#   each pair of joined tiles, so the whole maze is still a spanning tree.
+#   The carvers work on the room lattice; "prim" (which doesn't) tiles with
+#   "kruskal".
+# - random noise: drawn a band of LARGE_TILE rows at a time.
+# "no_path" walls in the end cell instead of the minimum vertex cut of small
+# mazes, whose bookkeeping grows with the grid.
+
+LARGE_MAZE_DIR = os.environ.get("MAZE_LARGE_DIR", os.path.join(tempfile.gettempdir(), "maze-solver-large"))
+# Maze files kept on disk, the least recently used removed first; a removed
+# maze is regenerated from its config like an evicted small one
+LARGE_MAZE_FILES = int(os.environ.get("MAZE_LARGE_FILES", 16))
+# Files used this many seconds ago or less are never removed: a path sent to
+# a worker process (maze_payload) must still be there when it opens it
+LARGE_MAZE_GRACE = float(os.environ.get("MAZE_LARGE_GRACE", 300))
+# Tile side (even, so every tile's rooms sit on the global even lattice)
+LARGE_TILE = 256
+
+# Opened mazes by path, so repeat solves reuse their neighbor index and the
+# other per-maze caches
+open_mazes = LRUCache(int(os.environ.get("MAZE_LARGE_OPEN", 4)))
+
+MAZE_ID = re.compile(r"[0-9a-f]{16}")
+
+def maze_path(maze_id: str) -> str:
+    return os.path.join(LARGE_MAZE_DIR, f"{maze_id}.maze")
+
+class GenerationTimeout(Exception):
+    pass
+
+@contextmanager
+def files_lock(exclusive: bool = False):
+    # Lock on LARGE_MAZE_DIR across processes and threads: shared while a
+    # maze file is put in place, opened or marked used, exclusive while
+    # pruning, so a file is never removed between those steps
+    os.makedirs(LARGE_MAZE_DIR, exist_ok=True)
+    with open(os.path.join(LARGE_MAZE_DIR, ".lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) # released on close
+        yield
+
+def _read_maze(path: str, maze_id: Optional[str]) -> MazeState:
+    with open(path, "rb") as f:
+        magic, width, height, sr, sc, er, ec = MAZE_HEADER.unpack(f.read(MAZE_HEADER.size))
+    if magic != MAZE_MAGIC:
+        raise ValueError(f"{path} is not a maze file")
+    cells = np.memmap(path, dtype=np.uint8, mode="r", offset=MAZE_HEADER.size, shape=(width * height,))
+    maze = MazeState.model_construct(width=width, height=height, grid=[], start_pos=(sr, sc), end_pos=(er, ec), maze_id=maze_id)
+    maze.__dict__["cells"] = memoryview(cells)
+    return maze
+
+def _map_maze(path: str, maze_id: Optional[str]) -> MazeState:
+    # open_maze's cache miss; call with files_lock held
+    maze = _read_maze(path, maze_id)
+    os.utime(path) # mtime is the last use (see prune_files)
+    maze.__dict__["file_path"] = path
+    open_mazes.put(path, maze)
+    return maze
+
+def open_maze(path: str, maze_id: Optional[str] = None) -> MazeState:
+    # Memory-mapped, read-only MazeState of a maze file (cached in open_mazes)
+    maze = open_mazes.get(path)
+    if maze is None:
+        with files_lock():
+            maze = _map_maze(path, maze_id)
+    return maze
+
+def get_large_maze(maze_id: str) -> Optional[MazeState]:
+    # Ids come from requests: only ones shaped like maze_id_for's name a file
+    if not MAZE_ID.fullmatch(maze_id):
+        return None
+    try:
+        return open_maze(maze_path(maze_id), maze_id)
+    except FileNotFoundError:
+        return None
+
+def maze_payload(maze: MazeState) -> Union[bytes, str]:
+    # How a maze is sent to a worker process: the path of a maze file, or
+    # the maze itself in the binary wire format
+    path = maze.__dict__.get("file_path")
+    if path is not None:
+        with files_lock():
+            try:
+                os.utime(path) # just used: safe from pruning for LARGE_MAZE_GRACE
+                return path
+            except FileNotFoundError:
+                pass # pruned while open here: send the cells instead
+    return encode_maze(maze)
+
+def load_payload(payload: Union[bytes, str]) -> MazeState:
+    return open_maze(payload) if isinstance(payload, str) else decode_maze(payload)
+
+def generate_large_maze(config: MazeConfig, maze_id: str) -> MazeState:
+    # Writes the maze file of a seeded config (unless another process already
+    # has) and opens it. Raises GenerationTimeout past GENERATE_TIME_BUDGET.
+    path = maze_path(maze_id)
+    try:
+        return open_maze(path, maze_id)
+    except FileNotFoundError:
+        pass
+    os.makedirs(LARGE_MAZE_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        write_large_maze(config, tmp, GENERATE_TIME_BUDGET) # not locked: pruning skips .tmp files
+        with files_lock():
+            os.replace(tmp, path) # atomic, so readers never see a partial file
+            maze = _map_maze(path, maze_id)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    prune_files()
+    return maze
+
+@contextmanager
+def scratch_large_maze(config: MazeConfig, maze_id: str) -> Iterator[MazeState]:
+    # A large maze used once and thrown away (batch runs): its file is not
+    # one of the shared maze files and is removed on exit, so a run never
+    # holds more than one per shard on disk
+    os.makedirs(LARGE_MAZE_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=".tmp", dir=LARGE_MAZE_DIR) # pruning skips .tmp files
+    os.close(fd)
+    try:
+        write_large_maze(config, path)
+        yield _read_maze(path, maze_id)
+    finally:
+        os.remove(path) # mapped cells stay readable until the maze is dropped
+
+def prune_files():
+    # Removes the least recently used maze files over LARGE_MAZE_FILES,
+    # except ones used within LARGE_MAZE_GRACE. Mapped files stay readable
+    # after removal, so open mazes are unaffected (where open files can't be
+    # removed, they are skipped).
+    with files_lock(exclusive=True):
+        files = []
+        for path in glob.glob(os.path.join(LARGE_MAZE_DIR, "*.maze")):
+            try:
+                files.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                pass
+        files.sort()
+        recent = time.time() - LARGE_MAZE_GRACE
+        for mtime, path in files[:max(len(files) - LARGE_MAZE_FILES, 0)]:
+            if mtime > recent:
+                break
+            try:
+                os.remove(path)
+            except (FileNotFoundError, PermissionError):
+                pass
+
+def _endpoints(rows: int, cols: int, perfect: bool, rng: random.Random) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    # Start inside on a room (even coordinates), end on the boundary, as in generate_maze
+    start = (2 * rng.randint(1, (rows - 2) // 2), 2 * rng.randint(1, (cols - 2) // 2))
+    side = rng.randint(0, 3)
+    if side == 0:
+        end = (0, rng.randint(0, cols - 1))
+    elif side == 1:
+        end = (rows - 1, rng.randint(0, cols - 1))
+    elif side == 2:
+        end = (rng.randint(0, rows - 1), 0)
+    else:
+        end = (rng.randint(0, rows - 1), cols - 1)
+    if perfect:
+        end = snap_to_lattice(end, start, rows, cols)
+    return start, end
+
+def _carve_tiles(out: np.ndarray, generator: str, rng: random.Random, check: Callable[[], None]):
+    carve = CARVERS[generator if generator in LATTICE_CARVERS else "kruskal"]
+    rows, cols = out.shape
+    t = LARGE_TILE
+    tile_rows, tile_cols = -(-rows // t), -(-cols // t)
+
+    for r0 in range(0, rows, t):
+        for c0 in range(0, cols, t):
+            check()
+            bh, bw = min(t, rows - r0), min(t, cols - c0)
+            h, w = min(t - 1, bh), min(t - 1, bw)
+            block = np.full((bh, bw), WALL, dtype=np.uint8)
+            block[:h, :w] = np.frombuffer(carve(h, w, (0, 0), rng), dtype=np.uint8).reshape(h, w)
+            out[r0:r0 + bh, c0:c0 + bw] = block
+
+    # Join tiles along a random spanning tree (Kruskal over the tile grid).
+    # A separator cell on an even row/column lies between two rooms.
+    edges = [(i, j, 0) for i in range(tile_rows) for j in range(tile_cols - 1)]
+    edges += [(i, j, 1) for i in range(tile_rows - 1) for j in range(tile_cols)]
+    rng.shuffle(edges)
+    parent = list(range(tile_rows * tile_cols))
+
+    def find(u):
+        while parent[u] != u:
+            parent[u] = parent[parent[u]]
+            u = parent[u]
+        return u
+
+    for i, j, down in edges:
+        a, b = i * tile_cols + j, (i + down) * tile_cols + j + (1 - down)
+        ra, rb = find(a), find(b)
+        if ra == rb:
+            continue
+        parent[ra] = rb
+        if down:
+            span = min(t - 1, cols - j * t)
+            out[i * t + t - 1, j * t + 2 * rng.randrange((span + 1) // 2)] = EMPTY
+        else:
+            span = min(t - 1, rows - i * t)
+            out[i * t + 2 * rng.randrange((span + 1) // 2), j * t + t - 1] = EMPTY
+
+def _draw_noise(out: np.ndarray, wall_density: float, rng: random.Random, check: Callable[[], None]):
+    noise = np.random.default_rng(rng.getrandbits(64))
+    for r0 in range(0, out.shape[0], LARGE_TILE):
+        check()
+        band = noise.random((min(LARGE_TILE, out.shape[0] - r0), out.shape[1]))
+        out[r0:r0 + len(band)] = np.where(band > wall_density, EMPTY, WALL)
+
+def write_large_maze(config: MazeConfig, path: str, budget: Optional[float] = None):
+    # budget: seconds before raising GenerationTimeout, checked between
+    # tiles (None = no limit)
+    deadline = time.perf_counter() + budget if budget is not None else None
+
+    def check():
+        if deadline is not None and time.perf_counter() > deadline:
+            raise GenerationTimeout(f"Generation exceeded its {budget:g}s time budget")
+
+    rng = random.Random(config.seed)
+    rows, cols = config.height, config.width
+    perfect = config.unique_path or not config.allow_cycles
+    start, end = _endpoints(rows, cols, perfect, rng)
+
+    out = np.memmap(path, dtype=np.uint8, mode="w+", offset=MAZE_HEADER.size, shape=(rows, cols))
+    if perfect:
+        _carve_tiles(out, config.generator, rng, check)
+    else:
+        _draw_noise(out, config.wall_density, rng, check)
+        out[start] = EMPTY
+    out[end] = EMPTY # for perfect mazes a leaf next to the tree, as in generate_maze
+
+    if config.no_path:
+        er, ec = end
+        for r, c in ((er - 1, ec), (er + 1, ec), (er, ec - 1), (er, ec + 1)):
+            if 0 <= r < rows and 0 <= c < cols and (r, c) != start:
+                out[r, c] = WALL
+    elif config.guaranteed_path and not perfect:
+        # Tiled perfect mazes are connected by construction
+        check()
+        index = NeighborIndex(out != WALL)
+        if not is_connected(index, index.node(start), index.node(end)):
+            carve_walk(out, start, end, rng)
+
+    out[start] = 10
+    out[end] = 11
+    out.flush()
+    del out
+    with open(path, "r+b") as f:
+        f.write(MAZE_HEADER.pack(MAZE_MAGIC, cols, rows, *start, *end))
@@ -1,17 +1,33 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Body, Query
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict
-from pydantic import BaseModel
-import time
+from fastapi.responses import StreamingResponse, Response, FileResponse, PlainTextResponse
+from typing import List
 from pathlib import Path
+import gzip
+import os
+import json
+import zlib
+from time import perf_counter
 
 BASE_DIR = Path(__file__).resolve().parent
 
 
-from .models import MazeConfig, MazeState, SolveRequest, StepUpdate
-from .maze_generator import generate_maze
-from .algorithms import ALGORITHMS
+from .models import MazeConfig, MazeState, MazeSource, SolveRequest, SolveManyRequest, AlgorithmSolve, SessionRequest, SessionEdits, SessionUpdate, DistanceQuery, DistanceResult, SearchOptions, Heuristic, StepUpdate, BatchConfig, BatchResult, BatchRow, BatchJob
+from .maze_generator import get_or_generate_maze, get_maze_by_id
+from .grid import MAZE_MEDIA_TYPE, encode_maze, decode_maze
+from .large_maze import GenerationTimeout
+from .algorithms import ALGORITHMS, solver_options
+from .batch import run_batch, iter_batch_rows, resolve_corpus
+from .jobs import job_manager, JobQueueFull
+from .solve_cache import iter_solve_lines, SolveTimeout
+from .solve_many import solve_many
+from .sessions import session_store
+from .distance_field import get_distance_field
+from .trace import TraceFormat, iter_compact_blocks
+from .cache import maze_cache, solve_cache
+from .metrics import MetricsMiddleware, instrumented, timed, add_phase, render_metrics, profile_path, PROFILING_ENABLED
+from .execution import AdmissionMiddleware
 
 app = FastAPI()
 
@@ -22,87 +38,269 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware) # outermost, so shed requests are counted too
 
 @app.post("/api/generate", response_model=MazeState)
-def generate_maze_endpoint(config: MazeConfig):
-    return generate_maze(config)
+@instrumented
+def generate_maze_endpoint(config: MazeConfig, request: Request):
+    try:
+        maze = get_or_generate_maze(config)
+    except GenerationTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    with timed("serialize"):
+        # Binary clients get raw cells instead of a nested JSON grid
+        if MAZE_MEDIA_TYPE in request.headers.get("accept", ""):
+            if "file_path" in maze.__dict__: # large maze: its file is the payload
+                return FileResponse(maze.__dict__["file_path"], media_type=MAZE_MEDIA_TYPE, headers={"X-Maze-Id": maze.maze_id})
+            return Response(encode_maze(maze), media_type=MAZE_MEDIA_TYPE, headers={"X-Maze-Id": maze.maze_id})
+        # We built the maze ourselves, so skip re-validating it as a response_model.
+        # Large mazes come without their (empty) grid: solve them by maze_id.
+        return Response(maze.model_dump_json(exclude={"grid"} if not maze.grid else None), media_type="application/json")
+
+def resolve_maze(request: MazeSource) -> MazeState:
+    if request.maze is not None:
+        return request.maze
+    try:
+        maze = get_maze_by_id(request.maze_id) # may regenerate an evicted maze
+    except GenerationTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    if maze is None:
+        raise HTTPException(status_code=404, detail="Maze not found")
+    return maze
+
+# Solve responses are gzipped for clients that accept it (traces compress
+# very well); tiny bodies are not worth it
+GZIP_MIN_BYTES = 1024
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "")
+
+def encoded_response(request: Request, body: str, media_type: str = "application/json") -> Response:
+    if accepts_gzip(request) and len(body) >= GZIP_MIN_BYTES:
+        with timed("serialize"):
+            data = gzip.compress(body.encode(), compresslevel=6)
+        return Response(data, media_type=media_type, headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return Response(body, media_type=media_type, headers={"Vary": "Accept-Encoding"})
+
+def gzip_chunks(chunks):
+    # Sync-flush after every chunk so the compressor never holds back steps
+    # the client could already be animating
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) # wbits 31: gzip container
+    for chunk in chunks:
+        start = perf_counter()
+        data = compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        add_phase("serialize", perf_counter() - start)
+        yield data
+    yield compressor.flush()
+
+def end_on_timeout(chunks):
+    # Headers are long gone when a streamed solve runs out of time, so it ends
+    # with an {"error": ...} line instead of an error status
+    try:
+        yield from chunks
+    except SolveTimeout as e:
+        yield json.dumps({"error": str(e)}) + "\n"
+
+def solve_response(request: Request, maze: MazeState, algorithm: str, options: SearchOptions, format: TraceFormat, stream: bool) -> Response:
+    # Trace of one solve as a JSON array of StepUpdates or compact blocks
+    # (app/trace.py), whole or streamed as NDJSON
+    lines = iter_solve_lines(maze, algorithm, solver_options(algorithm, options), pooled=not stream)
+    if stream:
+        if format == "compact":
+            chunks = iter_ndjson(iter_compact_blocks(lines, maze.width, STREAM_CHUNK_SIZE), chunk_size=1)
+        else:
+            chunks = iter_ndjson(lines)
+        chunks = end_on_timeout(chunks)
+        if accepts_gzip(request):
+            return StreamingResponse(gzip_chunks(chunks), media_type="application/x-ndjson",
+                                     headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+        return StreamingResponse(chunks, media_type="application/x-ndjson", headers={"Vary": "Accept-Encoding"})
+
+    try:
+        if format == "compact":
+            body = next(iter_compact_blocks(lines, maze.width))
+        else:
+            # StepUpdate JSON lines -> one JSON array, without re-validating each step
+            body = "[" + ",".join(lines) + "]"
+    except SolveTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    return encoded_response(request, body)
 
 @app.post("/api/solve", response_model=List[StepUpdate])
-def solve_maze_endpoint(request: SolveRequest):
+@instrumented
+def solve_maze_endpoint(request: SolveRequest, http_request: Request, format: TraceFormat = "steps"):
+    if request.algorithm not in ALGORITHMS:
+        raise HTTPException(status_code=400, detail="Algorithm not found")
+    
+    # Run the solver to completion (or replay a cached trace) and return all steps
+    return solve_response(http_request, resolve_maze(request), request.algorithm, request.options, format, stream=False)
+
+# Steps per NDJSON write; small enough for a fast first frame, large enough
+# that the per-chunk threadpool hop stays cheap.
+STREAM_CHUNK_SIZE = 64
+
+def iter_ndjson(lines, chunk_size=STREAM_CHUNK_SIZE):
+    # Group JSON lines into NDJSON chunks
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            yield "\n".join(buffer) + "\n"
+            buffer = []
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+@app.post("/api/solve/binary", response_model=List[StepUpdate])
+@instrumented
+def solve_maze_binary_endpoint(http_request: Request, algorithm: str, stream: bool = False, format: TraceFormat = "steps",
+                               heuristic: Heuristic = "manhattan", weight: float = Query(1.0, ge=1.0, le=10.0),
+                               data: bytes = Body(..., media_type=MAZE_MEDIA_TYPE)):
+    # Same as /api/solve(/stream), but the maze is sent in the binary wire format (app/grid.py)
+    # and the SearchOptions as query parameters
+    if algorithm not in ALGORITHMS:
+        raise HTTPException(status_code=400, detail="Algorithm not found")
+    try:
+        maze = decode_maze(data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return solve_response(http_request, maze, algorithm, SearchOptions(heuristic=heuristic, weight=weight), format, stream)
+
+@app.post("/api/solve/stream")
+@instrumented
+def solve_maze_stream_endpoint(request: SolveRequest, http_request: Request, format: TraceFormat = "steps"):
     if request.algorithm not in ALGORITHMS:
         raise HTTPException(status_code=400, detail="Algorithm not found")
     
-    solver = ALGORITHMS[request.algorithm]
-    # Run the generator to completion and return all steps
-    steps = list(solver(request.maze))
-    return steps
-
-class BatchConfig(BaseModel):
-    maze_config: MazeConfig
-    num_mazes: int
-    algorithms: List[str]
-
-class BatchResult(BaseModel):
-    algorithm: str
-    success_rate: float
-    avg_time_ms: float
-    avg_nodes: float
-    avg_path_length: float
-    avg_steps: float
-    avg_frontier: float
+    # The solver is only advanced as the client reads (in this thread, never
+    # the solve pool), so memory stays flat and a slow client applies
+    # backpressure to the search itself.
+    return solve_response(http_request, resolve_maze(request), request.algorithm, request.options, format, stream=True)
+
+@app.post("/api/solve_many", response_model=List[AlgorithmSolve])
+@instrumented
+def solve_many_endpoint(request: SolveManyRequest, http_request: Request, format: TraceFormat = "steps"):
+    # Every algorithm on one maze in one round trip (see app/solve_many.py).
+    # The solves share one time budget; any that run over it or are skipped
+    # once it is spent get an error entry, and the others are kept.
+    unknown = [algorithm for algorithm in request.algorithms if algorithm not in ALGORITHMS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Algorithm not found: {', '.join(unknown)}")
+    maze = resolve_maze(request)
+
+    entries = []
+    for result, lines in solve_many(maze, request.algorithms, request.options, request.traces):
+        # Traces are spliced in as JSON text, without re-validating each step
+        if lines is None:
+            trace = "null"
+        elif format == "compact":
+            trace = next(iter_compact_blocks(lines, maze.width))
+        else:
+            trace = "[" + ",".join(lines) + "]"
+        entries.append(result.model_dump_json(exclude={"trace"})[:-1] + ',"trace":' + trace + "}")
+    return encoded_response(http_request, "[" + ",".join(entries) + "]")
+
+# Incremental solving sessions: create one from a maze, then send edited
+# cells and get back only what changed (see app/sessions.py)
+@app.post("/api/sessions", response_model=SessionUpdate)
+@instrumented
+def create_session(request: SessionRequest):
+    return session_store.create(resolve_maze(request), request.algorithm)
+
+@app.post("/api/sessions/{session_id}/edits", response_model=SessionUpdate)
+@instrumented
+def edit_session(session_id: str, edits: SessionEdits):
+    try:
+        update = session_store.edit(session_id, edits.cells)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if update is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return update
+
+def resolve_batch(config: BatchConfig) -> BatchConfig:
+    try:
+        return resolve_corpus(config)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Corpus not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Many starts against one target: path length, first move and path for
+# each, from a distance field built once per maze and target
+@app.post("/api/distances", response_model=DistanceResult)
+@instrumented
+def distances_endpoint(request: DistanceQuery, http_request: Request):
+    maze = resolve_maze(request)
+    target = request.target or maze.end_pos
+    for r, c in (target, *request.starts):
+        if not (0 <= r < maze.height and 0 <= c < maze.width):
+            raise HTTPException(status_code=400, detail=f"Cell ({r}, {c}) is outside the maze")
+    if maze.cells[target[0] * maze.width + target[1]] == 1:
+        raise HTTPException(status_code=400, detail="The target is a wall")
+
+    with timed("solve"):
+        field, cached = get_distance_field(maze, target)
+        answers = [field.answer(start, request.paths) for start in request.starts]
+    with timed("serialize"):
+        body = DistanceResult(target=target, cached=cached, answers=answers).model_dump_json()
+    return encoded_response(http_request, body)
 
 @app.post("/api/batch", response_model=List[BatchResult])
+@instrumented
 def batch_simulation(config: BatchConfig):
-    results = {algo: {"success": 0, "time": 0.0, "nodes": 0, "path_len": 0, "steps": 0, "frontier": 0, "count": 0} for algo in config.algorithms}
-    
-    for _ in range(config.num_mazes):
-        # Generate one maze for all algos to ensure fair comparison
-        maze = generate_maze(config.maze_config)
-        
-        for algo_name in config.algorithms:
-            if algo_name not in ALGORITHMS: continue
-            
-            solver = ALGORITHMS[algo_name]
-            start_time = time.perf_counter()
-            
-            # Run solver (non-generator mode would be faster but we reuse logic)
-            # We iterate to end
-            steps_list = list(solver(maze))
-            
-            end_time = time.perf_counter()
-            duration_ms = (end_time - start_time) * 1000
-            
-            if not steps_list: continue
-            last_step = steps_list[-1]
-            
-            res = results[algo_name]
-            res["count"] += 1
-            res["time"] += duration_ms
-            res["nodes"] += last_step.nodes_expanded
-            res["steps"] += last_step.steps_taken
-            res["frontier"] += last_step.max_frontier_size
-            
-            if last_step.success:
-                res["success"] += 1
-                res["path_len"] += last_step.path_length
-
-    # Aggregation
-    final_output = []
-    for algo, data in results.items():
-        count = data["count"]
-        if count == 0: continue
-        
-        final_output.append(BatchResult(
-            algorithm=algo,
-            success_rate=data["success"] / count,
-            avg_time_ms=data["time"] / count,
-            avg_nodes=data["nodes"] / count,
-            avg_path_length=data["path_len"] / data["success"] if data["success"] > 0 else 0,
-            avg_steps=data["steps"] / count,
-            avg_frontier=data["frontier"] / count
-        ))
-        
-    return final_output
+    return run_batch(resolve_batch(config))
+
+@app.post("/api/batch/rows", response_model=List[BatchRow])
+@instrumented
+def batch_rows(config: BatchConfig):
+    # Same run as /api/batch, streamed as one NDJSON BatchRow per solve as
+    # shards finish (so in completion order, not maze order)
+    shards = iter_batch_rows(resolve_batch(config))
+    chunks = ("".join(row.model_dump_json() + "\n" for row in rows) for _, rows in shards)
+    return StreamingResponse(chunks, media_type="application/x-ndjson")
+
+# Async batch jobs: submit, poll for partial results, cancel.
+# Jobs run on their own bounded pool, so they outlive the submitting request.
+@app.post("/api/jobs", response_model=BatchJob, status_code=202)
+@instrumented
+def submit_batch_job(config: BatchConfig):
+    try:
+        return job_manager.submit(resolve_batch(config))
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Too many batch jobs pending")
+
+@app.get("/api/jobs/{job_id}", response_model=BatchJob)
+def get_batch_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.delete("/api/jobs/{job_id}", response_model=BatchJob)
+def cancel_batch_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    return {"mazes": maze_cache.stats(), "solves": solve_cache.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/profiles/{name}")
+def download_profile(name: str):
+    # cProfile dumps of requests sent with "X-Profile: 1" (see app/metrics.py)
+    path = profile_path(name)
+    if not PROFILING_ENABLED or path is None or not Path(path).is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
 
 @app.get("/health")
 def health_check():
@@ -114,4 +312,7 @@ app.mount("/", StaticFiles(directory=str(STATIC_DIR), html=True), name="static")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    # Auto-reload for development unless several workers are asked for
+    # (WEB_CONCURRENCY, as in render.yaml), which uvicorn can't combine
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    uvicorn.run("app.main:app", host="0.0.0.0", port=int(os.environ.get("PORT", 8000)), reload=workers == 1, workers=workers)
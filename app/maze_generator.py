@@ -1,27 +1,97 @@
+import hashlib
 import random
-from collections import deque
+from typing import Optional
+import numpy as np
 from .models import MazeConfig, MazeState
+from .grid import maze_from_array, is_large
+from .algorithms.utils import NeighborIndex
+from .generation import CARVERS, LATTICE_CARVERS, snap_to_lattice, is_connected, min_vertex_cut, carve_walk
+from .cache import maze_cache, maze_config_cache
+from .large_maze import generate_large_maze, get_large_maze
+from .metrics import timed
 
-def generate_maze(config: MazeConfig) -> MazeState:
+# Bump whenever generate_maze changes what a given (config, seed) produces,
+# so maze ids never point at a different maze than they used to
+GENERATOR_VERSION = 3
+
+MASK64 = (1 << 64) - 1
+
+def derive_seed(base_seed: int, index: int) -> int:
+    # SplitMix64 step: maze `index` of a run seeded with `base_seed` always gets
+    # the same, well-spread seed, no matter which worker generates it
+    z = (base_seed + (index + 1) * 0x9E3779B97F4A7C15) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+def maze_id_for(config: MazeConfig) -> str:
+    # Content address of a seeded config: same config + seed, same id
+    payload = f"{GENERATOR_VERSION}:{config.model_dump_json()}"
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def seeded(config: MazeConfig, seed: Optional[int] = None) -> MazeConfig:
+    # Pin the config to a seed (a fresh random one if neither is given)
+    if seed is None:
+        seed = config.seed if config.seed is not None else random.getrandbits(63)
+    return config if config.seed == seed else config.model_copy(update={"seed": seed})
+
+def get_or_generate_maze(config: MazeConfig) -> MazeState:
+    # Generated mazes are cached by id; an unseeded config gets a random seed first.
+    # Large mazes are kept as files instead (see app/large_maze.py).
+    config = seeded(config)
+    maze_id = maze_id_for(config)
+    if is_large(config.width, config.height):
+        maze = get_large_maze(maze_id)
+        if maze is None:
+            with timed("generate"):
+                maze = generate_large_maze(config, maze_id)
+            maze_config_cache.put(maze_id, config)
+        return maze
+    maze = maze_cache.get(maze_id)
+    if maze is None:
+        with timed("generate"):
+            maze = generate_maze(config)
+        maze.maze_id = maze_id
+        maze_cache.put(maze_id, maze)
+        maze_config_cache.put(maze_id, config)
+    return maze
+
+def get_maze_by_id(maze_id: str) -> Optional[MazeState]:
+    maze = maze_cache.get(maze_id) or get_large_maze(maze_id)
+    if maze is None:
+        # Evicted, but still known: regenerate it deterministically
+        config = maze_config_cache.get(maze_id)
+        if config is not None:
+            maze = get_or_generate_maze(config)
+    return maze
+
+def generate_maze(config: MazeConfig, rng: Optional[random.Random] = None) -> MazeState:
+    # rng: random source; defaults to one seeded from config.seed (random if unset)
+    if rng is None:
+        rng = random.Random(config.seed)
+    
     # 1. Determine Start/End
     # Start: Must be inside (not on boundary)
     rows, cols = config.height, config.width
     
-    start_r = random.randint(1, rows - 2)
-    start_c = random.randint(1, cols - 2)
+    start_r = rng.randint(1, rows - 2)
+    start_c = rng.randint(1, cols - 2)
     start_pos = (start_r, start_c)
     
     # End: Must be on boundary
     # 0=Top, 1=Bottom, 2=Left, 3=Right
-    side = random.randint(0, 3) 
+    side = rng.randint(0, 3) 
     if side == 0:   # Top
-        end_pos = (0, random.randint(0, cols - 1))
+        end_pos = (0, rng.randint(0, cols - 1))
     elif side == 1: # Bottom
-        end_pos = (rows - 1, random.randint(0, cols - 1))
+        end_pos = (rows - 1, rng.randint(0, cols - 1))
     elif side == 2: # Left
-        end_pos = (random.randint(0, rows - 1), 0)
+        end_pos = (rng.randint(0, rows - 1), 0)
     else:           # Right
-        end_pos = (random.randint(0, rows - 1), cols - 1)
+        end_pos = (rng.randint(0, rows - 1), cols - 1)
+        
+    if (config.unique_path or not config.allow_cycles) and config.generator in LATTICE_CARVERS:
+        end_pos = snap_to_lattice(end_pos, start_pos, rows, cols)
         
     # Ensure start != end (Implicitly true as start is inside and end is boundary)
     # But just in case dimensions are tiny (e.g. 3x3), start is (1,1). End could be (0,1).
@@ -29,224 +99,45 @@ def generate_maze(config: MazeConfig) -> MazeState:
 
     # 2. Generate Grid
     # Strategy:
-    # - If unique_path or not allow_cycles => Recursive Backtracker (Perfect Maze)
+    # - If unique_path or not allow_cycles => Perfect Maze (config.generator, see app/generation.py)
     # - Else => Random Noise based on wall_density
     
-    rows, cols = config.height, config.width
-    grid = [[1 for _ in range(cols)] for _ in range(rows)] # Initialize with Walls (1)
-
     if config.unique_path or not config.allow_cycles:
-        # Recursive Backtracker
-        # Start at random point or start_pos
-        # We need odd coordinates for walls/paths to look nice in traditional maze gen, 
-        # but here we have arbitrary size. We'll simply carve.
-        # Actually pure backtracker works best on odd grids with (1,1) start.
-        # We will adapt: Treat grid as cells and walls. 
-        # Simplest: Randomized DFS carving.
-        
-        stack = [start_pos]
-        visited = set([start_pos])
-        grid[start_pos[0]][start_pos[1]] = 2
-        
-        # Directions: Up, Down, Left, Right
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        
-        # Simple R-DFS often creates low branching factor. 
-        # For "dead end density", we could vary the probability of popping or branching.
-        # But for now, standard shuffle.
-        
-        # NOTE: To create a "Perfect Maze" where walls are 1-thick, we usually step by 2.
-        # But our grid is dense. 
-        # If we step 1, we get open caverns if we visit neighbors.
-        # Let's use the "Step by 2" logic if possible, but map to our grid.
-        # Or simpler: Randomized Prim's or just Random Traversal on dense grid 
-        # ensuring we leave walls.
-        # Let's stick to: Carve from Start.
-        
-        # To strictly enforce "No Cycles" on a dense grid, we just never carve into an already visited cell (value 2).
-        # We only carve into 1s.
-        
-        # Wait, if we just carve into 1s, we might make a 2x2 block of open space?
-        # Yes. To avoid "thick paths" (which are effectively cycles on a pixel level), 
-        # we need to check diagonals or 2-step neighbors.
-        # Let's try "Carve to neighbor if neighbor has > 1 solid neighbor"? 
-        # That logic keeps walls thin.
-        
-        # Let's try a standard approach for dense arrays:
-        # "Grow path". 
-        
-        # Actually, if the user asks for "Wall Density 10%" and "No Cycles", that's impossible.
-        # A tree covering the grid implies a certain density.
-        # I will PRIORITIZE the "Structure" (Cycles/Unique) over "Density" slider in this mode.
-        
-        # Generating a Perfect Maze (Spanning Tree):
-        # We'll use a helper set to track visited "nodes".
-        # But since we don't have a rigid "cell vs wall" coordinate system enforced by the inputs (user can give 10x10),
-        # implementation of a perfect maze on even dimensions is tricky.
-        # We will attempt a "Randomized Prim's" generalized.
-        
-        walls = []
-        # Start cell
-        grid[start_pos[0]][start_pos[1]] = 2
-        
-        # Add neighbors to wall list
-        for dr, dc in directions:
-            nr, nc = start_pos[0] + dr, start_pos[1] + dc
-            if 0 <= nr < rows and 0 <= nc < cols:
-                walls.append((nr, nc, start_pos[0], start_pos[1]))
-                
-        while walls:
-            # Pick random wall
-            idx = random.randint(0, len(walls) - 1)
-            r, c, pr, pc = walls[idx] # current, parent
-            
-            # If current is wall (1)
-            if grid[r][c] == 1:
-                # Check if it has only one visited neighbor (the parent). 
-                # Actually, in Prim's on dense grid, we check if it connects to "Visited" and "Unvisited".
-                # But here 'r,c' is an unvisited cell. 
-                # We want to maintain thin walls.
-                # A safe heuristic for "Thin Walls (Tree)" on dense grid:
-                # Count 8-neighbors (including diagonals) that are OPEN (2).
-                # If count <= 1 (only the parent path we are coming from), then SAFE to open.
-                # Wait, diagonals? 
-                
-                open_neighbors = 0
-                for dr in [-1, 0, 1]:
-                    for dc in [-1, 0, 1]:
-                        if dr == 0 and dc == 0: continue
-                        nr, nc = r + dr, c + dc
-                        if 0 <= nr < rows and 0 <= nc < cols:
-                            if grid[nr][nc] == 2:
-                                open_neighbors += 1
-                                
-                # If we rely on stored parent, we know 1 is open.
-                # If open_neighbors <= 2 (Parent + maybe a diagonal touch?), it's safer.
-                # Strictly < 2 (only existing parent) prevents 2x2 blobs. 
-                # But this is too restrictive, might get stuck.
-                
-                # Let's use simple logic: Only open if 4-neighbors count == 1.
-                cardinal_open = 0
-                for dr, dc in directions:
-                    nr, nc = r + dr, c + dc
-                    if 0 <= nr < rows and 0 <= nc < cols:
-                        if grid[nr][nc] == 2:
-                            cardinal_open += 1
-                            
-                if cardinal_open == 1:
-                    grid[r][c] = 2
-                    walls.pop(idx)
-                    # Add new neighbors
-                    for dr, dc in directions:
-                        nr, nc = r + dr, c + dc
-                        if 0 <= nr < rows and 0 <= nc < cols:
-                            if grid[nr][nc] == 1:
-                                walls.append((nr, nc, r, c))
-                else:
-                    walls.pop(idx)
-            else:
-                walls.pop(idx)
+        # Perfect Maze (Spanning Tree), carved by the configured algorithm.
+        # Structure (Cycles/Unique) takes priority over the Density slider here:
+        # a tree covering the grid implies its own wall density.
+        cells = CARVERS[config.generator](rows, cols, start_pos, rng)
+        if config.generator in LATTICE_CARVERS:
+            # End was snapped next to the tree; opening it adds a leaf
+            cells[end_pos[0] * cols + end_pos[1]] = 2
+        grid = np.frombuffer(cells, dtype=np.uint8).reshape(rows, cols).copy()
                 
     else:
         # Random Noise Mode (Cycles allowed)
-        # Use wall_density directly
-        for r in range(rows):
-            for c in range(cols):
-                if random.random() > config.wall_density:
-                    grid[r][c] = 2 # Empty
-                else:
-                    grid[r][c] = 1 # Wall
+        # Use wall_density directly, drawn for the whole grid at once
+        noise = np.random.default_rng(rng.getrandbits(64)).random((rows, cols))
+        grid = np.where(noise > config.wall_density, 2, 1).astype(np.uint8) # 2 Empty, 1 Wall
                     
         # Ensure start/end are open
-        grid[start_pos[0]][start_pos[1]] = 2
-        grid[end_pos[0]][end_pos[1]] = 2
+        grid[start_pos] = 2
+        grid[end_pos] = 2
 
     # 3. Apply Constraints (Guaranteed Path, No Path)
-    
-    # Helper BFS
-    def get_path():
-        q = deque([start_pos])
-        seen = {start_pos}
-        parent = {start_pos: None}
-        
-        while q:
-            curr = q.popleft()
-            if curr == end_pos:
-                path = []
-                while curr:
-                    path.append(curr)
-                    curr = parent[curr]
-                return path[::-1]
-            
-            for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
-                nr, nc = curr[0]+dr, curr[1]+dc
-                if 0 <= nr < rows and 0 <= nc < cols:
-                    if grid[nr][nc] != 1 and (nr, nc) not in seen:
-                        seen.add((nr, nc))
-                        parent[(nr, nc)] = curr
-                        q.append((nr, nc))
-        return None
-
-    path = get_path()
+    index = NeighborIndex(grid != 1)
+    source, target = index.node(start_pos), index.node(end_pos)
     
     if config.no_path:
         # We need NO path.
-        if path:
-            # Block it.
-            # Simple approach: Block a random cell on the path (excluding start/end)
-            if len(path) > 2:
-                to_block = path[random.randint(1, len(path)-2)]
-                grid[to_block[0]][to_block[1]] = 1
-                # Check again. If still path, repeat?
-                # The path might bypass.
-                # Better: Flood fill from Start. Create boundary of walls?
-                # Simplest: Just re-run get_path loop max N times blocking things.
-                for _ in range(50): # attempts
-                    p2 = get_path()
-                    if not p2: break
-                    if len(p2) > 2:
-                        # Block middle
-                        mb = p2[len(p2)//2]
-                        grid[mb[0]][mb[1]] = 1
-                        
-        grid[start_pos[0]][start_pos[1]] = 10
-        grid[end_pos[0]][end_pos[1]] = 11
-        return MazeState(width=cols, height=rows, grid=grid, start_pos=start_pos, end_pos=end_pos)
+        # Wall off a minimum vertex cut between start and end in one go; it
+        # is empty when there is no path already, and None when start and
+        # end touch (nothing can be blocked then)
+        for u in min_vertex_cut(index, source, target) or ():
+            grid[divmod(u, cols)] = 1
 
-    if config.guaranteed_path:
+    elif config.guaranteed_path and not is_connected(index, source, target):
         # We MUST have a path.
-        if not path:
-            # Cheat: Carve a random walk or geometric path from Start to End.
-            # "Drunkard's Walk" guided towards End.
-            curr = start_pos
-            while curr != end_pos:
-                grid[curr[0]][curr[1]] = 2
-                # Choose direction that moves closer?
-                # Or just A* with ignoring walls?
-                # Let's do a simple "move closer" logic with randomness.
-                
-                r, c = curr
-                tr, tc = end_pos
-                
-                opts = []
-                for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
-                    nr, nc = r+dr, c+dc
-                    if 0 <= nr < rows and 0 <= nc < cols:
-                        opts.append((nr, nc))
-                
-                # Sort opts by distance to end
-                opts.sort(key=lambda p: abs(p[0]-tr) + abs(p[1]-tc))
-                
-                # Pick best with high prob, or random
-                if random.random() < 0.7:
-                    next_step = opts[0]
-                else:
-                    next_step = random.choice(opts)
-                
-                curr = next_step
-            
-            grid[end_pos[0]][end_pos[1]] = 2
-            
-    grid[start_pos[0]][start_pos[1]] = 10
-    grid[end_pos[0]][end_pos[1]] = 11
-    return MazeState(width=cols, height=rows, grid=grid, start_pos=start_pos, end_pos=end_pos)
+        carve_walk(grid, start_pos, end_pos, rng)
+
+    grid[start_pos] = 10
+    grid[end_pos] = 11
+    return maze_from_array(grid, start_pos, end_pos)
@@ -0,0 +1,221 @@
+import cProfile
+import functools
+import os
+import re
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from .cache import maze_cache, solve_cache
+
+# In-process metrics in the Prometheus text format, served at /metrics.
+# Values are per server process (with several uvicorn workers, scrape or sum
+# each one).
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _label_text(self, values, extra=()) -> str:
+        pairs = list(zip(self.labels, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        ...
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{self._label_text(labels)} {value:g}"
+
+class Histogram(Metric):
+    kind = "histogram"
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = buckets
+        self._values: Dict[tuple, list] = {} # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            data = self._values.get(labels)
+            if data is None:
+                data = self._values[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, list(data)) for labels, data in self._values.items())
+        for labels, data in items:
+            for bound, count in zip(self.buckets, data):
+                yield f"{self.name}_bucket{self._label_text(labels, [('le', f'{bound:g}')])} {count}"
+            yield f"{self.name}_bucket{self._label_text(labels, [('le', '+Inf')])} {data[-1]}"
+            yield f"{self.name}_sum{self._label_text(labels)} {data[-2]:g}"
+            yield f"{self.name}_count{self._label_text(labels)} {data[-1]}"
+
+class Collected(Metric):
+    # Read at scrape time from read() -> {label values: value}, for values
+    # that already live elsewhere (e.g. cache stats)
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], read: Callable[[], Dict[tuple, float]], kind: str = "gauge"):
+        super().__init__(name, help, labels)
+        self.read = read
+        self.kind = kind
+
+    def samples(self):
+        for labels, value in sorted(self.read().items()):
+            yield f"{self.name}{self._label_text(labels)} {value:g}"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+REGISTRY = []
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+http_request_seconds = Histogram("maze_http_request_duration_seconds", "Request latency, until the last body byte is sent.", ("endpoint", "method", "status"))
+phase_seconds = Histogram("maze_request_phase_seconds", "Time per request spent in each phase (queue, validate, generate, solve, serialize).", ("endpoint", "phase"))
+solves_total = Counter("maze_solves_total", "Solver runs by algorithm and source (solve, cache, batch).", ("algorithm", "source"))
+nodes_expanded_total = Counter("maze_nodes_expanded_total", "Nodes expanded by solver runs.", ("algorithm",))
+steps_emitted_total = Counter("maze_steps_emitted_total", "StepUpdates sent to clients.", ("algorithm",))
+
+CACHES = {"maze": maze_cache, "solve": solve_cache}
+Collected("maze_cache_entries", "Entries held per cache.", ("cache",), lambda: {(name,): cache.stats()["size"] for name, cache in CACHES.items()})
+Collected("maze_cache_hits_total", "Cache hits (this process).", ("cache",), lambda: {(name,): cache.hits for name, cache in CACHES.items()}, kind="counter")
+Collected("maze_cache_misses_total", "Cache misses (this process).", ("cache",), lambda: {(name,): cache.misses for name, cache in CACHES.items()}, kind="counter")
+Collected("maze_solve_cache_bytes", "Compressed trace bytes held by the solve cache.", (), lambda: {(): solve_cache.stats()["weight"]})
+
+# Per-request phase timings. The middleware opens one RequestMetrics per
+# request; code anywhere below it (threadpool handlers and streamed bodies
+# included, as they copy the context) adds to it through add_phase.
+
+class RequestMetrics:
+    __slots__ = ("start", "phases", "profile", "profile_file")
+
+    def __init__(self, profile: bool = False):
+        self.start = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.profile = profile
+        self.profile_file: Optional[str] = None
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+def add_phase(phase: str, seconds: float):
+    current = _current.get()
+    if current is not None:
+        current.phases[phase] = current.phases.get(phase, 0.0) + seconds
+
+@contextmanager
+def timed(phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(phase, time.perf_counter() - start)
+
+# Opt-in profiling: with MAZE_PROFILING=1, a request sent with "X-Profile: 1"
+# runs its handler under cProfile and the stats are saved as a .prof file
+# (snakeviz / flameprof / gprof2dot render it as a flame graph or call graph),
+# named in the X-Profile response header and downloadable from
+# /api/profiles/{name}. Only the handler is profiled, so for a streamed solve
+# profile the non-streamed variant of the endpoint.
+PROFILING_ENABLED = os.environ.get("MAZE_PROFILING", "") not in ("", "0")
+PROFILE_DIR = os.environ.get("MAZE_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "maze-profiles"))
+PROFILE_NAME = re.compile(r"^[\w.-]+\.prof$")
+
+def profile_path(name: str) -> Optional[str]:
+    if not PROFILE_NAME.match(name):
+        return None
+    return os.path.join(PROFILE_DIR, name)
+
+def instrumented(handler):
+    # Endpoint decorator: everything from request arrival to here (body
+    # parsing, pydantic validation, threadpool dispatch) but the admission
+    # "queue" wait is the "validate" phase; also runs the handler under
+    # cProfile when asked to
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        current = _current.get()
+        if current is None:
+            return handler(*args, **kwargs)
+        add_phase("validate", time.perf_counter() - current.start - current.phases.get("queue", 0.0))
+        if not current.profile:
+            return handler(*args, **kwargs)
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(handler, *args, **kwargs)
+        finally:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            name = f"{handler.__name__}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident() % 100000}.prof"
+            profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+            current.profile_file = name
+    return wrapper
+
+class MetricsMiddleware:
+    # Plain ASGI middleware (not BaseHTTPMiddleware), so streamed responses
+    # are timed to their last chunk and are not buffered
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = PROFILING_ENABLED and (b"x-profile", b"1") in scope.get("headers", [])
+        current = RequestMetrics(profile)
+        token = _current.set(current)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if current.profile_file:
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile", current.profile_file.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "") or scope.get("metrics_endpoint") or "static"
+            http_request_seconds.observe(time.perf_counter() - current.start, endpoint, scope["method"], str(status))
+            for phase, seconds in current.phases.items():
+                phase_seconds.observe(seconds, endpoint, phase)
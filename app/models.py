@@ -1,9 +1,20 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Tuple
+from functools import cached_property
+from itertools import chain
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional, Tuple, Union
+
+# Mazes up to MAX_INLINE_SIDE a side travel as JSON grids; larger ones (up
+# to MAX_MAZE_SIDE) are large mazes, memory-mapped files used by reference
+# (see app/large_maze.py)
+MAX_INLINE_SIDE = 100
+MAX_MAZE_SIDE = 4000
+# Wilson's loop-erased walks take far longer than the other carvers on big
+# grids (and vary a lot from seed to seed), so it is refused past this
+WILSON_MAX_CELLS = 1024 * 1024
 
 class MazeConfig(BaseModel):
-    width: int = Field(..., ge=5, le=100)
-    height: int = Field(..., ge=5, le=100)
+    width: int = Field(..., ge=5, le=MAX_MAZE_SIDE)
+    height: int = Field(..., ge=5, le=MAX_MAZE_SIDE)
     wall_density: float = Field(0.3, ge=0.0, le=1.0)
     
     start_fixed: bool = True
@@ -14,21 +25,86 @@ class MazeConfig(BaseModel):
     no_path: bool = False
     unique_path: bool = False
     allow_cycles: bool = False
+    # Perfect-maze algorithm (used when cycles are off), see app/generation.py
+    generator: Literal["prim", "kruskal", "wilson", "division"] = "prim"
     
     # dead_end_density isn't easily directly controllable in all generation algorithms
     # but we will accept it as a parameter to influence generation if possible
     dead_end_density: float = Field(0.5, ge=0.0, le=1.0)
+    
+    # Same config + seed always generates the same maze (None = random)
+    seed: Optional[int] = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def check_generator(self):
+        perfect = self.unique_path or not self.allow_cycles
+        if perfect and self.generator == "wilson" and self.width * self.height > WILSON_MAX_CELLS:
+            raise ValueError(f"The wilson generator is limited to {WILSON_MAX_CELLS} cells; use kruskal or division")
+        return self
 
 class MazeState(BaseModel):
     width: int
     height: int
-    grid: List[List[int]] # 1=Wall, 2=Empty, 3=Exploring, 4=Dead, 5=Path
+    grid: List[List[int]] # 1=Wall, 2=Empty, 3=Exploring, 4=Dead, 5=Path; empty for large mazes
     start_pos: Tuple[int, int]
     end_pos: Tuple[int, int]
+    # Set on generated mazes; pass it back instead of the grid (see SolveRequest)
+    maze_id: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_grid(self):
+        # Same checks as decode_maze, for mazes sent as JSON. Mazes built on
+        # the server skip validation (maze_from_array, open_maze).
+        if not (1 <= self.width <= MAX_MAZE_SIDE and 1 <= self.height <= MAX_MAZE_SIDE):
+            raise ValueError(f"Maze sides must be between 1 and {MAX_MAZE_SIDE}")
+        if len(self.grid) != self.height or any(len(row) != self.width for row in self.grid):
+            raise ValueError("Grid size does not match width and height")
+        if any(not 0 <= value <= 255 for row in self.grid for value in row):
+            raise ValueError("Cell values must be between 0 and 255")
+        for r, c in (self.start_pos, self.end_pos):
+            if not (0 <= r < self.height and 0 <= c < self.width):
+                raise ValueError("Start/end position out of bounds")
+        return self
+
+    # Flat row-major uint8 copy of grid (see app/grid.py), built on first use.
+    # cached_property lives in __dict__, so repeat reads are a plain lookup.
+    # Large mazes have it prefilled with a view of their memory-mapped file.
+    @cached_property
+    def cells(self) -> bytes:
+        return bytes(chain.from_iterable(self.grid))
+
+# Heuristics of the best-first searches (see app/algorithms/heuristics.py)
+Heuristic = Literal["manhattan", "alt"]
+
+class SearchOptions(BaseModel):
+    # Tuning of the heuristic searches; algorithms that don't take an option
+    # ignore it (see ALGORITHM_OPTIONS)
+    heuristic: Heuristic = "manhattan"
+    # A* priority is g + weight * h; above 1 is weighted A* (fewer nodes
+    # expanded, path at most weight times the shortest)
+    weight: float = Field(1.0, ge=1.0, le=10.0)
+
+class MazeSource(BaseModel):
+    # Either the full maze or the maze_id of a previously generated one
+    maze: Optional[MazeState] = None
+    maze_id: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_maze(self):
+        if (self.maze is None) == (self.maze_id is None):
+            raise ValueError("Provide exactly one of maze or maze_id")
+        return self
 
-class SolveRequest(BaseModel):
-    maze: MazeState
+class SolveRequest(MazeSource):
     algorithm: str
+    options: SearchOptions = Field(default_factory=SearchOptions)
+
+class SolveManyRequest(MazeSource):
+    # Several algorithms on the same maze in one request (/api/solve_many)
+    algorithms: List[str] = Field(..., min_length=1)
+    options: SearchOptions = Field(default_factory=SearchOptions)
+    # Also return each full trace (format as on /api/solve); summaries only by default
+    traces: bool = False
 
 class StepUpdate(BaseModel):
     grid_updates: List[Tuple[int, int, int]] = Field(default_factory=list) # (row, col, new_val)
@@ -39,3 +115,117 @@ class StepUpdate(BaseModel):
     nodes_expanded: int = 0
     steps_taken: int = 0
     max_frontier_size: int = 0
+
+class SolveSummary(BaseModel):
+    # Final counters of a headless solve (no per-step trace)
+    success: bool = False
+    path_length: int = 0
+    nodes_expanded: int = 0
+    steps_taken: int = 0
+    max_frontier_size: int = 0
+
+class AlgorithmSolve(BaseModel):
+    # One algorithm's result in a /api/solve_many response
+    algorithm: str
+    summary: Optional[SolveSummary] = None # None if the solve failed (see error)
+    cached: bool = False # replayed from the solve cache
+    solve_ms: float = 0.0 # time spent solving, 0 for cache hits
+    error: Optional[str] = None
+    # StepUpdates, or one compact block with format=compact; only if traces were asked for
+    trace: Optional[Union[List[StepUpdate], dict]] = None
+
+class SessionRequest(MazeSource):
+    # A new incremental solving session (/api/sessions). LPA* repairs its
+    # search after edits and keeps the shortest path; HPA* repairs only the
+    # edited clusters of its abstraction (near-shortest path, for big grids).
+    algorithm: Literal["LPA*", "HPA*"] = "LPA*"
+
+class SessionEdits(BaseModel):
+    # Cells to change in an incremental solving session (/api/sessions):
+    # (row, col, value), value 1 to build a wall or 2 to clear one
+    cells: List[Tuple[int, int, Literal[1, 2]]] = Field(..., min_length=1)
+
+class SessionUpdate(BaseModel):
+    session_id: str
+    version: int # edits applied so far
+    success: bool
+    path_length: int
+    nodes_expanded: int # by this update only
+    # Turns the previous response's view into this one: the edited cells with
+    # their new value, then cells that left the path (back to their own value)
+    # or joined it (5)
+    grid_updates: List[Tuple[int, int, int]]
+
+class DistanceQuery(MazeSource):
+    # Many starts against one target (default: the maze's end), answered from
+    # the target's cached distance field (see app/distance_field.py)
+    starts: List[Tuple[int, int]] = Field(..., min_length=1, max_length=10_000)
+    target: Optional[Tuple[int, int]] = None
+    paths: bool = True # include each start's path, not just its length
+
+class DistanceAnswer(BaseModel):
+    start: Tuple[int, int]
+    success: bool = False
+    path_length: int = 0 # cells, both ends included (as in SolveSummary)
+    next_cell: Optional[Tuple[int, int]] = None # first move towards the target; None at it or if unreachable
+    path: Optional[List[Tuple[int, int]]] = None
+
+class DistanceResult(BaseModel):
+    target: Tuple[int, int]
+    cached: bool # the distance field was already built
+    answers: List[DistanceAnswer]
+
+class CachedSolve(BaseModel):
+    summary: SolveSummary
+    trace: Optional[bytes] = None # zlib-compressed NDJSON of the StepUpdates
+
+class BatchConfig(BaseModel):
+    maze_config: Optional[MazeConfig] = None
+    num_mazes: Optional[int] = Field(None, ge=1)
+    algorithms: List[str]
+    # Name of a stored maze corpus (see app/corpus.py) to run instead of
+    # generating mazes. Its config and seed replace maze_config and seed;
+    # num_mazes defaults to (and is capped at) its size.
+    corpus: Optional[str] = Field(None, pattern=r"^\w[\w.-]*$")
+    # Replay full StepUpdate traces instead of the headless solvers (slower, same numbers)
+    trace: bool = False
+    # Base seed; maze i is generated from derive_seed(seed, i), so a seeded run
+    # is reproducible for any number of workers. None = fresh random run.
+    seed: Optional[int] = Field(None, ge=0)
+    # Parallel shards (None = all pool workers, 1 = run in-process)
+    workers: Optional[int] = Field(None, ge=1)
+    # Solve BFS for many mazes at once (app/algorithms/wavefront.py) when not
+    # tracing: same counters, but the times are the per-maze share of a
+    # stack, so results list it as "BFS (vectorized, amortized)", not BFS
+    vectorized: bool = False
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if self.corpus is None and (self.maze_config is None or self.num_mazes is None):
+            raise ValueError("Provide maze_config and num_mazes, or a corpus")
+        return self
+
+class BatchRow(SolveSummary):
+    # One algorithm on one maze of a batch run (/api/batch/rows)
+    maze: int # index in the run (or corpus)
+    maze_id: Optional[str] = None
+    algorithm: str
+    time_ms: float
+
+class BatchResult(BaseModel):
+    algorithm: str
+    success_rate: float
+    avg_time_ms: float
+    avg_nodes: float
+    avg_path_length: float
+    avg_steps: float
+    avg_frontier: float
+
+class BatchJob(BaseModel):
+    id: str
+    status: str = "queued" # queued | running | done | cancelled | failed
+    total_mazes: int
+    completed_mazes: int = 0
+    # Aggregates over the mazes completed so far; final once status is "done"
+    results: List[BatchResult] = Field(default_factory=list)
+    error: Optional[str] = None
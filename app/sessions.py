@@ -0,0 +1,137 @@
+import os
+import threading
+import uuid
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from .models import MazeState, SessionUpdate
+from .grid import grid_array, maze_from_array
+from .algorithms.lpa_star import LPAStar
+from .algorithms.hpa import HPASearch
+from .cache import LRUCache, SqliteCache, MAZE_CODEC
+from .storage import STATE_BACKEND, get_database
+from .metrics import timed
+
+# Incremental solving sessions (/api/sessions): a maze kept on the server
+# with its search state, so re-solving after a few edited cells only repairs
+# what the edits affected. Two kinds of search state:
+# - LPA* (app/algorithms/lpa_star.py): repairs the search itself, always
+#   the shortest path
+# - HPA* (app/algorithms/hpa.py): repairs the cluster abstraction of the
+#   edited clusters, then runs a new (cheap) abstract query; near-shortest
+#
+# Search state lives in the process that built it. With the sqlite backend
+# every update also saves the session's view (walls, and the path marked 5)
+# with its version, and a worker without the latest version rebuilds the
+# search from it with one full solve. Edits to one session are meant to be
+# sent one at a time.
+
+SESSION_CACHE_SIZE = int(os.environ.get("MAZE_SESSION_CACHE_SIZE", 256))
+
+# Session algorithm -> search state class (see SessionRequest)
+SEARCHES = {"LPA*": LPAStar, "HPA*": HPASearch}
+
+def clean_maze(maze: MazeState) -> Tuple[MazeState, Set[int]]:
+    # The maze with display marks (exploring/dead/path) cleared, and the
+    # cells that were marked as path
+    arr = grid_array(maze)
+    marked = (arr >= 3) & (arr <= 5)
+    clean = maze_from_array(np.where(marked, 2, arr), maze.start_pos, maze.end_pos)
+    return clean, set(np.flatnonzero(arr == 5).tolist())
+
+class Session:
+    def __init__(self, session_id: str, maze: MazeState, version: int = 0, path: Optional[Set[int]] = None, algorithm: str = "LPA*"):
+        self.id = session_id
+        self.version = version
+        self.algorithm = algorithm
+        self.width, self.height = maze.width, maze.height
+        self.start_pos, self.end_pos = maze.start_pos, maze.end_pos
+        self.search = SEARCHES[algorithm](maze)
+        self.path = path or set() # as of the last update sent
+        self.lock = threading.Lock()
+
+    def solve(self, changed: List[int]) -> SessionUpdate:
+        with timed("solve"):
+            expanded = self.search.compute()
+            path = self.search.path()
+        cells, width = self.search.cells, self.width
+        on_path = set(path)
+        updates = [(u // width, u % width, cells[u]) for u in changed]
+        updates += [(u // width, u % width, cells[u]) for u in self.path - on_path]
+        updates += [(u // width, u % width, 5) for u in path if u not in self.path]
+        self.path = on_path
+        return SessionUpdate(
+            session_id=self.id, version=self.version, success=bool(path), path_length=len(path),
+            nodes_expanded=expanded, grid_updates=updates
+        )
+
+    def edit(self, cells: List[Tuple[int, int, int]]) -> SessionUpdate:
+        # Raises ValueError for cells outside the maze or on the start/end
+        for r, c, _ in cells:
+            if not (0 <= r < self.height and 0 <= c < self.width):
+                raise ValueError(f"Cell ({r}, {c}) is outside the maze")
+            if (r, c) in (tuple(self.start_pos), tuple(self.end_pos)):
+                raise ValueError("The start and end cells can't be edited")
+        changed = self.search.edit((r * self.width + c, value == 1) for r, c, value in cells)
+        self.version += 1
+        return self.solve(changed)
+
+    def view(self) -> MazeState:
+        # The maze as of the last update, path marked 5 but for the start and
+        # end cells; maze_id is "version:found:algorithm" (found: 1 if there
+        # is a path)
+        arr = np.frombuffer(self.search.cells, dtype=np.uint8).reshape(self.height, self.width).copy()
+        arr.flat[list(self.path - {self.search.start, self.search.end})] = 5
+        maze = maze_from_array(arr, self.start_pos, self.end_pos)
+        maze.maze_id = f"{self.version}:{int(bool(self.path))}:{self.algorithm}"
+        return maze
+
+    @classmethod
+    def from_view(cls, session_id: str, saved: MazeState) -> "Session":
+        version, found, algorithm = saved.maze_id.split(":", 2)
+        maze, path = clean_maze(saved)
+        session = cls(session_id, maze, int(version), path, algorithm)
+        if found == "1":
+            session.path |= {session.search.start, session.search.end}
+        return session
+
+class SessionStore:
+    def __init__(self, maxsize: int = SESSION_CACHE_SIZE, shared: Optional[SqliteCache] = None):
+        self.live = LRUCache(maxsize) # session id -> Session
+        self.shared = shared # session id -> Session.view()
+
+    def create(self, maze: MazeState, algorithm: str = "LPA*") -> SessionUpdate:
+        session = Session(uuid.uuid4().hex, clean_maze(maze)[0], algorithm=algorithm)
+        with session.lock:
+            update = session.solve([])
+            self.live.put(session.id, session)
+            self._save(session)
+        return update
+
+    def edit(self, session_id: str, cells: List[Tuple[int, int, int]]) -> Optional[SessionUpdate]:
+        # None if the session is unknown (or evicted everywhere)
+        session = self._get(session_id)
+        if session is None:
+            return None
+        with session.lock:
+            update = session.edit(cells)
+            self._save(session)
+        return update
+
+    def _get(self, session_id: str) -> Optional[Session]:
+        session = self.live.get(session_id)
+        saved = self.shared.get(session_id) if self.shared is not None else None
+        if saved is not None and (session is None or str(session.version) != saved.maze_id.split(":")[0]):
+            # Another worker has the latest version: rebuild from its view
+            session = Session.from_view(session_id, saved)
+            self.live.put(session_id, session)
+        return session
+
+    def _save(self, session: Session):
+        if self.shared is not None:
+            self.shared.put(session.id, session.view())
+
+session_store = SessionStore(
+    shared=SqliteCache(get_database(), "sessions", MAZE_CODEC, SESSION_CACHE_SIZE) if STATE_BACKEND == "sqlite" else None
+)
@@ -0,0 +1,168 @@
+import os
+import zlib
+from concurrent.futures import TimeoutError as FutureTimeout
+from time import perf_counter
+from typing import Generator, Iterator, Optional, Tuple, Union
+
+from .models import MazeState, SolveSummary, CachedSolve
+from .grid import maze_hash
+from .large_maze import maze_payload, load_payload
+from .algorithms import ALGORITHMS
+from .cache import solve_cache
+from .metrics import add_phase, timed, solves_total, nodes_expanded_total, steps_emitted_total
+from .execution import get_solve_pool, POOL_MIN_CELLS, SOLVE_TIME_BUDGET, QUEUE_TIMEOUT
+
+# Traces whose compressed NDJSON grows past this are cached as a summary only
+MAX_CACHED_TRACE_BYTES = int(os.environ.get("SOLVE_CACHE_MAX_TRACE_BYTES", 4 * 1024 * 1024))
+# Trace text decompressed per step of a replay
+TRACE_READ_BYTES = 64 * 1024
+
+def record_solve(algorithm: str, summary: SolveSummary, steps: int, source: str):
+    solves_total.inc(1, algorithm, source)
+    if source != "cache": # replays expand nothing
+        nodes_expanded_total.inc(summary.nodes_expanded, algorithm)
+    steps_emitted_total.inc(steps, algorithm)
+
+def solve_key(maze: MazeState, algorithm: str, options: Optional[dict] = None) -> str:
+    # Solvers are deterministic given the maze and their options (see
+    # solver_options), so this fully identifies a result
+    return f"{maze_hash(maze)}:{algorithm}" + "".join(f":{name}={value}" for name, value in sorted((options or {}).items()))
+
+def get_cached_solve(maze: MazeState, algorithm: str, options: Optional[dict] = None) -> Optional[CachedSolve]:
+    return solve_cache.get(solve_key(maze, algorithm, options))
+
+class SolveTimeout(Exception):
+    pass
+
+def run_solve(maze: MazeState, algorithm: str, options: Optional[dict], budget: float, max_trace_bytes: Optional[int]) -> Generator[str, None, Optional[Tuple[CachedSolve, int]]]:
+    # Runs the solver lazily, yielding StepUpdate JSON lines and compressing
+    # them as it goes. Returns (result, steps); result.trace is None if it grew
+    # past max_trace_bytes. Raises SolveTimeout once the time spent solving and
+    # serializing (not waiting on the consumer) exceeds budget seconds.
+    compressor = zlib.compressobj(level=1)
+    chunks = []
+    size = 0
+    last = None
+    count = 0
+    solve_time = serialize_time = 0.0
+    steps = ALGORITHMS[algorithm](maze, **(options or {}))
+    try:
+        while True:
+            # Solver vs serialization time, summed and reported once at the end
+            t0 = perf_counter()
+            step = next(steps, None)
+            t1 = perf_counter()
+            solve_time += t1 - t0
+            if step is None:
+                break
+            line = step.model_dump_json()
+            last = step
+            count += 1
+            if chunks is not None:
+                chunk = compressor.compress(line.encode() + b"\n")
+                if chunk:
+                    chunks.append(chunk)
+                    size += len(chunk)
+                if max_trace_bytes is not None and size > max_trace_bytes:
+                    chunks = None # too big to keep, just count it
+            serialize_time += perf_counter() - t1
+            if solve_time + serialize_time > budget:
+                steps.close()
+                raise SolveTimeout(f"{algorithm} exceeded its {budget:g}s time budget")
+            yield line
+    finally:
+        add_phase("solve", solve_time)
+        add_phase("serialize", serialize_time)
+
+    if last is None:
+        return None
+    summary = SolveSummary(
+        success=last.success, path_length=last.path_length, nodes_expanded=last.nodes_expanded,
+        steps_taken=last.steps_taken, max_frontier_size=last.max_frontier_size
+    )
+    trace = b"".join(chunks) + compressor.flush() if chunks is not None else None
+    return CachedSolve(summary=summary, trace=trace), count
+
+def solve_whole(maze: MazeState, algorithm: str, options: Optional[dict], budget: float) -> Optional[CachedSolve]:
+    # Runs run_solve to the end, keeping the full trace
+    steps = run_solve(maze, algorithm, options, budget, max_trace_bytes=None)
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value[0] if stop.value else None
+
+def compute_solve(payload: Union[bytes, str], algorithm: str, options: Optional[dict], budget: float) -> Optional[CachedSolve]:
+    # solve_whole of a maze_payload; safe to run in a worker process
+    return solve_whole(load_payload(payload), algorithm, options, budget)
+
+def store_solve(key: str, result: CachedSolve):
+    if result.trace is not None and len(result.trace) > MAX_CACHED_TRACE_BYTES:
+        result = CachedSolve(summary=result.summary) # too big to keep
+    solve_cache.put(key, result)
+
+def trace_lines(trace: bytes) -> Iterator[str]:
+    # The StepUpdate JSON lines of a compressed trace, decompressed at most
+    # TRACE_READ_BYTES at a time, so replaying never holds the whole text
+    decompressor = zlib.decompressobj()
+    data, tail = trace, b""
+    while data:
+        text = tail + decompressor.decompress(data, TRACE_READ_BYTES)
+        data = decompressor.unconsumed_tail
+        *lines, tail = text.split(b"\n")
+        for line in lines:
+            yield line.decode()
+    text = tail + decompressor.flush()
+    for line in text.split(b"\n"):
+        if line:
+            yield line.decode()
+
+def replay_solve(algorithm: str, result: CachedSolve, source: str) -> Iterator[str]:
+    # Lines of a finished solve's trace, counted in the metrics as they go out
+    count = 0
+    try:
+        for line in trace_lines(result.trace):
+            count += 1
+            yield line
+    finally:
+        record_solve(algorithm, result.summary, count, source)
+
+def iter_solve_lines(maze: MazeState, algorithm: str, options: Optional[dict] = None, budget: float = SOLVE_TIME_BUDGET,
+                     pooled: bool = True) -> Iterator[str]:
+    # StepUpdate JSON lines for a solve, either
+    # - replayed from the cache,
+    # - solved in the solve process pool (large mazes, if pooled), then
+    #   replayed, or
+    # - solved lazily in this thread, compressing the trace into the cache as
+    #   it streams (only the compressed bytes are held).
+    # Streams pass pooled=False: the pool only hands back finished traces, so
+    # the first step would wait for the whole solve.
+    # options: solver keyword arguments (see solver_options). Raises
+    # SolveTimeout if the solve runs over budget.
+    key = solve_key(maze, algorithm, options)
+    cached = solve_cache.get(key)
+    if cached is not None and cached.trace is not None:
+        yield from replay_solve(algorithm, cached, "cache")
+        return
+
+    pool = get_solve_pool() if pooled and maze.width * maze.height >= POOL_MIN_CELLS else None
+    if pool is not None:
+        with timed("solve"):
+            future = pool.submit(compute_solve, maze_payload(maze), algorithm, options, budget)
+            try:
+                # The worker enforces the budget itself; this also bounds the wait for a free worker
+                result = future.result(timeout=budget + QUEUE_TIMEOUT)
+            except FutureTimeout:
+                future.cancel()
+                raise SolveTimeout(f"{algorithm} did not finish within {budget:g}s")
+        if result is None:
+            return
+        store_solve(key, result)
+        yield from replay_solve(algorithm, result, "solve")
+        return
+
+    done = yield from run_solve(maze, algorithm, options, budget, MAX_CACHED_TRACE_BYTES)
+    if done is not None:
+        result, count = done
+        record_solve(algorithm, result.summary, count, "solve")
+        store_solve(key, result)
@@ -0,0 +1,113 @@
+from concurrent.futures import TimeoutError as FutureTimeout
+from time import perf_counter
+from typing import List, Optional, Tuple, Union
+
+from .models import MazeState, SearchOptions, CachedSolve, AlgorithmSolve
+from .large_maze import maze_payload, load_payload
+from .algorithms import HEADLESS_ALGORITHMS, solver_options
+from .solve_cache import solve_key, solve_whole, store_solve, record_solve, trace_lines, SolveTimeout
+from .cache import solve_cache
+from .metrics import add_phase, timed
+from .execution import get_solve_pool, POOL_MIN_CELLS, SOLVE_WORKERS, SOLVE_TIME_BUDGET, QUEUE_TIMEOUT
+
+# Several algorithms on one maze in one request (/api/solve_many).
+# Results come from and go to the solve cache like single solves. The rest
+# run in groups sharing one MazeState, so the per-maze preprocessing
+# (neighbor index, landmarks, jump tables) is built once per group:
+# - small mazes: one group in this thread, faster than a pool round trip
+# - large mazes: one group per solve worker, all running at once
+# Without traces the headless solvers are used.
+
+# (algorithm, solver options) -> (result, solve seconds, error)
+Job = Tuple[str, dict]
+JobResult = Tuple[Optional[CachedSolve], float, Optional[str]]
+
+def run_group(maze: MazeState, jobs: List[Job], traces: bool, budget: float) -> List[JobResult]:
+    # Solves one after another within budget seconds in all, checked between
+    # solves as run_solve checks between steps: each solve gets what the
+    # earlier ones left, and once it is spent the rest are skipped. Headless
+    # solvers can't be stopped midway, so a group can overrun by one solve.
+    results = []
+    spent = 0.0
+    for algorithm, options in jobs:
+        if spent >= budget:
+            results.append((None, 0.0, f"{algorithm} skipped: the {budget:g}s time budget was spent"))
+            continue
+        start = perf_counter()
+        try:
+            if traces:
+                result = solve_whole(maze, algorithm, options, budget - spent)
+            else:
+                result = CachedSolve(summary=HEADLESS_ALGORITHMS[algorithm](maze, **options))
+                add_phase("solve", perf_counter() - start) # no-op in worker processes
+            error = None if result else f"{algorithm} produced no steps"
+        except SolveTimeout as e:
+            result, error = None, str(e)
+        seconds = perf_counter() - start
+        spent += seconds
+        results.append((result, seconds, error))
+    return results
+
+def run_group_encoded(payload: Union[bytes, str], jobs: List[Job], traces: bool, budget: float) -> List[JobResult]:
+    # run_group on a maze_payload; safe to run in a worker process
+    return run_group(load_payload(payload), jobs, traces, budget)
+
+def run_jobs(maze: MazeState, jobs: List[Job], traces: bool, budget: float) -> List[JobResult]:
+    pool = get_solve_pool() if jobs and maze.width * maze.height >= POOL_MIN_CELLS else None
+    if pool is None:
+        return run_group(maze, jobs, traces, budget)
+
+    # Round-robin, so every group gets a similar mix of algorithms
+    num_groups = min(SOLVE_WORKERS, len(jobs))
+    groups = [jobs[k::num_groups] for k in range(num_groups)]
+    payload = maze_payload(maze)
+    results: List[Optional[JobResult]] = [None] * len(jobs)
+    with timed("solve"):
+        futures = [pool.submit(run_group_encoded, payload, group, traces, budget) for group in groups]
+        # Workers enforce the budget themselves and return partial results;
+        # this also bounds the wait for a free worker
+        deadline = perf_counter() + budget + QUEUE_TIMEOUT
+        for k, (group, future) in enumerate(zip(groups, futures)):
+            try:
+                results[k::num_groups] = future.result(timeout=max(deadline - perf_counter(), 0))
+            except FutureTimeout:
+                # A queued group is dropped; a running one can't be stopped,
+                # so it finishes in its worker and its results are discarded
+                if future.cancel():
+                    error = "{} was not started within {:g}s"
+                else:
+                    error = "{} did not finish within {:g}s (still running in a solve worker)"
+                results[k::num_groups] = [(None, 0.0, error.format(algorithm, budget)) for algorithm, _ in group]
+    return results
+
+def solve_many(maze: MazeState, algorithms: List[str], options: SearchOptions, traces: bool,
+               budget: float = SOLVE_TIME_BUDGET) -> List[Tuple[AlgorithmSolve, Optional[List[str]]]]:
+    # (result, StepUpdate JSON lines or None) per distinct algorithm, in request order
+    found = {}
+    jobs = []
+    for algorithm in dict.fromkeys(algorithms):
+        opts = solver_options(algorithm, options)
+        cached = solve_cache.get(solve_key(maze, algorithm, opts))
+        if cached is not None and (cached.trace is not None or not traces):
+            found[algorithm] = (cached, True, 0.0, None)
+        else:
+            jobs.append((algorithm, opts))
+
+    for (algorithm, opts), (result, seconds, error) in zip(jobs, run_jobs(maze, jobs, traces, budget)):
+        found[algorithm] = (result, False, seconds, error)
+        if result is not None:
+            store_solve(solve_key(maze, algorithm, opts), result)
+
+    output = []
+    for algorithm in dict.fromkeys(algorithms):
+        result, cached, seconds, error = found[algorithm]
+        if result is None:
+            output.append((AlgorithmSolve(algorithm=algorithm, error=error), None))
+            continue
+        lines = None
+        if traces:
+            with timed("solve"):
+                lines = list(trace_lines(result.trace))
+        record_solve(algorithm, result.summary, len(lines) if lines else 0, "cache" if cached else "solve")
+        output.append((AlgorithmSolve(algorithm=algorithm, summary=result.summary, cached=cached, solve_ms=seconds * 1000), lines))
+    return output
@@ -95,6 +95,54 @@ def bfs_step(queue, visited, other_visited):
                 g_score[neighbor] = tentative_g
                 f_score[neighbor] = tentative_g + h(neighbor, goal)
                 open_set.add(neighbor)`
+    },
+    "Jump Point Search": {
+        title: "Jump Point Search (JPS)",
+        desc: "A* that only stops at jump points: from each cell it scans straight ahead and skips every cell where the path has no reason to turn.",
+        code: `def jps(grid, start, goal):
+    pq = PriorityQueue()
+    pq.put((h(start), start))
+    while not pq.empty():
+        _, current = pq.get()
+        if current == goal: return fill_segments(came_from, goal)
+
+        for direction in pruned_directions(current):
+            # Scan until a forced neighbor, the goal or a wall
+            jp = jump(current, direction)
+            if jp and g[current] + dist(current, jp) < g[jp]:
+                g[jp] = g[current] + dist(current, jp)
+                came_from[jp] = current
+                pq.put((g[jp] + h(jp), jp))`
+    },
+    "Dead-End Filling": {
+        title: "Dead-End Filling",
+        desc: "Fills every dead end until only cells that can lie on a route remain, then searches the junctions, treating each corridor as a single edge.",
+        code: `def dead_end_filling(grid, start, goal):
+    queue = [c for c in open_cells if degree(c) <= 1 and c not in (start, goal)]
+    while queue:
+        cell = queue.pop()
+        fill(cell)
+        for n in open_neighbors(cell):
+            if degree(n) == 1 and n not in (start, goal):
+                queue.append(n)
+
+    # What is left: junctions joined by corridors
+    return a_star(junction_graph(start, goal), start, goal)`
+    },
+    "HPA*": {
+        title: "Hierarchical Pathfinding (HPA*)",
+        desc: "Cuts the grid into clusters and searches a small graph of cluster entrances, with distances inside each cluster worked out once per maze. Only the route found is refined into cells; near-shortest, not always the shortest.",
+        code: `def hpa(grid, start, goal):
+    # Once per maze
+    entrances = transitions_on_cluster_borders(grid)
+    graph = crossings(entrances) + distances_inside_clusters(entrances)
+
+    # Per query: link start/goal to their clusters' entrances
+    graph.add(start, bfs_in_cluster(start, entrances))
+    graph.add(goal, bfs_in_cluster(goal, entrances))
+    route = a_star(graph, start, goal)
+    return [cell for a, b in pairs(route)
+                 for cell in bfs_in_cluster(a, b)]`
     }
 };
 
@@ -293,6 +341,59 @@ function resizeCanvas() {
 
 window.addEventListener('resize', resizeCanvas);
 
+// Binary maze wire format (mirrors app/grid.py):
+// "MZ01" | width | height | start_r | start_c | end_r | end_c (uint16 LE), then one byte per cell
+const MAZE_MEDIA_TYPE = 'application/octet-stream';
+const MAZE_MAGIC = [0x4d, 0x5a, 0x30, 0x31];
+const MAZE_HEADER_SIZE = 16;
+
+function decodeMaze(buffer) {
+    const view = new DataView(buffer);
+    const width = view.getUint16(4, true);
+    const height = view.getUint16(6, true);
+    const cells = new Uint8Array(buffer, MAZE_HEADER_SIZE, width * height);
+    const grid = [];
+    for (let r = 0; r < height; r++) {
+        grid.push(Array.from(cells.subarray(r * width, (r + 1) * width)));
+    }
+    return {
+        width, height, grid,
+        start_pos: [view.getUint16(8, true), view.getUint16(10, true)],
+        end_pos: [view.getUint16(12, true), view.getUint16(14, true)]
+    };
+}
+
+function encodeMaze(maze) {
+    const buffer = new ArrayBuffer(MAZE_HEADER_SIZE + maze.width * maze.height);
+    const view = new DataView(buffer);
+    MAZE_MAGIC.forEach((b, i) => view.setUint8(i, b));
+    [maze.width, maze.height, ...maze.start_pos, ...maze.end_pos].forEach((v, i) => view.setUint16(4 + 2 * i, v, true));
+    const cells = new Uint8Array(buffer, MAZE_HEADER_SIZE);
+    for (let r = 0; r < maze.height; r++) {
+        cells.set(maze.grid[r], r * maze.width);
+    }
+    return buffer;
+}
+
+// Status area: the last generate or solve error (a 429 from a busy server,
+// a 503/504 over the time budget, a rejected config), cleared on success
+const statusMessage = document.getElementById('status-message');
+
+function showStatus(message) {
+    statusMessage.textContent = message;
+    statusMessage.classList.toggle('hidden', !message);
+}
+
+async function responseError(res, action) {
+    // FastAPI errors carry {"detail": ...}: a message, or a list of validation errors
+    let detail = '';
+    try {
+        const body = await res.json();
+        detail = Array.isArray(body.detail) ? body.detail.map(e => e.msg).join('; ') : body.detail;
+    } catch (e) { }
+    return new Error(`${action} failed (${res.status})${detail ? ': ' + detail : ''}`);
+}
+
 // Generate
 async function generateMaze() {
     if (isRunning) return;
@@ -307,28 +408,32 @@ async function generateMaze() {
         no_path: document.getElementById('no_path').checked,
         unique_path: document.getElementById('unique_path').checked,
         allow_cycles: document.getElementById('allow_cycles').checked,
+        generator: document.getElementById('generator').value,
         dead_end_density: parseInt(document.getElementById('dead_end_density').value) / 100.0
     };
 
     try {
         const res = await fetch('/api/generate', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: { 'Content-Type': 'application/json', 'Accept': MAZE_MEDIA_TYPE },
             body: JSON.stringify(config)
         });
-        currentMaze = await res.json();
+        if (!res.ok) throw await responseError(res, 'Generate');
+        currentMaze = decodeMaze(await res.arrayBuffer());
+        currentMaze.maze_id = res.headers.get('X-Maze-Id'); // lets solves skip re-uploading the grid
         drawMaze();
+        showStatus('');
     } catch (e) {
         console.error("Failed to generate", e);
+        showStatus(e.message);
     }
 }
 
 btnGenerate.addEventListener('click', generateMaze);
 
 // Drawing
-function drawMaze(updates = null) {
-    if (!currentMaze) return;
-
+// Where the maze sits on the canvas
+function gridLayout() {
     const rows = currentMaze.height;
     const cols = currentMaze.width;
 
@@ -351,11 +456,20 @@ function drawMaze(updates = null) {
         drawW = drawH * gridRatio;
     }
 
-    const cellW = drawW / cols;
-    const cellH = drawH / rows;
+    return {
+        rows, cols, availW, availH, drawW, drawH,
+        cellW: drawW / cols,
+        cellH: drawH / rows,
+        offX: (availW - drawW) / 2,
+        offY: (availH - drawH) / 2
+    };
+}
+
+function drawMaze(updates = null) {
+    if (!currentMaze) return;
 
-    const offX = (availW - drawW) / 2;
-    const offY = (availH - drawH) / 2;
+    const layout = gridLayout();
+    const { rows, cols, availW, availH, drawW, drawH, cellW, cellH, offX, offY } = layout;
 
     if (!updates) {
         ctx.fillStyle = '#f3f4f6'; // Match bg-gray-100/200 approximately or white
@@ -417,42 +531,112 @@ function drawMaze(updates = null) {
     } else {
         // Updates
         for (const [r, c, val] of updates) {
-            const gap = cellW > 10 ? 1 : 0;
-            const x = offX + c * cellW + gap / 2;
-            const y = offY + r * cellH + gap / 2;
-            const w = cellW - gap;
-            const h = cellH - gap;
-
-            if (val === 1 && wallImgLoaded) {
-                ctx.drawImage(wallImg, x, y, w, h);
-            } else if (val === 2 && grassImgLoaded) {
-                ctx.drawImage(grassImg, x, y, w, h);
-            } else if (val === 3 && pearlImgLoaded) {
-                ctx.drawImage(pearlImg, x, y, w, h);
-            } else if (val === 4 && dirtImgLoaded) {
-                ctx.drawImage(dirtImg, x, y, w, h);
-            } else if (val === 5 && stoneImgLoaded) {
-                ctx.drawImage(stoneImg, x, y, w, h);
-            } else if (val === 10 && steveImgLoaded) {
-                ctx.drawImage(steveImg, x, y, w, h);
-            } else if (val === 11 && chestImgLoaded) {
-                ctx.drawImage(chestImg, x, y, w, h);
-            } else {
-                ctx.fillStyle = COLORS[val];
-                ctx.fillRect(x, y, w, h);
-            }
+            drawCell(layout, r, c, val);
+        }
+    }
+}
 
-            // Keep Steve on top
-            if (currentMaze && r === currentMaze.start_pos[0] && c === currentMaze.start_pos[1] && steveImgLoaded) {
-                ctx.drawImage(steveImg, offX + c * cellW, offY + r * cellH, cellW, cellH);
-            }
+// Redraw one cell after an update
+function drawCell(layout, r, c, val) {
+    const { cellW, cellH, offX, offY } = layout;
+    const gap = cellW > 10 ? 1 : 0;
+    const x = offX + c * cellW + gap / 2;
+    const y = offY + r * cellH + gap / 2;
+    const w = cellW - gap;
+    const h = cellH - gap;
+
+    if (val === 1 && wallImgLoaded) {
+        ctx.drawImage(wallImg, x, y, w, h);
+    } else if (val === 2 && grassImgLoaded) {
+        ctx.drawImage(grassImg, x, y, w, h);
+    } else if (val === 3 && pearlImgLoaded) {
+        ctx.drawImage(pearlImg, x, y, w, h);
+    } else if (val === 4 && dirtImgLoaded) {
+        ctx.drawImage(dirtImg, x, y, w, h);
+    } else if (val === 5 && stoneImgLoaded) {
+        ctx.drawImage(stoneImg, x, y, w, h);
+    } else if (val === 10 && steveImgLoaded) {
+        ctx.drawImage(steveImg, x, y, w, h);
+    } else if (val === 11 && chestImgLoaded) {
+        ctx.drawImage(chestImg, x, y, w, h);
+    } else {
+        ctx.fillStyle = COLORS[val];
+        ctx.fillRect(x, y, w, h);
+    }
 
-            // Keep Chest on top
-            if (currentMaze && r === currentMaze.end_pos[0] && c === currentMaze.end_pos[1] && chestImgLoaded) {
-                ctx.drawImage(chestImg, offX + c * cellW, offY + r * cellH, cellW, cellH);
-            }
+    // Keep Steve on top
+    if (currentMaze && r === currentMaze.start_pos[0] && c === currentMaze.start_pos[1] && steveImgLoaded) {
+        ctx.drawImage(steveImg, offX + c * cellW, offY + r * cellH, cellW, cellH);
+    }
+
+    // Keep Chest on top
+    if (currentMaze && r === currentMaze.end_pos[0] && c === currentMaze.end_pos[1] && chestImgLoaded) {
+        ctx.drawImage(chestImg, offX + c * cellW, offY + r * cellH, cellW, cellH);
+    }
+}
+
+// Read an NDJSON stream, calling onStep for each parsed line as it arrives.
+// A solve that ran out of time ends with an {"error": ...} line.
+async function readStepStream(res, onStep) {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    const handle = line => {
+        const obj = JSON.parse(line);
+        if (obj.error) throw new Error(obj.error);
+        onStep(obj);
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop(); // keep the partial last line
+        for (const line of lines) {
+            if (line) handle(line);
         }
     }
+    buffer += decoder.decode();
+    if (buffer.trim()) handle(buffer);
+}
+
+// Compact step trace (format=compact, see app/trace.py). Blocks are decoded
+// into flat columns (updates of step i are cells/vals[offsets[i]..offsets[i+1])),
+// so playback indexes arrays instead of building an object per step.
+function newTrace() {
+    return { length: 0, offsets: [0], cells: [], vals: [], current: [], changes: [], lastCell: 0 };
+}
+
+function appendTraceBlock(trace, block) {
+    let end = trace.offsets[trace.offsets.length - 1];
+    for (const n of block.counts) trace.offsets.push(end += n);
+
+    let cell = trace.lastCell;
+    for (const d of block.cells) trace.cells.push(cell += d);
+    trace.lastCell = cell;
+
+    for (let k = 0; k < block.vals.length; k += 2) {
+        for (let n = block.vals[k + 1]; n > 0; n--) trace.vals.push(block.vals[k]);
+    }
+    for (const u of block.current) trace.current.push(u);
+
+    // Counter changes as [step, name, value], in step order
+    const changes = [];
+    for (const [name, pairs] of Object.entries(block.counters)) {
+        for (let k = 0; k < pairs.length; k += 2) changes.push([block.start + pairs[k], name, pairs[k + 1]]);
+    }
+    changes.sort((a, b) => a[0] - b[0]);
+    for (const change of changes) trace.changes.push(change);
+
+    trace.length += block.count;
+}
+
+// Final counters of a fully decoded trace
+function traceTotals(trace) {
+    const totals = { nodes_expanded: 0, steps_taken: 0, max_frontier_size: 0, path_length: 0, finished: 0, success: 0 };
+    for (const [, name, value] of trace.changes) totals[name] = value;
+    return totals;
 }
 
 // Run Algorithm
@@ -490,19 +674,31 @@ async function runAlgorithm() {
     isRunning = true;
     btnRun.disabled = true;
     btnGenerate.disabled = true;
+    showStatus('');
 
     try {
-        const res = await fetch('/api/solve', {
+        const res = await fetch(`/api/solve/binary?stream=true&format=compact&algorithm=${encodeURIComponent(algo)}`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                maze: currentMaze,
-                algorithm: algo
-            })
+            headers: { 'Content-Type': MAZE_MEDIA_TYPE },
+            body: encodeMaze(currentMaze)
         });
-        const steps = await res.json();
+        if (!res.ok) throw await responseError(res, 'Solve');
+
+        // Blocks are appended as they arrive; the animation starts on the first one
+        const trace = newTrace();
+        let streamDone = false;
+        readStepStream(res, block => appendTraceBlock(trace, block))
+            .catch(e => {
+                // Over budget mid-stream: the steps so far still play out
+                console.error("Stream error", e);
+                showStatus(e.message);
+            })
+            .finally(() => { streamDone = true; });
 
+        const cols = currentMaze.width;
+        const stats = traceTotals(newTrace());
         let i = 0;
+        let nextChange = 0;
 
         function step() {
             if (!isRunning) return; // cancelled?
@@ -529,30 +725,34 @@ async function runAlgorithm() {
             }
 
             // Execute batch
+            const layout = gridLayout();
             for (let k = 0; k < stepsPerFrame; k++) {
-                if (i >= steps.length) break;
+                if (i >= trace.length) break;
 
-                const s = steps[i];
                 // Apply updates
-                if (s.grid_updates) {
-                    for (const [r, c, val] of s.grid_updates) {
-                        currentMaze.grid[r][c] = val;
-                    }
-                    drawMaze(s.grid_updates); // optimize redraw
+                for (let p = trace.offsets[i]; p < trace.offsets[i + 1]; p++) {
+                    const u = trace.cells[p];
+                    const r = Math.floor(u / cols), c = u % cols;
+                    currentMaze.grid[r][c] = trace.vals[p];
+                    drawCell(layout, r, c, trace.vals[p]); // optimize redraw
+                }
+                while (nextChange < trace.changes.length && trace.changes[nextChange][0] <= i) {
+                    const [, name, value] = trace.changes[nextChange++];
+                    stats[name] = value;
                 }
 
                 // Update stats
-                if (i % 10 === 0 || i === steps.length - 1) { // throttle DOM updates
-                    document.getElementById('res-nodes').innerText = s.nodes_expanded;
-                    if (s.finished) {
-                        document.getElementById('res-success').innerText = s.success ? "YES" : "NO";
-                        if (s.success) document.getElementById('res-length').innerText = s.path_length;
+                if (i % 10 === 0 || stats.finished) { // throttle DOM updates
+                    document.getElementById('res-nodes').innerText = stats.nodes_expanded;
+                    if (stats.finished) {
+                        document.getElementById('res-success').innerText = stats.success ? "YES" : "NO";
+                        if (stats.success) document.getElementById('res-length').innerText = stats.path_length;
                     }
                 }
                 i++;
             }
 
-            if (i < steps.length) {
+            if (i < trace.length || !streamDone) {
                 if (delay > 0) setTimeout(() => requestAnimationFrame(step), delay);
                 else requestAnimationFrame(step);
             } else {
@@ -566,6 +766,7 @@ async function runAlgorithm() {
 
     } catch (e) {
         console.error("Solve error", e);
+        showStatus(e.message);
         isRunning = false;
         btnRun.disabled = false;
         btnGenerate.disabled = false;
@@ -587,40 +788,44 @@ btnRunAll.addEventListener('click', async () => {
     modal.classList.remove('hidden');
 
     // We can use the /batch endpoint but that generates NEW mazes.
-    // Here we want to compare on THIS maze.
-    // So we run sequentially.
+    // Here we want to compare on THIS maze: one /api/solve_many for all of them.
 
-    tbody.innerHTML = '';
     const algos = Object.keys(ALGO_INFO);
-
-    for (const algo of algos) {
-        const tr = document.createElement('tr');
-        tr.className = "border-b";
-        tr.innerHTML = `<td class="px-6 py-4 font-medium text-gray-900">${algo}</td>
-                        <td class="px-6 py-4">...</td>
-                        <td class="px-6 py-4">-</td>
-                        <td class="px-6 py-4">-</td>
-                        <td class="px-6 py-4">-</td>`;
-        tbody.appendChild(tr);
-
-        try {
-            const res = await fetch('/api/solve', {
+    try {
+        // Refer to the server-side maze by id; re-upload only if it is unknown there
+        let res = await fetch('/api/solve_many', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ maze_id: currentMaze.maze_id, algorithms: algos })
+        });
+        if (res.status === 404 || res.status === 422) {
+            res = await fetch('/api/solve_many', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ maze: currentMaze, algorithm: algo })
+                body: JSON.stringify({ maze: currentMaze, algorithms: algos })
             });
-            const steps = await res.json();
-            const last = steps[steps.length - 1];
-
-            tr.innerHTML = `<td class="px-6 py-4 font-medium text-gray-900">${algo}</td>
-                            <td class="px-6 py-4 text-${last.success ? 'green' : 'red'}-600 font-bold">${last.success ? 'YES' : 'NO'}</td>
-                            <td class="px-6 py-4">${last.path_length || '-'}</td>
-                            <td class="px-6 py-4">${last.nodes_expanded}</td>
-                            <td class="px-6 py-4">${steps.length}</td>`;
-
-        } catch (e) {
-            tr.innerHTML = `<td colspan="5" class="px-6 py-4 text-red-500">Error</td>`;
         }
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const results = await res.json();
+
+        tbody.innerHTML = '';
+        for (const { algorithm, summary, error } of results) {
+            const tr = document.createElement('tr');
+            tr.className = "border-b";
+            if (!summary) {
+                tr.innerHTML = `<td class="px-6 py-4 font-medium text-gray-900">${algorithm}</td>
+                                <td colspan="4" class="px-6 py-4 text-red-500">${error || 'Error'}</td>`;
+            } else {
+                tr.innerHTML = `<td class="px-6 py-4 font-medium text-gray-900">${algorithm}</td>
+                                <td class="px-6 py-4 text-${summary.success ? 'green' : 'red'}-600 font-bold">${summary.success ? 'YES' : 'NO'}</td>
+                                <td class="px-6 py-4">${summary.path_length || '-'}</td>
+                                <td class="px-6 py-4">${summary.nodes_expanded}</td>
+                                <td class="px-6 py-4">${summary.steps_taken}</td>`;
+            }
+            tbody.appendChild(tr);
+        }
+    } catch (e) {
+        tbody.innerHTML = `<tr><td colspan="5" class="px-6 py-4 text-red-500">Error</td></tr>`;
     }
 });
 
@@ -0,0 +1,47 @@
+import os
+import sqlite3
+import tempfile
+import threading
+
+# State shared between server processes. In multi-worker mode (uvicorn
+# --workers N) each worker is a separate process with its own memory, so
+# anything a later request may need from another worker (generated mazes,
+# solve results, batch jobs) has to live outside of it. This is a single
+# SQLite file: no extra service to run, and it survives restarts.
+
+# "memory" (per process, the default) or "sqlite" (shared)
+STATE_BACKEND = os.environ.get("MAZE_CACHE_BACKEND", "memory")
+STATE_PATH = os.environ.get("MAZE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "maze-solver.sqlite3"))
+
+if STATE_BACKEND not in ("memory", "sqlite"):
+    raise ValueError(f"MAZE_CACHE_BACKEND must be 'memory' or 'sqlite', not {STATE_BACKEND!r}")
+
+class Database:
+    # One connection per thread (sqlite3 connections can't be shared between
+    # threads), opened on first use so nothing is inherited across a fork.
+    # WAL lets readers in every process run alongside the one writer.
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None) # autocommit
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        return self.connect().execute(sql, params)
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+def get_database(path: str = STATE_PATH) -> Database:
+    with _databases_lock:
+        if path not in _databases:
+            _databases[path] = Database(path)
+        return _databases[path]
@@ -0,0 +1,95 @@
+import json
+from time import perf_counter
+from typing import Iterable, Iterator, List, Literal, Optional
+from .metrics import add_phase
+
+# Compact step trace ("format=compact" on the solve endpoints).
+# A trace is sent as one or more blocks of consecutive steps, each a JSON
+# object of flat integer columns instead of one StepUpdate object per step:
+#
+#   start     index of the block's first step in the trace
+#   count     number of steps in the block
+#   counts    grid updates per step
+#   cells     flat cell id (r * width + c) of every update, each stored as the
+#             difference from the previous update's id (carried across blocks)
+#   vals      new cell values, run-length encoded as [val, run, val, run, ...]
+#   current   current_cell of each step as a flat id, -1 for none
+#   counters  {name: [step, value, step, value, ...]} for the StepUpdate
+#             counters and flags, listed only at the steps where they change
+#             (step relative to start; every counter starts at 0 / false)
+#
+# app/static/script.js (appendTraceBlock) decodes it.
+
+TraceFormat = Literal["steps", "compact"]
+
+TRACE_COUNTERS = ("nodes_expanded", "steps_taken", "max_frontier_size", "path_length", "finished", "success")
+
+class CompactTraceEncoder:
+    # Stateful so counters and cell deltas carry across the blocks of one trace
+    def __init__(self, width: int):
+        self.width = width
+        self.step = 0
+        self.last_cell = 0
+        self.counters = dict.fromkeys(TRACE_COUNTERS, 0)
+
+    def encode(self, steps: List[dict]) -> str:
+        # steps: StepUpdate dicts (as parsed from their JSON lines)
+        width = self.width
+        last_cell = self.last_cell
+        counters = self.counters
+        counts, cells, vals, current = [], [], [], []
+        changes = {}
+
+        for i, step in enumerate(steps):
+            updates = step["grid_updates"]
+            counts.append(len(updates))
+            for r, c, val in updates:
+                u = r * width + c
+                cells.append(u - last_cell)
+                last_cell = u
+                if vals and vals[-2] == val:
+                    vals[-1] += 1
+                else:
+                    vals += (val, 1)
+
+            cur = step["current_cell"]
+            current.append(cur[0] * width + cur[1] if cur else -1)
+
+            for name in TRACE_COUNTERS:
+                value = int(step[name])
+                if value != counters[name]:
+                    counters[name] = value
+                    changes.setdefault(name, []).extend((i, value))
+
+        block = {
+            "start": self.step, "count": len(steps), "counts": counts, "cells": cells,
+            "vals": vals, "current": current, "counters": changes
+        }
+        self.step += len(steps)
+        self.last_cell = last_cell
+        return json.dumps(block, separators=(",", ":"))
+
+def iter_compact_blocks(lines: Iterable[str], width: int, block_size: Optional[int] = None) -> Iterator[str]:
+    # StepUpdate JSON lines -> compact block JSON, block_size steps at a time
+    # (one block for the whole trace if None)
+    encoder = CompactTraceEncoder(width)
+    steps = []
+    elapsed = 0.0 # re-encoding only, not the solver driving `lines`
+    try:
+        for line in lines:
+            start = perf_counter()
+            steps.append(json.loads(line))
+            block = None
+            if block_size and len(steps) >= block_size:
+                block = encoder.encode(steps)
+                steps = []
+            elapsed += perf_counter() - start
+            if block is not None:
+                yield block
+        if steps or encoder.step == 0:
+            start = perf_counter()
+            block = encoder.encode(steps)
+            elapsed += perf_counter() - start
+            yield block
+    finally:
+        add_phase("serialize", elapsed)
@@ -0,0 +1,68 @@
+import argparse
+import json
+import sys
+
+from .suite import PROFILES, DEFAULT_SEED, run_suite, compare
+
+# Maze generator and solver benchmarks.
+#
+#   python -m benchmarks                          # quick profile, print results
+#   python -m benchmarks --profile full --save baseline.json
+#   python -m benchmarks --compare baseline.json  # exit 1 on regressions
+#   python -m benchmarks --filter "headless/A\*"  # only matching benchmarks
+
+HEADER = f"{'benchmark':<52} {'n':>3} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'ops/s':>9} {'ns/unit':>9} {'peak KiB':>9}"
+
+def print_row(name: str, stats: dict):
+    print(f"{name:<52} {stats['n']:>3} {stats['p50_ms']:>9.3f} {stats['p90_ms']:>9.3f} {stats['p99_ms']:>9.3f} "
+          f"{stats['ops_per_s']:>9.1f} {stats['ns_per_unit']:>9.0f} {stats['peak_kib']:>9.1f}", flush=True)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark maze generation and solvers.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick", help="sweep size (default: quick)")
+    parser.add_argument("--sizes", type=int, nargs="+", help="grid sizes, overriding the profile")
+    parser.add_argument("--densities", type=float, nargs="+", help="wall densities for noise modes, overriding the profile")
+    parser.add_argument("--mazes", type=int, help="mazes per case, overriding the profile")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="base seed; same seed, same mazes")
+    parser.add_argument("--filter", help="regex selecting benchmarks by name, e.g. 'solve/BFS'")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to check against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown vs baseline (default: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    sizes, densities, mazes = PROFILES[args.profile]
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        # Compare like with like: default to the baseline's maze set
+        if args.mazes is None:
+            mazes = baseline["meta"]["mazes_per_case"]
+        if args.seed == DEFAULT_SEED:
+            args.seed = baseline["meta"]["seed"]
+
+    print(HEADER)
+    results = run_suite(args.sizes or sizes, args.densities or densities, args.mazes or mazes,
+                        seed=args.seed, pattern=args.filter, progress=print_row)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved {len(results['results'])} results to {args.save}")
+
+    if baseline is None:
+        return 0
+
+    if baseline["meta"].get("generator_version") != results["meta"]["generator_version"]:
+        print("\nWarning: the baseline was recorded with another GENERATOR_VERSION, so the mazes differ")
+    regressions = compare(baseline, results, args.threshold)
+    if not regressions:
+        print(f"\nNo regressions beyond {args.threshold:.0%} vs {args.compare}")
+        return 0
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} vs {args.compare}:")
+    for name, metric, old, new in regressions:
+        print(f"  {name:<52} {metric:<8} {old:>10.3f} -> {new:>10.3f} ({new / old - 1:+.0%})")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
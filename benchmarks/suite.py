@@ -0,0 +1,168 @@
+import math
+import platform
+import re
+import time
+import tracemalloc
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.models import MazeConfig
+from app.maze_generator import generate_maze, seeded, derive_seed, GENERATOR_VERSION
+from app.algorithms import ALGORITHMS, HEADLESS_ALGORITHMS
+from app.algorithms.utils import NeighborIndex, get_neighbor_index
+from app.algorithms.wavefront import bfs_many
+from app.grid import grid_array
+
+# MazeConfig modes swept by the suite. Density only matters for the noise
+# modes; perfect mazes ignore it and are run once per size.
+NOISE_MODES = {
+    "noise": dict(allow_cycles=True, guaranteed_path=False),
+    "guaranteed": dict(allow_cycles=True, guaranteed_path=True),
+    "no_path": dict(allow_cycles=True, no_path=True),
+}
+PERFECT_MODES = {
+    generator: dict(allow_cycles=False, generator=generator)
+    for generator in ("prim", "kruskal", "wilson", "division")
+}
+
+PROFILES = {
+    # name: (grid sizes, wall densities, mazes per case)
+    "quick": ((25, 50), (0.3,), 5),
+    "full": ((25, 50, 100), (0.2, 0.35), 20),
+}
+
+DEFAULT_SEED = 12345
+
+# Mazes per vectorized BFS run
+WAVEFRONT_STACK = 256
+
+class Case:
+    # One MazeConfig sweep point; mazes are fixed by (seed, maze index)
+    def __init__(self, mode: str, size: int, density: Optional[float], options: dict):
+        self.name = f"{mode}/{size}x{size}" + (f"/d{density:g}" if density is not None else "")
+        self.config = MazeConfig(width=size, height=size, wall_density=density if density is not None else 0.3, **options)
+        self.cells = size * size
+
+    def configs(self, seed: int, count: int) -> List[MazeConfig]:
+        return [seeded(self.config, derive_seed(seed, i)) for i in range(count)]
+
+def build_cases(sizes, densities) -> List[Case]:
+    cases = []
+    for size in sizes:
+        for mode, options in NOISE_MODES.items():
+            cases += [Case(mode, size, density, options) for density in densities]
+        cases += [Case(mode, size, None, options) for mode, options in PERFECT_MODES.items()]
+    return cases
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def peak_memory(fn: Callable[[], object]) -> int:
+    # Peak bytes allocated while fn runs. Measured in a separate run because
+    # tracemalloc slows every allocation down.
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(runs: List[Callable[[], object]], work: Callable[[object], int]) -> dict:
+    # Time each run once (after one untimed warm-up) and summarize.
+    # work(result) is the number of work units it did (cells, nodes expanded),
+    # for the per-unit cost.
+    runs[0]()
+    times = []
+    units = 0
+    for run in runs:
+        start = time.perf_counter_ns()
+        result = run()
+        times.append(time.perf_counter_ns() - start)
+        units += work(result)
+
+    total = sum(times)
+    times.sort()
+    return {
+        "n": len(times),
+        "mean_ms": total / len(times) / 1e6,
+        "p50_ms": percentile(times, 50) / 1e6,
+        "p90_ms": percentile(times, 90) / 1e6,
+        "p99_ms": percentile(times, 99) / 1e6,
+        "min_ms": times[0] / 1e6,
+        "ops_per_s": len(times) / (total / 1e9) if total else 0.0,
+        "ns_per_unit": total / units if units else 0.0,
+        "peak_kib": peak_memory(runs[-1]) / 1024,
+    }
+
+def case_benchmarks(case: Case, seed: int, count: int) -> Iterator[Tuple[str, list, Callable]]:
+    # (name, runs, work) for every benchmark of a case, see measure()
+    configs = case.configs(seed, count)
+
+    # Generation, per cell
+    yield f"generate/{case.name}", [lambda c=c: generate_maze(c) for c in configs], lambda _: case.cells
+
+    mazes = [generate_maze(c) for c in configs]
+    yield f"index/{case.name}", [lambda m=m: NeighborIndex(grid_array(m) != 1) for m in mazes], lambda _: case.cells
+
+    # Solvers, per expanded node. The neighbor index is built up front (and
+    # measured above), as it is shared by every algorithm run on a maze.
+    for maze in mazes:
+        get_neighbor_index(maze)
+    for algo in ALGORITHMS:
+        yield (f"solve/{algo}/{case.name}", [lambda m=m, algo=algo: list(ALGORITHMS[algo](m)) for m in mazes],
+               lambda steps: steps[-1].nodes_expanded if steps else 0)
+        yield (f"headless/{algo}/{case.name}", [lambda m=m, algo=algo: HEADLESS_ALGORITHMS[algo](m) for m in mazes],
+               lambda summary: summary.nodes_expanded)
+
+    # Vectorized BFS per expanded node (comparable with headless/BFS), on a
+    # stack of WAVEFRONT_STACK mazes (the case's, repeated): it only pays off
+    # on many mazes at once
+    stack = (mazes * -(-WAVEFRONT_STACK // len(mazes)))[:WAVEFRONT_STACK]
+    yield (f"wavefront/BFS/{case.name}", [lambda: bfs_many(stack)] * 3,
+           lambda summaries: sum(summary.nodes_expanded for summary in summaries))
+
+def run_suite(sizes, densities, count: int, seed: int = DEFAULT_SEED, pattern: Optional[str] = None,
+              progress: Optional[Callable[[str, dict], None]] = None) -> dict:
+    # Returns {"meta": ..., "results": {benchmark name: stats}}; pattern is a
+    # regex selecting benchmarks by name
+    results = {}
+    for case in build_cases(sizes, densities):
+        for name, runs, work in case_benchmarks(case, seed, count):
+            if pattern and not re.search(pattern, name):
+                continue
+            results[name] = stats = measure(runs, work)
+            if progress:
+                progress(name, stats)
+
+    meta = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "generator_version": GENERATOR_VERSION,
+        "seed": seed,
+        "mazes_per_case": count,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    return {"meta": meta, "results": results}
+
+# Metrics checked against a baseline (lower is better for all of them).
+# p50 rather than the mean, so one slow outlier run does not fail the check.
+COMPARED_METRICS = ("p50_ms", "peak_kib")
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[Tuple[str, str, float, float]]:
+    # Benchmarks that got worse than baseline by more than threshold (0.1 =
+    # 10%) as (name, metric, baseline value, current value)
+    regressions = []
+    for name, stats in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = base[metric], stats[metric]
+            if old > 0 and new > old * (1 + threshold):
+                regressions.append((name, metric, old, new))
+    return regressions
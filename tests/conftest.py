@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+# Large mazes and corpora are files; keep the tests' own out of the working tree.
+# Set before anything imports app, which reads these at import time.
+_data = tempfile.mkdtemp(prefix="maze-tests-")
+os.environ.setdefault("MAZE_LARGE_DIR", os.path.join(_data, "large"))
+os.environ.setdefault("MAZE_CORPUS_DIR", os.path.join(_data, "corpora"))
+os.environ.setdefault("MAZE_CACHE_BACKEND", "memory")
+
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+    return TestClient(app)
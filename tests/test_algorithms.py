@@ -0,0 +1,32 @@
+import pytest
+
+from app.algorithms import ALGORITHMS, HEADLESS_ALGORITHMS
+from app.maze_generator import get_or_generate_maze, seeded
+from app.models import MazeConfig
+
+SUMMARY_FIELDS = ("success", "path_length", "nodes_expanded", "steps_taken", "max_frontier_size")
+
+def cyclic_mazes(count=12):
+    # Noise mazes (cycles, several shortest paths), some without a path
+    for seed in range(count):
+        unguaranteed = seed % 4 == 0
+        config = MazeConfig(width=25 + seed, height=20 + 2 * seed, allow_cycles=True,
+                            wall_density=0.45 if unguaranteed else 0.2 + 0.02 * seed, guaranteed_path=not unguaranteed)
+        yield get_or_generate_maze(seeded(config, seed))
+
+def trace_summary(algorithm, maze):
+    last = list(ALGORITHMS[algorithm](maze))[-1]
+    return {field: getattr(last, field) for field in SUMMARY_FIELDS}
+
+@pytest.mark.parametrize("algorithm", ["Jump Point Search", "Dead-End Filling"])
+def test_shortest_path_on_mazes_with_cycles(algorithm):
+    for maze in cyclic_mazes():
+        bfs = HEADLESS_ALGORITHMS["BFS"](maze)
+        summary = HEADLESS_ALGORITHMS[algorithm](maze)
+        assert summary.success == bfs.success
+        assert summary.path_length == bfs.path_length
+
+@pytest.mark.parametrize("algorithm", ["Jump Point Search", "Dead-End Filling"])
+def test_trace_matches_headless(algorithm):
+    for maze in cyclic_mazes():
+        assert trace_summary(algorithm, maze) == HEADLESS_ALGORITHMS[algorithm](maze).model_dump()
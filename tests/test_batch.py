@@ -0,0 +1,37 @@
+import os
+
+from app.batch import run_batch, VECTORIZED_BFS
+from app.cache import maze_cache, maze_config_cache
+from app.large_maze import LARGE_MAZE_DIR, LARGE_MAZE_FILES
+from app.models import BatchConfig, MazeConfig
+
+def config(**changes):
+    return BatchConfig(maze_config=MazeConfig(width=30, height=30, allow_cycles=True), num_mazes=12,
+                       algorithms=["BFS", "A*"], seed=5, workers=1, **changes)
+
+def by_algorithm(results):
+    return {result.algorithm: result for result in results}
+
+def test_vectorized_is_opt_in():
+    assert list(by_algorithm(run_batch(config()))) == ["BFS", "A*"]
+
+def test_vectorized_bfs_is_reported_separately():
+    per_maze = by_algorithm(run_batch(config()))
+    vectorized = by_algorithm(run_batch(config(vectorized=True)))
+    assert set(vectorized) == {VECTORIZED_BFS, "A*"}
+    for field in ("success_rate", "avg_nodes", "avg_path_length", "avg_steps", "avg_frontier"):
+        assert getattr(vectorized[VECTORIZED_BFS], field) == getattr(per_maze["BFS"], field)
+
+def test_large_batch_leaves_no_maze_files():
+    listing = lambda: [name for name in os.listdir(LARGE_MAZE_DIR) if name != ".lock"] if os.path.isdir(LARGE_MAZE_DIR) else []
+    before = listing()
+    large = BatchConfig(maze_config=MazeConfig(width=120, height=120), num_mazes=20, algorithms=["BFS"], seed=9, workers=1)
+    assert by_algorithm(run_batch(large))["BFS"].success_rate == 1
+    after = listing()
+    assert len(after) <= LARGE_MAZE_FILES
+    assert sorted(after) == sorted(before)
+
+def test_batch_mazes_skip_the_maze_cache():
+    before = len(maze_cache), len(maze_config_cache)
+    run_batch(config())
+    assert (len(maze_cache), len(maze_config_cache)) == before
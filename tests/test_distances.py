@@ -0,0 +1,58 @@
+import random
+
+from app.algorithms import HEADLESS_ALGORITHMS
+from app.grid import grid_array, maze_from_array
+from app.maze_generator import get_or_generate_maze, seeded
+from app.models import MazeConfig
+
+def field_maze(seed):
+    return get_or_generate_maze(seeded(MazeConfig(width=35, height=25, allow_cycles=True, wall_density=0.3), seed))
+
+def bfs(maze, start, target):
+    # BFS on the same walls with start and target as its endpoints
+    arr = grid_array(maze).copy()
+    arr[arr >= 10] = 2
+    arr[start], arr[target] = 10, 11
+    return HEADLESS_ALGORITHMS["BFS"](maze_from_array(arr, start, target))
+
+def test_answers_match_bfs(client):
+    rng = random.Random(2)
+    maze = field_maze(21)
+    arr = grid_array(maze)
+    target = maze.end_pos
+    starts = [(r, c) for r, c in ((rng.randrange(maze.height), rng.randrange(maze.width)) for _ in range(60)) if arr[r, c] != 1 and (r, c) != target]
+    response = client.post("/api/distances", json={"maze_id": maze.maze_id, "starts": starts})
+    assert response.status_code == 200
+    assert tuple(response.json()["target"]) == tuple(target)
+
+    for start, answer in zip(starts, response.json()["answers"]):
+        expected = bfs(maze, start, target)
+        assert answer["success"] == expected.success
+        assert answer["path_length"] == expected.path_length
+        if not expected.success:
+            assert answer["next_cell"] is None and answer["path"] is None
+            continue
+        # The first move is one step closer, and the path is a shortest one through it
+        next_cell = tuple(answer["next_cell"])
+        assert abs(next_cell[0] - start[0]) + abs(next_cell[1] - start[1]) == 1
+        assert next_cell == target or bfs(maze, next_cell, target).path_length == expected.path_length - 1
+        path = [tuple(cell) for cell in answer["path"]]
+        assert (path[0], path[1], path[-1], len(path)) == (start, next_cell, target, expected.path_length)
+
+def test_field_is_cached(client):
+    maze = field_maze(22)
+    query = {"maze_id": maze.maze_id, "starts": [list(maze.start_pos)], "paths": False}
+    first = client.post("/api/distances", json=query).json()
+    second = client.post("/api/distances", json=query).json()
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert first["answers"] == second["answers"]
+    assert second["answers"][0]["path"] is None
+    # The same maze sent inline shares the field
+    inline = client.post("/api/distances", json={"maze": maze.model_dump(), "starts": [list(maze.start_pos)]}).json()
+    assert inline["cached"]
+
+def test_cells_outside_the_maze(client):
+    maze = field_maze(23)
+    for query in ({"starts": [[maze.height, 0]]}, {"starts": [[0, -1]]}, {"starts": [[1, 1]], "target": [0, maze.width]}):
+        response = client.post("/api/distances", json={"maze_id": maze.maze_id, **query})
+        assert response.status_code == 400
@@ -0,0 +1,28 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.execution import AdmissionMiddleware, Limiter
+
+def test_match_route_templates():
+    middleware = AdmissionMiddleware(None)
+    assert middleware.match("/api/solve") == ("/api/solve", "solve")
+    assert middleware.match("/api/sessions/0123abcd/edits") == ("/api/sessions/{session_id}/edits", "solve")
+    assert middleware.match("/api/batch/rows") == ("/api/batch/rows", "batch")
+    assert middleware.match("/api/jobs/0123abcd") is None
+    assert middleware.match("/api/solve/extra") is None
+    assert middleware.match("/health") is None
+
+def test_parameterized_route_is_admission_controlled():
+    app = FastAPI()
+
+    @app.post("/api/sessions/{session_id}/edits")
+    def edit(session_id: str):
+        return {"session_id": session_id}
+
+    full = Limiter("solve", 1, 0)
+    full._slots = asyncio.Semaphore(0) # every slot taken, no queue
+    limited = AdmissionMiddleware(app, {"solve": full}, {"/api/sessions/{session_id}/edits": "solve"})
+    response = TestClient(limited).post("/api/sessions/abc/edits")
+    assert response.status_code == 429
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from app.algorithms.hpa import Abstraction, hpa_search
+from app.grid import grid_array, maze_from_array
+from app.maze_generator import get_or_generate_maze, seeded
+from app.models import MazeConfig
+
+def noise_maze(seed, side=70):
+    return get_or_generate_maze(seeded(MazeConfig(width=side, height=side, allow_cycles=True), seed))
+
+def random_edits(rng, maze, count):
+    # (cell, is_wall) changes that leave the start and end open
+    fixed = {maze.start_pos[0] * maze.width + maze.start_pos[1], maze.end_pos[0] * maze.width + maze.end_pos[1]}
+    cells = [u for u in rng.sample(range(maze.width * maze.height), count + 2) if u not in fixed][:count]
+    return [(u, rng.random() < 0.5) for u in cells]
+
+@pytest.mark.parametrize("size", [4, 8, 16])
+def test_repair_matches_rebuild(size):
+    rng = random.Random(size)
+    maze = noise_maze(size)
+    open_cells = grid_array(maze) != 1
+    start, end = maze.start_pos[0] * maze.width + maze.start_pos[1], maze.end_pos[0] * maze.width + maze.end_pos[1]
+    repaired = Abstraction(open_cells, size)
+    for _ in range(10):
+        edits = random_edits(rng, maze, rng.randint(1, 12))
+        touched = repaired.edit(edits)
+        assert len(touched) < repaired.rows * repaired.cols
+        for u, wall in edits:
+            open_cells.flat[u] = not wall
+        rebuilt = Abstraction(open_cells, size)
+
+        assert repaired.nodes == rebuilt.nodes
+        assert repaired.dists == rebuilt.dists
+        assert {u: sorted(v) for u, v in repaired.links.items()} == {u: sorted(v) for u, v in rebuilt.links.items()}
+        assert hpa_search(repaired, start, end) == hpa_search(rebuilt, start, end)
+
+def test_hpa_session_edits(client):
+    rng = random.Random(3)
+    maze = noise_maze(4, side=60)
+    created = client.post("/api/sessions", json={"maze_id": maze.maze_id, "algorithm": "HPA*"})
+    assert created.status_code == 200
+    session_id = created.json()["session_id"]
+
+    arr = grid_array(maze).copy()
+    for _ in range(5):
+        edits = random_edits(rng, maze, 8)
+        cells = [[u // maze.width, u % maze.width, 1 if wall else 2] for u, wall in edits]
+        update = client.post(f"/api/sessions/{session_id}/edits", json={"cells": cells})
+        assert update.status_code == 200
+        for u, wall in edits:
+            arr.flat[u] = 1 if wall else 2
+
+        # Same answer as HPA* on the edited maze from scratch
+        edited = maze_from_array(arr, maze.start_pos, maze.end_pos)
+        fresh = client.post("/api/solve", json={"maze": edited.model_dump(), "algorithm": "HPA*"}).json()[-1]
+        assert update.json()["success"] == fresh["success"]
+        assert update.json()["path_length"] == fresh["path_length"]
@@ -0,0 +1,35 @@
+import pytest
+
+from app.cache import Cache
+from app.jobs import JobStore
+from app.metrics import REGISTRY, Metric
+
+# Backends missing part of their interface fail when created, not on first use
+
+def test_incomplete_job_store():
+    class SaveOnly(JobStore):
+        def save(self, job):
+            pass
+    with pytest.raises(TypeError):
+        SaveOnly()
+
+def test_incomplete_cache():
+    class NoStats(Cache):
+        def get(self, key, default=None):
+            return default
+
+        def put(self, key, value):
+            pass
+
+        def __len__(self):
+            return 0
+    with pytest.raises(TypeError):
+        NoStats()
+
+def test_incomplete_metric():
+    class NoSamples(Metric):
+        kind = "gauge"
+    registered = len(REGISTRY)
+    with pytest.raises(TypeError):
+        NoSamples("maze_test_metric", "Never registered")
+    assert len(REGISTRY) == registered
@@ -0,0 +1,44 @@
+import time
+
+from app.jobs import FINISHED
+
+def job_config(num_mazes):
+    return {"maze_config": {"width": 20, "height": 20, "allow_cycles": True}, "num_mazes": num_mazes,
+            "algorithms": ["BFS", "A*"], "seed": 4, "workers": 1}
+
+def wait_for(client, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/jobs/{job_id}").json()
+        if job["status"] in FINISHED or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+def test_job_runs_to_done(client):
+    submitted = client.post("/api/jobs", json=job_config(25))
+    assert submitted.status_code == 202
+    assert submitted.json()["status"] == "queued" and submitted.json()["total_mazes"] == 25
+
+    job = wait_for(client, submitted.json()["id"])
+    assert job["status"] == "done" and job["completed_mazes"] == 25
+    assert [result["algorithm"] for result in job["results"]] == ["BFS", "A*"]
+    assert job["results"][0]["success_rate"] == 1
+    # Same seeded run as a direct batch (timings aside)
+    untimed = lambda results: [{k: v for k, v in result.items() if k != "avg_time_ms"} for result in results]
+    assert untimed(job["results"]) == untimed(client.post("/api/batch", json=job_config(25)).json())
+
+def test_job_cancel(client):
+    job_id = client.post("/api/jobs", json=job_config(1_000_000)).json()["id"]
+    cancelled = client.delete(f"/api/jobs/{job_id}")
+    assert cancelled.status_code == 200
+    job = wait_for(client, job_id)
+    assert job["status"] == "cancelled"
+    assert job["completed_mazes"] < job["total_mazes"]
+
+def test_unknown_job(client):
+    assert client.get("/api/jobs/missing").status_code == 404
+    assert client.delete("/api/jobs/missing").status_code == 404
+
+def test_job_needs_mazes(client):
+    for num_mazes in (-5, 0):
+        assert client.post("/api/jobs", json=job_config(num_mazes)).status_code == 422
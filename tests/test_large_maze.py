@@ -0,0 +1,37 @@
+import os
+import time
+
+from app import large_maze
+from app.large_maze import generate_large_maze, maze_path, maze_payload, prune_files
+from app.maze_generator import seeded
+from app.models import MazeConfig
+
+def large_config(seed):
+    return seeded(MazeConfig(width=120, height=120), seed)
+
+def test_prune_keeps_recently_used(monkeypatch):
+    monkeypatch.setattr(large_maze, "LARGE_MAZE_FILES", 1)
+    mazes = [generate_large_maze(large_config(seed), f"prune-test-{seed}") for seed in range(3)]
+    # All used just now: over the limit, but none may go
+    prune_files()
+    assert all(os.path.exists(maze_path(m.maze_id)) for m in mazes)
+    # Unused for longer than the grace period: the oldest go first
+    old = time.time() - large_maze.LARGE_MAZE_GRACE - 60
+    for i, maze in enumerate(mazes):
+        os.utime(maze_path(maze.maze_id), (old + i, old + i))
+    maze_payload(mazes[0]) # marks it used again
+    prune_files()
+    assert os.path.exists(maze_path(mazes[0].maze_id))
+    assert not any(os.path.exists(maze_path(m.maze_id)) for m in mazes[1:])
+
+def test_payload_of_pruned_maze_is_its_cells():
+    maze = generate_large_maze(large_config(7), "prune-test-payload")
+    os.remove(maze_path(maze.maze_id))
+    payload = maze_payload(maze)
+    assert isinstance(payload, bytes) and bytes(maze.cells) in payload
+
+def test_generation_budget(client, monkeypatch):
+    monkeypatch.setattr(large_maze, "GENERATE_TIME_BUDGET", 0)
+    response = client.post("/api/generate", json={"width": 300, "height": 300, "seed": 1})
+    assert response.status_code == 504
+    assert not [name for name in os.listdir(large_maze.LARGE_MAZE_DIR) if name.endswith(".tmp")]
@@ -0,0 +1,47 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models import MazeConfig, MazeState
+
+def maze(**changes):
+    fields = dict(width=3, height=2, grid=[[10, 2, 2], [1, 2, 11]], start_pos=(0, 0), end_pos=(1, 2))
+    return {**fields, **changes}
+
+def test_valid_maze():
+    assert MazeState(**maze()).cells == bytes([10, 2, 2, 1, 2, 11])
+
+@pytest.mark.parametrize("changes", [
+    dict(start_pos=(2, 0)),
+    dict(end_pos=(0, 3)),
+    dict(start_pos=(-1, 0)),
+    dict(end_pos=(70000, 0)),
+    dict(grid=[[10, 2, 2], [1, 11]]),
+    dict(grid=[[10, 2, 2]]),
+    dict(grid=[[10, 2, 256], [1, 2, 11]]),
+    dict(grid=[[10, 2, -1], [1, 2, 11]]),
+    dict(width=0, grid=[[], []]),
+])
+def test_invalid_maze(changes):
+    with pytest.raises(ValidationError):
+        MazeState(**maze(**changes))
+
+@pytest.mark.parametrize("changes", [
+    dict(start_pos=(5, 0)),
+    dict(start_pos=(-1, 0)),
+    dict(grid=[[10, 2, 2], [1, 11]]),
+    dict(grid=[[10, 2, 300], [1, 2, 11]]),
+])
+def test_invalid_inline_maze_is_422(client, changes):
+    response = client.post("/api/solve", json={"maze": maze(**changes), "algorithm": "BFS"})
+    assert response.status_code == 422
+
+def test_inline_maze_solves(client):
+    response = client.post("/api/solve", json={"maze": maze(), "algorithm": "BFS"})
+    assert response.status_code == 200
+    assert response.json()[-1]["path_length"] == 4
+
+def test_wilson_size_limit():
+    MazeConfig(width=1000, height=1000, generator="wilson")
+    MazeConfig(width=2000, height=2000, generator="wilson", allow_cycles=True) # noise: generator unused
+    with pytest.raises(ValidationError):
+        MazeConfig(width=2000, height=2000, generator="wilson")
@@ -0,0 +1,48 @@
+import random
+
+from app.algorithms import HEADLESS_ALGORITHMS
+from app.grid import grid_array, maze_from_array
+from app.maze_generator import get_or_generate_maze, seeded
+from app.models import MazeConfig
+
+def session_maze():
+    return get_or_generate_maze(seeded(MazeConfig(width=40, height=30, allow_cycles=True, wall_density=0.25), 11))
+
+def test_lpa_session_matches_bfs(client):
+    rng = random.Random(5)
+    maze = session_maze()
+    created = client.post("/api/sessions", json={"maze_id": maze.maze_id})
+    assert created.status_code == 200
+    session_id = created.json()["session_id"]
+    assert created.json()["path_length"] == HEADLESS_ALGORITHMS["BFS"](maze).path_length
+
+    arr = grid_array(maze).copy()
+    fixed = {maze.start_pos, maze.end_pos}
+    for version in range(1, 9):
+        cells = [(r, c) for r, c in ((rng.randrange(maze.height), rng.randrange(maze.width)) for _ in range(12)) if (r, c) not in fixed]
+        # Mostly walls, so the path keeps having to reroute (or disappears)
+        edits = [[r, c, 1 if rng.random() < 0.7 else 2] for r, c in cells]
+        update = client.post(f"/api/sessions/{session_id}/edits", json={"cells": edits})
+        assert update.status_code == 200
+        assert update.json()["version"] == version
+        for r, c, value in edits:
+            arr[r, c] = value
+
+        bfs = HEADLESS_ALGORITHMS["BFS"](maze_from_array(arr, maze.start_pos, maze.end_pos))
+        assert update.json()["success"] == bfs.success
+        assert update.json()["path_length"] == bfs.path_length
+
+def test_unknown_session(client):
+    response = client.post("/api/sessions/0123456789abcdef/edits", json={"cells": [[1, 1, 1]]})
+    assert response.status_code == 404
+
+def test_invalid_session_edits(client):
+    maze = session_maze()
+    session_id = client.post("/api/sessions", json={"maze_id": maze.maze_id}).json()["session_id"]
+    for cell in ([maze.height, 0, 1], [0, -1, 1], list(maze.start_pos) + [1], list(maze.end_pos) + [1]):
+        response = client.post(f"/api/sessions/{session_id}/edits", json={"cells": [cell]})
+        assert response.status_code == 400
+    # Only walls (1) and empty cells (2) can be written
+    assert client.post(f"/api/sessions/{session_id}/edits", json={"cells": [[1, 1, 5]]}).status_code == 422
+    # Refused edits leave the session as it was
+    assert client.post(f"/api/sessions/{session_id}/edits", json={"cells": [[1, 1, 2]]}).json()["version"] == 1
@@ -0,0 +1,21 @@
+from app.maze_generator import get_or_generate_maze, seeded
+from app.models import MazeConfig
+from app.solve_many import run_group
+
+ALGORITHMS = ["BFS", "A*", "DFS"]
+
+def maze():
+    return get_or_generate_maze(seeded(MazeConfig(width=30, height=30, allow_cycles=True), 3))
+
+def test_group_within_budget():
+    for traces in (False, True):
+        results = run_group(maze(), [(algorithm, {}) for algorithm in ALGORITHMS], traces, 10)
+        assert all(result is not None and error is None for result, _, error in results)
+
+def test_group_skips_solves_once_budget_is_spent():
+    results = run_group(maze(), [(algorithm, {}) for algorithm in ALGORITHMS], False, 1e-9)
+    # The first solve runs (the budget is checked between solves), the rest are skipped
+    assert results[0][0] is not None
+    for (result, seconds, error), algorithm in zip(results[1:], ALGORITHMS[1:]):
+        assert result is None and seconds == 0
+        assert error.startswith(f"{algorithm} skipped")
@@ -0,0 +1,41 @@
+import json
+import zlib
+
+from app import solve_cache
+from app.maze_generator import get_maze_by_id
+from app.solve_cache import iter_solve_lines, solve_key, trace_lines
+
+def no_pool():
+    raise AssertionError("streams must not use the solve pool")
+
+def large_maze(client, seed):
+    # A maze over the large-maze side, so past POOL_MIN_CELLS too
+    response = client.post("/api/generate", json={"width": 150, "height": 150, "allow_cycles": True, "seed": seed})
+    assert response.status_code == 200
+    return response.json()["maze_id"]
+
+def test_trace_lines_round_trip(monkeypatch):
+    monkeypatch.setattr(solve_cache, "TRACE_READ_BYTES", 100)
+    lines = [json.dumps({"step": i, "cells": [[i, i, 3]] * (i % 7)}) for i in range(2000)]
+    trace = zlib.compress(("\n".join(lines) + "\n").encode())
+    assert list(trace_lines(trace)) == lines
+
+def test_stream_first_step_before_solve_finishes(client, monkeypatch):
+    monkeypatch.setattr(solve_cache, "get_solve_pool", no_pool)
+    maze = get_maze_by_id(large_maze(client, 1))
+
+    lines = iter_solve_lines(maze, "BFS", pooled=False)
+    first = json.loads(next(lines))
+    assert first["finished"] is False
+    # Traces are cached when the solve ends, so it is still running
+    assert solve_cache.solve_cache.get(solve_key(maze, "BFS")) is None
+    lines.close()
+
+def test_large_maze_stream_first_line(client, monkeypatch):
+    monkeypatch.setattr(solve_cache, "get_solve_pool", no_pool)
+    maze_id = large_maze(client, 2)
+
+    with client.stream("POST", "/api/solve/stream", json={"maze_id": maze_id, "algorithm": "BFS"}) as response:
+        assert response.status_code == 200
+        first = json.loads(next(response.iter_lines()))
+    assert first["current_cell"] is not None
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from app.maze_generator import get_or_generate_maze, seeded
+from app.models import MazeConfig, StepUpdate
+from app.trace import TRACE_COUNTERS, iter_compact_blocks
+
+def decode_blocks(blocks, width):
+    # Compact blocks back to StepUpdate dicts, the way appendTraceBlock in
+    # app/static/script.js reads them
+    steps = []
+    cell = 0
+    counters = dict.fromkeys(TRACE_COUNTERS, 0)
+    for block in blocks:
+        assert block["start"] == len(steps)
+        vals = [val for k in range(0, len(block["vals"]), 2) for val in [block["vals"][k]] * block["vals"][k + 1]]
+        changes = {}
+        for name, pairs in block["counters"].items():
+            for k in range(0, len(pairs), 2):
+                changes.setdefault(pairs[k], []).append((name, pairs[k + 1]))
+        deltas, values = iter(block["cells"]), iter(vals)
+        for i in range(block["count"]):
+            updates = []
+            for _ in range(block["counts"][i]):
+                cell += next(deltas)
+                updates.append((cell // width, cell % width, next(values)))
+            for name, value in changes.get(i, ()):
+                counters[name] = value
+            current = block["current"][i]
+            steps.append(StepUpdate(
+                grid_updates=updates, current_cell=divmod(current, width) if current >= 0 else None,
+                **{name: bool(counters[name]) if name in ("finished", "success") else counters[name] for name in TRACE_COUNTERS}
+            ).model_dump())
+        assert next(deltas, None) is None and next(values, None) is None
+    return steps
+
+def maze():
+    return get_or_generate_maze(seeded(MazeConfig(width=27, height=19, allow_cycles=True), 8))
+
+@pytest.mark.parametrize("algorithm", ["BFS", "A*", "Dead-End Filling"])
+def test_compact_round_trip(client, algorithm):
+    m = maze()
+    steps = client.post("/api/solve", json={"maze_id": m.maze_id, "algorithm": algorithm}).json()
+    expected = [StepUpdate(**step).model_dump() for step in steps]
+    lines = [json.dumps(step) for step in steps]
+    for block_size in (None, 1, 7, 500):
+        blocks = [json.loads(block) for block in iter_compact_blocks(lines, m.width, block_size)]
+        assert decode_blocks(blocks, m.width) == expected
+
+def test_compact_endpoints(client):
+    m = maze()
+    query = {"maze_id": m.maze_id, "algorithm": "A*"}
+    expected = [StepUpdate(**step).model_dump() for step in client.post("/api/solve", json=query).json()]
+    whole = client.post("/api/solve?format=compact", json=query).json()
+    assert decode_blocks([whole], m.width) == expected
+    streamed = client.post("/api/solve/stream?format=compact", json=query)
+    assert decode_blocks([json.loads(line) for line in streamed.text.splitlines()], m.width) == expected